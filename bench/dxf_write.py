@@ -0,0 +1,105 @@
+#!/usr/bin/python
+#------------------------------------------------------------------------------
+"""
+DXF Writer Comparison
+
+Compare dxfwrite with the streaming writer in common/dxfstream.py for
+file size and write time on a large polygon (with and without vertex
+markers), involute and cycloid gears and a cam_type0 base curve.
+
+usage: dxf_write.py
+"""
+#------------------------------------------------------------------------------
+
+from __future__ import print_function
+
+import math
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import dxfwrite
+from dxfwrite import DXFEngine
+
+top = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(top, 'common'))
+sys.path.append(os.path.join(top, 'gears'))
+sys.path.append(os.path.join(top, 'cams'))
+
+import dxfstream
+import gears
+import cams
+
+#------------------------------------------------------------------------------
+
+def polygon_dxfwrite(engine, xy, markers):
+  """the old polygon.emit_dxf: a circle entity per vertex and a polyline"""
+  def draw(d):
+    x = xy.tolist()
+    if markers:
+      for p in x:
+        d.add(DXFEngine.circle(center=(p[0], p[1]), radius=1.0, color=2))
+    d.add(DXFEngine.polyline(x, flags=dxfwrite.POLYLINE_CLOSED))
+  return draw
+
+def polygon_dxfstream(engine, xy, markers):
+  def draw(d):
+    if markers:
+      d.add(dxfstream.circles(xy, 1.0, 2, layer=dxfstream.MARKER_LAYER))
+    d.add(dxfstream.polyline(xy, flags=dxfstream.POLYLINE_CLOSED))
+  return draw
+
+def with_engine(module, engine, draw):
+  """run draw with the module using the given dxf engine"""
+  def fn(d):
+    saved = module.dxf
+    module.dxf = engine
+    try:
+      draw(d)
+    finally:
+      module.dxf = saved
+  return fn
+
+def run(engine, draw):
+  """return (bytes, seconds) to build and save a drawing"""
+  fd, fname = tempfile.mkstemp(suffix='.dxf')
+  os.close(fd)
+  try:
+    t = time.time()
+    d = engine.drawing(fname)
+    draw(d)
+    d.save()
+    t = time.time() - t
+    size = os.path.getsize(fname)
+  finally:
+    os.remove(fname)
+  return (size, t)
+
+#------------------------------------------------------------------------------
+
+def cases():
+  theta = np.linspace(0.0, 2.0 * math.pi, 20000, endpoint=False)
+  xy = np.stack((100.0 * np.cos(theta), 100.0 * np.sin(theta)), axis=1)
+  yield ('polygon 20k', polygon_dxfwrite(DXFEngine, xy, False), polygon_dxfstream(dxfstream, xy, False))
+  yield ('polygon 20k markers', polygon_dxfwrite(DXFEngine, xy, True), polygon_dxfstream(dxfstream, xy, True))
+  for n in (32, 200):
+    g = gears.involute_gear(n, n * 5.0, 20)
+    yield ('involute %d teeth' % n, with_engine(gears, DXFEngine, g.draw), with_engine(gears, dxfstream, g.draw))
+  g = gears.cycloid_gear(36, 1.5)
+  yield ('cycloid 36', with_engine(gears, DXFEngine, g.draw), with_engine(gears, dxfstream, g.draw))
+  c = cams.cam_type0(0.25, 1.0)
+  yield ('cam_type0', with_engine(cams, DXFEngine, c.draw), with_engine(cams, dxfstream, c.draw))
+
+def main():
+  print('%-22s %12s %9s %12s %9s' % ('case', 'dxfwrite', 'time', 'dxfstream', 'time'))
+  for (name, old, new) in cases():
+    (s0, t0) = run(DXFEngine, old)
+    (s1, t1) = run(dxfstream, new)
+    print('%-22s %12d %8.3fs %12d %8.3fs' % (name, s0, t0, s1, t1))
+
+if __name__ == '__main__':
+  main()
+
+#------------------------------------------------------------------------------
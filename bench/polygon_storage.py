@@ -0,0 +1,110 @@
+#!/usr/bin/python
+#------------------------------------------------------------------------------
+"""
+Polygon Storage Comparison
+
+Compare the list-of-point-objects polygon (wheel/polygon.py) with the
+array backed polygon (wheel/polyarray.py) for memory use and the time
+taken to build, smooth and emit a profile.
+
+usage: polygon_storage.py [n_vertices ...]
+"""
+#------------------------------------------------------------------------------
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+
+try:
+  import tracemalloc
+except ImportError:
+  # python 2: no memory tracing
+  tracemalloc = None
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'wheel'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+import polygon
+import polyarray
+
+#------------------------------------------------------------------------------
+
+def sawtooth(n, pitch=2.0, height=2.0):
+  """return the vertex coordinates for an n-point sawtooth"""
+  return [(pitch * i, (0.0, height)[i & 1]) for i in range(n)]
+
+def timed(fn):
+  """return (result, seconds) for fn()"""
+  t = time.time()
+  x = fn()
+  return (x, time.time() - t)
+
+def peak(fn):
+  """return the peak bytes allocated while running fn()"""
+  if tracemalloc is None:
+    return None
+  tracemalloc.start()
+  fn()
+  size = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+  return size
+
+def retained(fn):
+  """return the bytes still allocated by the object built by fn()"""
+  if tracemalloc is None:
+    return None
+  tracemalloc.start()
+  x = fn()
+  size = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+  del x
+  return size
+
+#------------------------------------------------------------------------------
+
+def run(backend, n):
+  """return the benchmark figures for a backend"""
+  xy = sawtooth(n)
+
+  def build():
+    return backend.polygon([polygon.point(p, 3, 0.3) for p in xy], closed=False)
+
+  def build_smooth():
+    p = build()
+    p.smooth()
+    return p
+
+  mem = retained(build_smooth)
+  smooth_peak = peak(build().smooth)
+  (p, t_build) = timed(build)
+  (_, t_smooth) = timed(p.smooth)
+  (_, t_emit) = timed(lambda: p.emit_polygon('x'))
+  return {
+    'vertices': len(p.points) if backend is polygon else len(p),
+    'bytes': mem,
+    'peak': smooth_peak,
+    'build': t_build,
+    'smooth': t_smooth,
+    'emit': t_emit,
+  }
+
+def fmt_bytes(x):
+  if x is None:
+    return 'n/a'
+  return '%.1fKiB' % (x / 1024.0)
+
+def main():
+  sizes = [int(x) for x in sys.argv[1:]] or [100, 1000, 5000]
+  print('%-10s %7s %9s %12s %12s %9s %9s %9s' % ('backend', 'n', 'smoothed', 'retained', 'smooth peak', 'build', 'smooth', 'emit'))
+  for n in sizes:
+    for (name, backend) in (('list', polygon), ('array', polyarray)):
+      r = run(backend, n)
+      print('%-10s %7d %9d %12s %12s %8.4fs %8.4fs %8.4fs' % (name, n, r['vertices'],
+        fmt_bytes(r['bytes']), fmt_bytes(r['peak']), r['build'], r['smooth'], r['emit']))
+
+if __name__ == '__main__':
+  main()
+
+#------------------------------------------------------------------------------
@@ -0,0 +1,102 @@
+#!/usr/bin/python
+#------------------------------------------------------------------------------
+"""
+OpenSCAD Point Emitter Comparison
+
+Compare the '%f' per-vertex string list (the old polygon.emit_polygon path)
+with the streaming emitter in common/scad.py at several precisions.
+Reports bytes written, wall time and peak memory.
+
+usage: scad_emit.py [n_points ...]
+"""
+#------------------------------------------------------------------------------
+
+from __future__ import print_function
+
+import math
+import os
+import sys
+import tempfile
+import time
+
+try:
+  import tracemalloc
+except ImportError:
+  # python 2: no memory tracing
+  tracemalloc = None
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+
+import scad
+
+#------------------------------------------------------------------------------
+
+def profile(n):
+  """return an n point test profile"""
+  theta = np.linspace(0.0, 2.0 * math.pi, n)
+  r = 150.0 + 3.0 * np.sin(40.0 * theta)
+  return np.stack((r * np.cos(theta), r * np.sin(theta)), axis=1)
+
+def write_list(f, xy):
+  """the old path: one string per vertex, joined and written as a blob"""
+  s = []
+  s.append('module x() {')
+  s.append('points = [')
+  s.extend(['[%f, %f],' % (p[0], p[1]) for p in xy.tolist()])
+  s.append('];')
+  s.append('polygon(points=points, convexity=2);')
+  s.append('}')
+  f.write('%s\n' % '\n'.join(s))
+
+def run(fn, xy):
+  """return (bytes, seconds, peak bytes) for writing xy with fn"""
+  fd, fname = tempfile.mkstemp(suffix='.scad')
+  os.close(fd)
+  try:
+    f = open(fname, 'w')
+    t = time.time()
+    fn(f, xy)
+    f.close()
+    t = time.time() - t
+    size = os.path.getsize(fname)
+    peak = None
+    if tracemalloc is not None:
+      f = open(fname, 'w')
+      tracemalloc.start()
+      fn(f, xy)
+      peak = tracemalloc.get_traced_memory()[1]
+      tracemalloc.stop()
+      f.close()
+  finally:
+    os.remove(fname)
+  return (size, t, peak)
+
+def stream(precision, trim):
+  return lambda f, xy: scad.write_polygon(f, 'x', xy, precision=precision, trim=trim)
+
+#------------------------------------------------------------------------------
+
+cases = (
+  ('%f list', write_list),
+  ('stream 6', stream(6, False)),
+  ('stream 6 trim', stream(6, True)),
+  ('stream 4 trim', stream(4, True)),
+  ('stream 3 trim', stream(3, True)),
+)
+
+def main():
+  sizes = [int(x) for x in sys.argv[1:]] or [10000, 100000, 1000000]
+  print('%-14s %9s %12s %9s %12s' % ('emitter', 'n', 'bytes', 'time', 'peak'))
+  for n in sizes:
+    xy = profile(n)
+    for (name, fn) in cases:
+      (size, t, peak) = run(fn, xy)
+      peak = '%.1fKiB' % (peak / 1024.0) if peak is not None else 'n/a'
+      print('%-14s %9d %12d %8.3fs %12s' % (name, n, size, t, peak))
+
+if __name__ == '__main__':
+  main()
+
+#------------------------------------------------------------------------------
@@ -0,0 +1,299 @@
+#!/usr/bin/python
+#------------------------------------------------------------------------------
+"""
+Geometry Benchmark Suite
+
+Run the geometry hot paths at several scales and record wall time, peak
+memory and output size. Inputs are fixed, so runs on the same machine are
+comparable: save a run as a json baseline, then compare later runs with
+it to flag regressions beyond a threshold.
+
+  suite.py -o base.json             # record a baseline
+  suite.py -c base.json             # compare a run with the baseline
+  suite.py -k involute --quick      # a subset at the smaller scales
+
+Wall time is the best of --repeat runs (gc disabled, as timeit does).
+Peak memory comes from tracemalloc (not available on python 2).
+The exit status is 1 if a comparison finds a regression.
+
+usage: suite.py [-h] [-o JSON] [-c JSON] [-t THRESHOLD] [-r REPEAT] [-k FILTER] [--quick]
+"""
+#------------------------------------------------------------------------------
+
+from __future__ import print_function
+
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import timeit
+
+try:
+  import tracemalloc
+except ImportError:
+  # python 2: no memory tracing
+  tracemalloc = None
+
+import numpy as np
+
+top = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(top, 'wheel'))
+sys.path.append(os.path.join(top, 'gears'))
+sys.path.append(os.path.join(top, 'cams'))
+sys.path.append(os.path.join(top, 'trochoid'))
+sys.path.append(os.path.join(top, 'common'))
+
+import polygon
+import polyarray
+import gears
+import cams
+import optimize
+import trochoid
+import dxfstream
+
+# time the involute itself, not the tooth template cache
+gears._TEMPLATE_CACHE = False
+
+#------------------------------------------------------------------------------
+# cases: setup() returns the state for run(state), run returns the output size
+
+def sawtooth(n, facets=3, radius=0.3):
+  """return an n vertex sawtooth profile with a fillet at every vertex"""
+  return [polygon.point((2.0 * i, (0.0, 2.0)[i & 1]), facets, radius) for i in range(n)]
+
+def dxf_size(draw):
+  """draw to a temporary dxf file, return the file size"""
+  fd, fname = tempfile.mkstemp(suffix='.dxf')
+  os.close(fd)
+  try:
+    d = dxfstream.drawing(fname)
+    draw(d)
+    d.save()
+    return os.path.getsize(fname)
+  finally:
+    os.remove(fname)
+
+class steps(object):
+  """set a module step count for the duration of a run"""
+
+  def __init__(self, module, name, value, also=None):
+    self.module = module
+    self.name = name
+    self.value = value
+    self.also = also
+
+  def __enter__(self):
+    self.saved = getattr(self.module, self.name)
+    setattr(self.module, self.name, self.value)
+    if self.also:
+      self.also(self.module)
+
+  def __exit__(self, *exc):
+    setattr(self.module, self.name, self.saved)
+    if self.also:
+      self.also(self.module)
+    return False
+
+class unchanged(object):
+  """no settings to change for a run"""
+
+  def __enter__(self):
+    pass
+
+  def __exit__(self, *exc):
+    return False
+
+def _cam_delta(m):
+  m.theta_delta = 2.0 * math.pi / float(m._STEPS)
+
+def smooth_case(backend, n):
+  def setup():
+    return backend.polygon(sawtooth(n), closed=False)
+  def run(p):
+    p.smooth()
+    return len(p.points) if backend is polygon else len(p)
+  return (setup, run, 'vertices', unchanged())
+
+def involute_case(teeth, n_steps):
+  def setup():
+    return gears.involute_gear(teeth, teeth * 5.0, 20)
+  def run(g):
+    def draw(d):
+      g.involute()
+      g.draw_involutes(d)
+    return dxf_size(draw)
+  return (setup, run, 'bytes', steps(gears, '_INVOLUTE_STEPS', n_steps))
+
+def cycloid_case(teeth, n_steps):
+  def setup():
+    return gears.cycloid_gear(teeth, teeth * 5.0)
+  def run(g):
+    def draw(d):
+      g.hyper_cycloid()
+      g.hypo_cycloid()
+      g.draw_cycloids(d)
+    return dxf_size(draw)
+  return (setup, run, 'bytes', steps(gears, '_CYCLOID_STEPS', n_steps))
+
+def cam_case(n_steps):
+  def setup():
+    return cams.cam_type0(0.25, 1.0)
+  def run(c):
+    return dxf_size(c.draw_base)
+  return (setup, run, 'bytes', steps(cams, '_STEPS', n_steps, _cam_delta))
+
+def intersect_case(n):
+  def setup():
+    rng = np.random.RandomState(0)
+    c = rng.uniform(-2.0, 2.0, (4, n, 2))
+    r = rng.uniform(0.1, 2.0, (2, n))
+    return (c, r)
+  def run(state):
+    (c, r) = state
+    (_, n1) = cams.circles2circles(c[0], r[0], c[1], r[1])
+    (_, n2) = cams.lines2circles(c[2], c[3], c[0], r[0])
+    return int(np.maximum(n1, 0).sum() + n2.sum())
+  return (setup, run, 'intersections', unchanged())
+
+def optimize_case(n):
+  def setup():
+    p = optimize.PARAMETERS['cam_type1']
+    rng = np.random.RandomState(0)
+    x = rng.uniform([q[1] for q in p], [q[2] for q in p], (n, len(p)))
+    return (x, optimize.example_target())
+  def run(state):
+    (x, t) = state
+    return int(np.isfinite(optimize.evaluate('cam_type1', x, t)).sum())
+  return (setup, run, 'candidates', unchanged())
+
+def trochoid_case(facets, epsilon):
+  def setup():
+    return trochoid.trochoid(1, 3, -1, 0.5, scale=50.0)
+  def run(t):
+    return len(t.points(facets, epsilon))
+  return (setup, run, 'points', unchanged())
+
+def cases(quick):
+  """yield (name, case)"""
+  scale = (lambda x: x[:2]) if quick else (lambda x: x)
+  for n in scale([1000, 10000, 100000]):
+    yield ('smooth.list.%d' % n, smooth_case(polygon, n))
+    yield ('smooth.array.%d' % n, smooth_case(polyarray, n))
+  for teeth in scale([16, 64, 256]):
+    for n in scale([20, 200]):
+      yield ('involute.%d_teeth.%d_steps' % (teeth, n), involute_case(teeth, n))
+  for n in scale([1000, 10000, 100000]):
+    yield ('cycloid.%d_steps' % n, cycloid_case(36, n))
+  for n in scale([1000, 10000, 100000]):
+    yield ('cam_type0.%d_steps' % n, cam_case(n))
+  for n in scale([1000, 10000, 100000]):
+    yield ('intersect.%d_pairs' % n, intersect_case(n))
+  for n in scale([100, 1000, 10000]):
+    yield ('optimize.%d_candidates' % n, optimize_case(n))
+  for n in scale([1000, 10000, 100000]):
+    yield ('trochoid.%d_facets' % n, trochoid_case(n, None))
+  for e in scale([1e-3, 1e-5, 1e-7]):
+    yield ('trochoid.epsilon_%g' % e, trochoid_case(None, e))
+
+#------------------------------------------------------------------------------
+
+def measure(case, repeat):
+  """return the figures for a case"""
+  (setup, run, unit, settings) = case
+  with settings:
+    times = []
+    for i in range(repeat):
+      state = setup()
+      gc.collect()
+      gc.disable()
+      try:
+        t = timeit.default_timer()
+        size = run(state)
+        times.append(timeit.default_timer() - t)
+      finally:
+        gc.enable()
+    mem = None
+    if tracemalloc is not None:
+      state = setup()
+      gc.collect()
+      tracemalloc.start()
+      run(state)
+      mem = tracemalloc.get_traced_memory()[1]
+      tracemalloc.stop()
+  return {'seconds': min(times), 'peak': mem, 'output': size, 'unit': unit}
+
+def environment():
+  return {
+    'python': platform.python_version(),
+    'numpy': np.__version__,
+    'machine': platform.machine(),
+    'platform': platform.platform(),
+  }
+
+def compare(base, run, threshold):
+  """return (report lines, number of regressions)"""
+  s = []
+  regressions = 0
+  for (name, r) in sorted(run['results'].items()):
+    b = base['results'].get(name)
+    if b is None:
+      s.append('%-40s new' % name)
+      continue
+    flags = []
+    for key in ('seconds', 'peak'):
+      if b[key] and r[key] is not None and r[key] > b[key] * (1.0 + threshold):
+        flags.append('%s +%.0f%%' % (key, 100.0 * (r[key] / b[key] - 1.0)))
+    if r['output'] != b['output']:
+      flags.append('output %d -> %d %s' % (b['output'], r['output'], r['unit']))
+    regressions += len(flags)
+    s.append('%-40s %9.4fs %9.4fs  %s' % (name, b['seconds'], r['seconds'], ', '.join(flags) or 'ok'))
+  return (s, regressions)
+
+def main():
+  parser = argparse.ArgumentParser(description='geometry benchmark suite')
+  parser.add_argument('-o', '--output', metavar='JSON', help='write the results to a json file')
+  parser.add_argument('-c', '--compare', metavar='JSON', help='compare with a baseline json file')
+  parser.add_argument('-t', '--threshold', type=float, default=0.2, help='regression threshold (default: 0.2 = 20%%)')
+  parser.add_argument('-r', '--repeat', type=int, default=5, help='timed runs per case (default: 5)')
+  parser.add_argument('-k', '--filter', default='', help='only run cases with names containing this string')
+  parser.add_argument('--quick', action='store_true', help='only run the smaller scales')
+  args = parser.parse_args()
+
+  results = {}
+  print('%-40s %10s %12s %12s' % ('case', 'time', 'peak', 'output'))
+  for (name, case) in cases(args.quick):
+    if args.filter not in name:
+      continue
+    r = measure(case, args.repeat)
+    results[name] = r
+    peak = '%.1fKiB' % (r['peak'] / 1024.0) if r['peak'] is not None else 'n/a'
+    print('%-40s %9.4fs %12s %12d %s' % (name, r['seconds'], peak, r['output'], r['unit']))
+  run = {'environment': environment(), 'repeat': args.repeat, 'results': results}
+
+  if args.output:
+    f = open(args.output, 'w')
+    json.dump(run, f, indent=2, sort_keys=True)
+    f.write('\n')
+    f.close()
+
+  if args.compare:
+    f = open(args.compare)
+    base = json.load(f)
+    f.close()
+    if base['environment'] != run['environment']:
+      print('warning: the baseline was recorded in a different environment')
+    (report, regressions) = compare(base, run, args.threshold)
+    print('\n%-40s %10s %10s' % ('case', 'baseline', 'run'))
+    print('\n'.join(report))
+    if regressions:
+      print('%d regression(s) beyond %.0f%%' % (regressions, 100.0 * args.threshold))
+      sys.exit(1)
+
+if __name__ == '__main__':
+  main()
+
+#------------------------------------------------------------------------------
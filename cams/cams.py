@@ -1,10 +1,19 @@
 #! /usr/bin/python
 #------------------------------------------------------------------------------
 
-import dxfwrite
-from dxfwrite import DXFEngine as dxf
-
+import argparse
 import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+import vec2
+import dxfstream as dxf
+import contour
+import cache
+import instrument
 
 #------------------------------------------------------------------------------
 
@@ -44,12 +53,6 @@ class line:
 
 #------------------------------------------------------------------------------
 
-def r2d(r):
-    return (r * 180.0) / math.pi
-
-def d2r(d):
-    return (d * math.pi) / 180.0
-
 def quadratic(a, b, c):
     """solve a quadratic- return a tuple with 0,1 or 2 solutions"""
     det = (b * b) - (4.0 * a * c)
@@ -61,6 +64,20 @@ def quadratic(a, b, c):
         det = math.sqrt(det)
         return ((-b - det)/ (2.0 * a), (-b + det)/ (2.0 * a))
 
+def quadratics(a, b, c):
+    """
+    solve quadratics over arrays (a, b and c broadcast together)
+    Return (x, n): x[..., 0] = (-b - sqrt(det)) / 2a and x[..., 1] = (-b + sqrt(det)) / 2a,
+    n = the number of solutions as quadratic() counts them: for n = 1 both
+    are the double root, for n = 0 x is not meaningful.
+    """
+    (a, b, c) = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (a, b, c)))
+    det = (b * b) - (4.0 * a * c)
+    n = np.where(det < -_zero_tolerance, 0, np.where(det <= _zero_tolerance, 1, 2))
+    det = np.sqrt(np.where(n == 2, det, 0.0))
+    x = np.stack(((-b - det) / (2.0 * a), (-b + det) / (2.0 * a)), axis=-1)
+    return (x, n)
+
 #------------------------------------------------------------------------------
 
 def circle2circle(c1, c2):
@@ -137,6 +154,61 @@ def line2circle(l, c):
     qc = (k0 * k0) + (k1 * k1) - (c.r * c.r)
     return quadratic(qa, qb, qc)
 
+def lines2circles(p, v, c, r):
+    """
+    intersect N lines with N circles (arguments broadcast together)
+    p, v = line points and directions (Nx2)
+    c, r = circle centres (Nx2) and radii (N)
+    Return (t, n): the line parameters of the intersections (Nx2) and
+    the number of intersections of each line (see quadratics). A zero
+    length direction has no intersections.
+    For rays, also mask out t < 0.
+    """
+    p = vec2.points(p)
+    v = vec2.points(v)
+    k = p - vec2.points(c)
+    r = np.asarray(r, dtype=np.float64)
+    qa = (v[..., 0] * v[..., 0]) + (v[..., 1] * v[..., 1])
+    qb = 2.0 * ((k[..., 0] * v[..., 0]) + (k[..., 1] * v[..., 1]))
+    qc = (k[..., 0] * k[..., 0]) + (k[..., 1] * k[..., 1]) - (r * r)
+    # mask zero length directions before quadratics divides by qa
+    zero = (qa == 0.0)
+    (t, n) = quadratics(np.where(zero, 1.0, qa), qb, qc)
+    return (t, np.where(zero, 0, n))
+
+def lines2circle(p, v, c):
+    """intersect many lines with one circle (see lines2circles)"""
+    return lines2circles(p, v, c.c, c.r)
+
+def circles2circles(c1, r1, c2, r2):
+    """
+    intersect N pairs of circles (arguments broadcast together)
+    c1, c2 = centres (Nx2)
+    r1, r2 = radii (N)
+    Return (xy, n): the intersection points (Nx2x2) and the number of
+    intersections of each pair: 0, 1 (tangent: both points the same),
+    2 (the first point is right of the line c1 -> c2) or -1 for
+    coincident circles (infinite solutions).
+    """
+    c1 = vec2.points(c1)
+    c2 = vec2.points(c2)
+    r1 = np.asarray(r1, dtype=np.float64)
+    r2 = np.asarray(r2, dtype=np.float64)
+    dc = c2 - c1
+    d2 = (dc[..., 0] * dc[..., 0]) + (dc[..., 1] * dc[..., 1])
+    concentric = d2 == 0.0
+    d = np.sqrt(np.where(concentric, 1.0, d2))
+    # distance from c1 to the radical line along c1 -> c2
+    a = ((r1 * r1) - (r2 * r2) + d2) / (2.0 * d)
+    u = dc / d[..., None]
+    # the intersections are +/- t along the radical line: t^2 + a^2 - r1^2 = 0
+    (t, n) = quadratics(1.0, 0.0, (a * a) - (r1 * r1))
+    mid = c1 + (a[..., None] * u)
+    perp = np.stack((-u[..., 1], u[..., 0]), axis=-1)
+    xy = mid[..., None, :] + (t[..., :, None] * perp[..., None, :])
+    n = np.where(concentric, np.where(r1 == r2, -1, 0), n)
+    return (xy, n)
+
 #------------------------------------------------------------------------------
 
 def draw_crosshair(d, location, size = 0.125):
@@ -149,6 +221,16 @@ def draw_crosshair(d, location, size = 0.125):
     d.add(dxf.polyline(s1))
     d.add(dxf.polyline(s2))
 
+def arcs2contour(arcs):
+    """return (circle, start, end) arcs, counter clockwise, as a closed contour"""
+    k = contour.contour(closed=True)
+    for (c, start, end) in arcs:
+        sweep = math.fmod(end - start, 2.0 * math.pi)
+        if sweep <= 0.0:
+            sweep += 2.0 * math.pi
+        k.arc(c.c, c.r, start, sweep)
+    return k
+
 #------------------------------------------------------------------------------
 
 class cam_type0:
@@ -157,17 +239,33 @@ class cam_type0:
         self.offset = offset
         self.radius = radius
 
-    def draw_base(self, d):
+    def base(self):
+        """
+        return the base curve: the far intersection of rays from the origin
+        with the offset circle (rays that miss the circle are dropped)
+        """
         c = circle((0.0, self.offset), self.radius)
-        segs = []
-        theta = 0.0
-        for i in xrange(_STEPS + 1):
-            l = line((0.0, 0.0), (math.cos(theta), math.sin(theta)))
-            t_vals = line2circle(l, c)
-            segs.append(l.xy(max(t_vals)))
-            theta += theta_delta
-        d.add(dxf.polyline(segs))
+        # the same angles as summing theta_delta step by step
+        theta = np.concatenate(([0.0], np.cumsum(np.full(_STEPS, theta_delta))))
+        p = np.zeros(2)
+        v = vec2.polar(1.0, theta)
+        (t, n) = lines2circle(p, v, c)
+        t = t.max(axis=-1)
+        return (p + (v * t[:, None]))[n > 0]
+
+    def arcs(self):
+        """return the profile as (circle, start, end) arcs, counter clockwise (radians)"""
+        return [(circle((0.0, self.offset), self.radius), 0.0, 2.0 * math.pi)]
+
+    def contour(self):
+        """return the profile as an exact arc contour"""
+        return arcs2contour(self.arcs())
+
+    @instrument.timed('draw_base')
+    def draw_base(self, d):
+        d.add(dxf.polyline(self.base()))
 
+    @instrument.timed('draw')
     def draw(self, d):
         draw_crosshair(d, (0.0, 0.0))
         self.draw_base(d)
@@ -187,43 +285,84 @@ class cam_type1:
         self.flank1 = circle(flanks[0], flank)
         self.flank2 = circle(flanks[1], flank)
 
-    def draw_lobes(self, d):
-
+    def arcs(self):
+        """return the profile as (circle, start, end) arcs, counter clockwise (radians)"""
+        # the tangent points
         nf1 = circle2circle(self.nose, self.flank1)[0]
         nf2 = circle2circle(self.nose, self.flank2)[0]
         bf1 = circle2circle(self.base, self.flank1)[0]
         bf2 = circle2circle(self.base, self.flank2)[0]
+        return [
+            (self.flank1, self.flank1.p2r(bf1), self.flank1.p2r(nf1)),
+            (self.nose, self.nose.p2r(nf1), self.nose.p2r(nf2)),
+            (self.flank2, self.flank2.p2r(nf2), self.flank2.p2r(bf2)),
+            (self.base, self.base.p2r(bf2), self.base.p2r(bf1)),
+        ]
+
+    def contour(self):
+        """return the profile as an exact arc contour"""
+        return arcs2contour(self.arcs())
+
+    @instrument.timed('draw_lobes')
+    def draw_lobes(self, d):
+        (flank1, nose, flank2, base) = self.arcs()
+        for (c, theta1, theta2) in (nose, base, flank1, flank2):
+            d.add(dxf.arc(c.r, c.c, vec2.r2d(theta1), vec2.r2d(theta2)))
 
-        n_theta1 = r2d(self.nose.p2r(nf1))
-        n_theta2 = r2d(self.nose.p2r(nf2))
-        d.add(dxf.arc(self.nose.r, self.nose.c, n_theta1, n_theta2))
-
-        b_theta1 = r2d(self.base.p2r(bf1))
-        b_theta2 = r2d(self.base.p2r(bf2))
-        d.add(dxf.arc(self.base.r, self.base.c, b_theta2, b_theta1))
-
-        f1_theta1 = r2d(self.flank1.p2r(nf1))
-        f1_theta2 = r2d(self.flank1.p2r(bf1))
-        d.add(dxf.arc(self.flank1.r, self.flank1.c, f1_theta2, f1_theta1))
-
-        f2_theta1 = r2d(self.flank2.p2r(nf2))
-        f2_theta2 = r2d(self.flank2.p2r(bf2))
-        d.add(dxf.arc(self.flank2.r, self.flank2.c, f2_theta1, f2_theta2))
-
-
+    @instrument.timed('draw')
     def draw(self, d):
         draw_crosshair(d, (0.0, 0.0))
         self.draw_lobes(d)
 
 #------------------------------------------------------------------------------
 
-def main():
+# generator sources for the cache version: this directory and the common modules
+src_dir = os.path.dirname(os.path.abspath(__file__))
+src_dirs = (src_dir, os.path.join(src_dir, '..', 'common'))
 
-    cam = cam_type1(1.0, 1.0, 0.5, 5.0)
-    d = dxf.drawing('cam.dxf')
-    cam.draw(d)
-    d.save()
-
-main()
+def main():
+    parser = argparse.ArgumentParser(description='cam generation')
+    parser.add_argument('-g', '--gcode', action='store_true', help='also write the profile as g-code (cam.ngc)')
+    parser.add_argument('-s', '--scad', action='store_true', help='also write the profile as an openscad polygon (cam.scad)')
+    parser.add_argument('-e', '--epsilon', type=float, default=contour.default_epsilon, help='chord tolerance for the openscad polygon (default: %g)' % contour.default_epsilon)
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    instrument.start(args)
+
+    (cam_type, cam_args) = (cam_type1, (1.0, 1.0, 0.5, 5.0))
+    cam = cam_type(*cam_args)
+
+    def generate(fname):
+        d = dxf.drawing(fname)
+        cam.draw(d)
+        d.save()
+
+    version = cache.source_version(*src_dirs)
+    k = cache.key('cam.dxf', [cam_type.__name__, cam_args], version)
+    cache.output('cam.dxf', k, generate)
+
+    # the exact profile: only the openscad polygon is tessellated
+    profile = cam.contour()
+
+    def generate_gcode(fname):
+        f = open(fname, 'w')
+        profile.write_gcode(f)
+        f.close()
+
+    def generate_scad(fname):
+        f = open(fname, 'w')
+        profile.write_polygon(f, 'cam', args.epsilon)
+        f.close()
+
+    if args.gcode:
+        k = cache.key('cam.ngc', [cam_type.__name__, cam_args], version)
+        cache.output('cam.ngc', k, generate_gcode)
+    if args.scad:
+        k = cache.key('cam.scad', [cam_type.__name__, cam_args, args.epsilon], version)
+        cache.output('cam.scad', k, generate_scad)
+    instrument.finish(args)
+
+if __name__ == '__main__':
+    main()
 
 #------------------------------------------------------------------------------
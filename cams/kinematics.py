@@ -0,0 +1,204 @@
+#! /usr/bin/python
+#------------------------------------------------------------------------------
+"""
+Cam Follower Kinematics
+
+Follower lift, velocity, acceleration and jerk over a revolution of a
+cam_type0 or cam_type1 cam with a flat, knife edge or roller follower.
+
+The cam turns counter clockwise about the origin and the follower moves
+along the y-axis. At cam angle theta the follower sees the profile in the
+direction phi = pi/2 - theta (cam frame). The profile is a chain of
+circular arcs (cam.arcs()), so each arc has a closed form:
+
+  flat: the face is normal to the axis, the follower position is the
+  support function s = c.u + r of the arc whose normal range holds u.
+
+  knife edge: the point on the axis, s is the far root of
+  s^2 - 2s(c.u) + |c|^2 - r^2 = 0 for the arc whose polar range holds phi.
+  The derivatives follow from differentiating the quadratic.
+
+  roller: the roller centre is a knife edge on the profile grown by the
+  roller radius.
+
+All the angles are evaluated as arrays. Lift is measured from the lowest
+position. Derivatives are per radian of cam rotation, or per second given
+a cam speed.
+
+usage: kinematics.py [-h] [-f {flat,knife,roller}] [-r ROLLER] [-n STEPS]
+                     [--rpm RPM] [-o OUTPUT] {0,1}
+"""
+#------------------------------------------------------------------------------
+
+import argparse
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+import instrument
+
+import cams
+
+#------------------------------------------------------------------------------
+
+# number of cam angles in a revolution
+_STEPS = 3600
+
+# follower types
+FOLLOWERS = ('flat', 'knife', 'roller')
+
+#------------------------------------------------------------------------------
+
+def arc_arrays(arcs, grow=0.0):
+    """
+    return the arcs as arrays (centres, radii, start, span)
+    arcs = (circle, start, end) list, counter clockwise (radians)
+    grow = offset the profile outwards by this distance
+    """
+    c = np.array([a[0].c for a in arcs], dtype=np.float64).reshape(-1, 2)
+    r = np.array([a[0].r for a in arcs], dtype=np.float64) + grow
+    start = np.array([a[1] for a in arcs], dtype=np.float64)
+    span = np.remainder(np.array([a[2] for a in arcs]) - start, 2.0 * math.pi)
+    # a zero span is a whole circle
+    span = np.where(span == 0.0, 2.0 * math.pi, span)
+    return (c, r, start, span)
+
+def active(phi, start, span):
+    """return the index of the range (start, span) holding each angle phi"""
+    inside = np.remainder(phi[:, None] - start[None, :], 2.0 * math.pi) <= span[None, :]
+    if not inside.any(axis=1).all():
+        raise ValueError('the arcs do not cover every direction')
+    return np.argmax(inside, axis=1)
+
+def _flat(phi, c, r):
+    """follower position and its phi derivatives: a flat face"""
+    p = (c[:, 0] * np.cos(phi)) + (c[:, 1] * np.sin(phi))
+    q = (c[:, 0] * np.sin(phi)) - (c[:, 1] * np.cos(phi))
+    # s = p + r, p' = -q, q' = p
+    return (p + r, -q, -p, q)
+
+def _knife(phi, c, r):
+    """follower position and its phi derivatives: a point on the axis"""
+    p = (c[:, 0] * np.cos(phi)) + (c[:, 1] * np.sin(phi))
+    q = (c[:, 0] * np.sin(phi)) - (c[:, 1] * np.cos(phi))
+    k = r * r - q * q
+    if (k <= 0.0).any():
+        raise ValueError('the follower axis misses the profile')
+    root = np.sqrt(k)
+    s = p + root
+    (p1, p2, p3) = (-q, -p, q)
+    # differentiate (s - p) s' = s p' and so on, s - p = root
+    s1 = (s * p1) / root
+    s2 = ((2.0 * s1 * p1) + (s * p2) - (s1 * s1)) / root
+    s3 = ((3.0 * s2 * p1) + (3.0 * s1 * p2) + (s * p3) - (3.0 * s1 * s2)) / root
+    return (s, s1, s2, s3)
+
+#------------------------------------------------------------------------------
+
+class motion:
+    """follower motion over one revolution"""
+
+    def __init__(self, theta, lift, velocity, acceleration, jerk):
+        self.theta = theta
+        self.lift = lift
+        self.velocity = velocity
+        self.acceleration = acceleration
+        self.jerk = jerk
+
+    def columns(self):
+        return np.stack((self.theta, self.lift, self.velocity, self.acceleration, self.jerk), axis=1)
+
+    def write_csv(self, fname):
+        """write the motion as csv: theta (radians), lift, velocity, acceleration, jerk"""
+        f = open(fname, 'w')
+        f.write('theta,lift,velocity,acceleration,jerk\n')
+        x = self.columns()
+        for i in range(0, len(x), 4096):
+            xi = x[i:i + 4096]
+            f.write(('%.9g,%.9g,%.9g,%.9g,%.9g\n' * len(xi)) % tuple(xi.ravel().tolist()))
+        f.close()
+
+    def save_npy(self, fname):
+        """save the motion as an Nx5 array (the csv columns)"""
+        np.save(fname, self.columns())
+
+    def __str__(self):
+        s = []
+        s.append('lift %.6f' % self.lift.max())
+        s.append('velocity %.6f %.6f' % (self.velocity.min(), self.velocity.max()))
+        s.append('acceleration %.6f %.6f' % (self.acceleration.min(), self.acceleration.max()))
+        s.append('jerk %.6f %.6f' % (self.jerk.min(), self.jerk.max()))
+        return '\n'.join(s)
+
+@instrument.timed('follow')
+def follow(cam, follower='flat', roller=0.0, steps=_STEPS, rpm=None, theta=None):
+    """
+    return the follower motion for a cam
+    cam = cam_type0 or cam_type1 (anything with arcs())
+    follower = 'flat', 'knife' or 'roller'
+    roller = roller radius
+    steps = number of cam angles in a revolution
+    rpm = cam speed for time derivatives (None = per radian)
+    theta = cam angles to evaluate (None = steps over a revolution)
+    """
+    if follower not in FOLLOWERS:
+        raise ValueError('unknown follower %s' % follower)
+    if theta is None:
+        theta = np.arange(steps) * (2.0 * math.pi / steps)
+    theta = np.asarray(theta, dtype=np.float64)
+    phi = (0.5 * math.pi) - theta
+    grow = roller if follower == 'roller' else 0.0
+    (c, r, start, span) = arc_arrays(cam.arcs(), grow)
+    if follower == 'flat':
+        # the outward normal ranges
+        i = active(phi, start, span)
+        (s, s1, s2, s3) = _flat(phi, c[i], r[i])
+    else:
+        # the polar ranges of the arc ends
+        e0 = c + r[:, None] * np.stack((np.cos(start), np.sin(start)), axis=1)
+        e1 = c + r[:, None] * np.stack((np.cos(start + span), np.sin(start + span)), axis=1)
+        a0 = np.arctan2(e0[:, 1], e0[:, 0])
+        a1 = np.arctan2(e1[:, 1], e1[:, 0])
+        pspan = np.remainder(a1 - a0, 2.0 * math.pi)
+        pspan = np.where(span >= 2.0 * math.pi, 2.0 * math.pi, pspan)
+        i = active(phi, a0, pspan)
+        (s, s1, s2, s3) = _knife(phi, c[i], r[i])
+    instrument.count('follow.angles', len(theta))
+    # d/dtheta = -d/dphi
+    w = 1.0 if rpm is None else rpm * (2.0 * math.pi / 60.0)
+    return motion(theta, s - s.min(), -s1 * w, s2 * w * w, -s3 * w * w * w)
+
+#------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description='cam follower kinematics')
+    parser.add_argument('cam', choices=('0', '1'), help='cam type (the cams.py example cams)')
+    parser.add_argument('-f', '--follower', choices=FOLLOWERS, default='flat', help='follower type (default: flat)')
+    parser.add_argument('-r', '--roller', type=float, default=0.25, help='roller radius (default: 0.25)')
+    parser.add_argument('-n', '--steps', type=int, default=_STEPS, help='cam angles per revolution (default: %d)' % _STEPS)
+    parser.add_argument('--rpm', type=float, default=None, help='cam speed for time derivatives (default: per radian)')
+    parser.add_argument('-o', '--output', help='write the motion to a .csv or .npy file')
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    instrument.start(args)
+
+    if args.cam == '0':
+        cam = cams.cam_type0(0.25, 1.0)
+    else:
+        cam = cams.cam_type1(1.0, 1.0, 0.5, 5.0)
+    m = follow(cam, args.follower, args.roller, args.steps, args.rpm)
+    if args.output:
+        if args.output.endswith('.npy'):
+            m.save_npy(args.output)
+        else:
+            m.write_csv(args.output)
+    print(m)
+    instrument.finish(args)
+
+if __name__ == '__main__':
+    main()
+
+#------------------------------------------------------------------------------
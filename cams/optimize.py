@@ -0,0 +1,332 @@
+#! /usr/bin/python
+#------------------------------------------------------------------------------
+"""
+Cam Geometry Optimizer
+
+Search the cam_type1 (ofs, base, nose, flank) or cam_type0 (offset,
+radius) parameters for the cam whose follower lift best matches a target
+lift profile, within a limit on the follower acceleration.
+
+The search is a cross entropy method. Each generation draws a batch of
+candidates from a multivariate normal distribution (clipped to the
+bounds) and refits its mean and covariance to the best (elite)
+candidates. The full covariance follows the narrow, correlated valleys
+of the cost. The refit is smoothed with the previous distribution and
+the standard deviations are held over a floor, halved each time the best
+cost stops improving, so the search doesn't collapse before the cost
+plateaus.
+
+Candidate geometry is checked for the whole batch at once: the cam_type1
+flank circles exist only where circles2circles finds 2 solutions, and a
+cam_type0 circle must hold the origin. Infeasible candidates are dropped
+before any kinematics. The rest are split across a process pool and each
+one is scored with kinematics.follow at the target angles.
+
+The cost is the rms lift error plus a penalty for acceleration over the
+limit. The target is a csv or npy file of (theta, lift, ...) rows as
+kinematics.py writes them (peak lift at theta = 0), or by default the
+motion of the cams.py example cam_type1.
+
+A flat follower sees the support function of the cam, so a parallel
+offset of the profile (every radius + d) has the same lift: the fit is
+one of that family unless a radius is held (e.g. --fix base=1.0).
+
+usage: optimize.py [-h] [-t TARGET] [-f {flat,knife,roller}] [-r ROLLER]
+                   [--rpm RPM] [--amax AMAX] [-b BATCH] [-g GENERATIONS]
+                   [--seed SEED] [-j JOBS] [--fix NAME=VALUE] [-o OUTPUT]
+                   {0,1}
+"""
+#------------------------------------------------------------------------------
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+try:
+    from concurrent import futures
+except ImportError:
+    # python 2 without the futures backport: evaluate serially
+    futures = None
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+import dxfstream as dxf
+import instrument
+
+import cams
+import kinematics
+
+#------------------------------------------------------------------------------
+
+# parameter (name, lower bound, upper bound) per cam type
+PARAMETERS = {
+    'cam_type0': (('offset', 0.0, 1.0), ('radius', 0.25, 2.0)),
+    'cam_type1': (('ofs', 0.1, 2.0), ('base', 0.25, 2.0), ('nose', 0.05, 1.0), ('flank', 1.0, 10.0)),
+}
+
+# candidates per generation
+_BATCH = 512
+
+# maximum number of generations
+_GENERATIONS = 200
+
+# fraction of each batch used to refit the distribution
+_ELITE = 0.1
+
+# weight of the elite fit in each update of the mean and covariance
+_SMOOTHING = 0.6
+
+# initial floor on the standard deviations (fraction of the bound range)
+_SD_FLOOR = 0.1
+
+# generations without a _PLATEAU relative improvement that halve the floor
+_PATIENCE = 4
+_PLATEAU = 1e-2
+
+# cost per unit of acceleration over the limit (relative to the limit)
+_ACCEL_PENALTY = 10.0
+
+# stop when the floor and every standard deviation are below this fraction of the bound range
+_CONVERGED = 1e-4
+
+# stop when the cost is below this
+_TOLERANCE = 1e-9
+
+# number of cam angles in a generated target
+_TARGET_STEPS = 360
+
+#------------------------------------------------------------------------------
+
+class target:
+    """the lift to match at the cam angles theta, and how to measure it"""
+
+    def __init__(self, theta, lift, amax=None, follower='flat', roller=0.0, rpm=None):
+        self.theta = np.asarray(theta, dtype=np.float64)
+        self.lift = np.asarray(lift, dtype=np.float64)
+        self.amax = amax # acceleration limit (None = no limit)
+        self.follower = follower
+        self.roller = roller
+        self.rpm = rpm
+
+def load_target(fname, **kwargs):
+    """return a target from a csv (with a header line) or npy file of (theta, lift, ...) rows"""
+    if fname.endswith('.npy'):
+        x = np.load(fname)
+    else:
+        x = np.loadtxt(fname, delimiter=',', skiprows=1, ndmin=2)
+    return target(x[:, 0], x[:, 1], **kwargs)
+
+def example_target(steps=_TARGET_STEPS, **kwargs):
+    """return the motion of the cams.py example cam as a target"""
+    t = target(np.arange(steps) * (2.0 * np.pi / steps), np.zeros(steps), **kwargs)
+    m = kinematics.follow(cams.cam_type1(1.0, 1.0, 0.5, 5.0), t.follower, t.roller, rpm=t.rpm, theta=t.theta)
+    t.lift = m.lift
+    return t
+
+#------------------------------------------------------------------------------
+
+def feasible(kind, x):
+    """
+    return a mask of the candidates (rows of x) with valid geometry
+    kind = 'cam_type0' or 'cam_type1'
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if kind == 'cam_type0':
+        (offset, radius) = (x[:, 0], x[:, 1])
+        return radius > np.abs(offset)
+    (ofs, base, nose, flank) = (x[:, 0], x[:, 1], x[:, 2], x[:, 3])
+    ok = (base > 0.0) & (nose > 0.0) & (flank > base) & (flank > nose)
+    # the flank centres: where the circles (nose, flank - nose) and (base, flank - base) meet
+    c1 = np.stack((np.zeros_like(ofs), ofs), axis=-1)
+    (_, n) = cams.circles2circles(c1, flank - nose, (0.0, 0.0), flank - base)
+    return ok & (n == 2)
+
+def score(kind, x, t):
+    """return the cost of each candidate (rows of x) against the target t, inf if invalid"""
+    cam_type = getattr(cams, kind)
+    cost = np.empty(len(x))
+    for (i, p) in enumerate(np.asarray(x).tolist()):
+        try:
+            m = kinematics.follow(cam_type(*p), t.follower, t.roller, rpm=t.rpm, theta=t.theta)
+        except (ValueError, IndexError):
+            cost[i] = np.inf
+            continue
+        e = m.lift - t.lift
+        cost[i] = np.sqrt(np.mean(e * e))
+        if t.amax is not None:
+            over = np.abs(m.acceleration).max() - t.amax
+            if over > 0.0:
+                cost[i] += _ACCEL_PENALTY * over / t.amax
+    return cost
+
+@instrument.timed('evaluate')
+def evaluate(kind, x, t, pool=None, jobs=1):
+    """return the cost of each candidate, pruning invalid geometry first"""
+    cost = np.full(len(x), np.inf)
+    ok = feasible(kind, x)
+    xi = x[ok]
+    instrument.count('optimize.pruned', len(x) - len(xi))
+    instrument.count('optimize.evaluated', len(xi))
+    if pool is None or len(xi) < 2 * jobs:
+        cost[ok] = score(kind, xi, t)
+    else:
+        parts = np.array_split(xi, jobs)
+        n = len(parts)
+        cost[ok] = np.concatenate(list(pool.map(score, [kind] * n, parts, [t] * n)))
+    return cost
+
+#------------------------------------------------------------------------------
+
+class fit:
+    """the optimizer result"""
+
+    def __init__(self, kind, params, cost, t, evaluations, seconds):
+        self.kind = kind
+        self.params = tuple(params)
+        self.cost = cost
+        self.evaluations = evaluations
+        self.seconds = seconds
+        self.motion = kinematics.follow(self.cam(), t.follower, t.roller, rpm=t.rpm, theta=t.theta)
+        e = self.motion.lift - t.lift
+        self.rms = float(np.sqrt(np.mean(e * e)))
+
+    def cam(self):
+        return getattr(cams, self.kind)(*self.params)
+
+    def __str__(self):
+        names = [p[0] for p in PARAMETERS[self.kind]]
+        s = []
+        s.append('%s(%s)' % (self.kind, ', '.join(['%s=%.6f' % x for x in zip(names, self.params)])))
+        s.append('rms lift error %.6f' % self.rms)
+        s.append('max acceleration %.6f' % np.abs(self.motion.acceleration).max())
+        s.append('cost %.6f' % self.cost)
+        rate = self.evaluations / self.seconds if self.seconds > 0.0 else 0.0
+        s.append('%d candidates in %.2fs (%.0f/s)' % (self.evaluations, self.seconds, rate))
+        return '\n'.join(s)
+
+def _sqrtm(cov):
+    """return l with l.l^T = cov for a (possibly singular) covariance matrix"""
+    (w, v) = np.linalg.eigh(cov)
+    return v * np.sqrt(np.maximum(w, 0.0))
+
+def optimize(t, kind='cam_type1', bounds=None, batch=_BATCH, generations=_GENERATIONS, seed=0, workers=None, fixed=None):
+    """
+    search the cam parameters for the best match to a target
+    t = target
+    kind = 'cam_type0' or 'cam_type1'
+    bounds = (lower, upper) parameter bounds (None = PARAMETERS)
+    batch = candidates per generation
+    seed = random seed (the search is repeatable)
+    workers = number of processes (None = one per cpu, 1 = run in this process)
+    fixed = {name: value} parameters held at a value
+    """
+    if bounds is None:
+        bounds = ([p[1] for p in PARAMETERS[kind]], [p[2] for p in PARAMETERS[kind]])
+    lo = np.array(bounds[0], dtype=np.float64)
+    hi = np.array(bounds[1], dtype=np.float64)
+    names = [p[0] for p in PARAMETERS[kind]]
+    for (name, value) in (fixed or {}).items():
+        if name not in names:
+            raise ValueError('%s has no parameter %s' % (kind, name))
+        lo[names.index(name)] = hi[names.index(name)] = value
+    span = hi - lo
+    rng = np.random.RandomState(seed)
+    mean = 0.5 * (lo + hi)
+    cov = np.diag((0.5 * span) ** 2)
+    floor = _SD_FLOOR
+    stall = 0
+    n_elite = max(2, int(batch * _ELITE))
+    best = (np.inf, mean)
+    count = 0
+    t0 = time.time()
+    (pool, jobs) = (None, 1)
+    if workers != 1 and futures is not None:
+        jobs = workers or multiprocessing.cpu_count()
+        if jobs > 1:
+            pool = futures.ProcessPoolExecutor(max_workers=jobs)
+    try:
+        for g in range(generations):
+            l = _sqrtm(cov + np.diag((floor * span) ** 2))
+            x = np.clip(mean + rng.standard_normal((batch, len(lo))).dot(l.T), lo, hi)
+            cost = evaluate(kind, x, t, pool, jobs)
+            count += batch
+            order = np.argsort(cost, kind='mergesort')[:n_elite]
+            order = order[np.isfinite(cost[order])]
+            if len(order) < 2:
+                # nothing feasible near the mean: keep looking around it
+                continue
+            if cost[order[0]] < best[0] * (1.0 - _PLATEAU):
+                stall = 0
+            else:
+                stall += 1
+                if stall >= _PATIENCE:
+                    floor *= 0.5
+                    stall = 0
+            if cost[order[0]] < best[0]:
+                best = (cost[order[0]], x[order[0]])
+            xe = x[order]
+            d = xe - xe.mean(axis=0)
+            mean = (_SMOOTHING * xe.mean(axis=0)) + ((1.0 - _SMOOTHING) * mean)
+            cov = (_SMOOTHING * d.T.dot(d) / len(xe)) + ((1.0 - _SMOOTHING) * cov)
+            if best[0] < _TOLERANCE:
+                break
+            if floor < _CONVERGED and (np.sqrt(np.diag(cov)) <= _CONVERGED * span).all():
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    if not np.isfinite(best[0]):
+        raise ValueError('no feasible %s within the bounds' % kind)
+    return fit(kind, best[1].tolist(), best[0], t, count, time.time() - t0)
+
+#------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description='cam geometry optimizer')
+    parser.add_argument('cam', choices=('0', '1'), help='cam type to fit')
+    parser.add_argument('-t', '--target', help='target lift: csv or npy (theta, lift) rows (default: the cams.py example cam)')
+    parser.add_argument('-f', '--follower', choices=kinematics.FOLLOWERS, default='flat', help='follower type (default: flat)')
+    parser.add_argument('-r', '--roller', type=float, default=0.25, help='roller radius (default: 0.25)')
+    parser.add_argument('--rpm', type=float, default=None, help='cam speed for the acceleration limit (default: per radian)')
+    parser.add_argument('--amax', type=float, default=None, help='acceleration limit (default: none)')
+    parser.add_argument('-b', '--batch', type=int, default=_BATCH, help='candidates per generation (default: %d)' % _BATCH)
+    parser.add_argument('-g', '--generations', type=int, default=_GENERATIONS, help='maximum generations (default: %d)' % _GENERATIONS)
+    parser.add_argument('--seed', type=int, default=0, help='random seed (default: 0)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes (default: one per cpu)')
+    parser.add_argument('--fix', action='append', default=[], metavar='NAME=VALUE', help='hold a parameter at a value (repeatable)')
+    parser.add_argument('-o', '--output', help='write the best cam to a dxf file')
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    instrument.start(args)
+
+    spec = {'amax': args.amax, 'follower': args.follower, 'roller': args.roller, 'rpm': args.rpm}
+    if args.target:
+        t = load_target(args.target, **spec)
+    else:
+        t = example_target(**spec)
+    kind = ('cam_type0', 'cam_type1')[args.cam == '1']
+    fixed = {}
+    for s in args.fix:
+        (name, _, value) = s.partition('=')
+        try:
+            fixed[name] = float(value)
+        except ValueError:
+            parser.error('bad --fix %s (use NAME=VALUE)' % s)
+    try:
+        result = optimize(t, kind, None, args.batch, args.generations, args.seed, args.jobs, fixed)
+    except ValueError as e:
+        parser.error(str(e))
+    print(result)
+    if args.output:
+        d = dxf.drawing(args.output)
+        result.cam().draw(d)
+        d.save()
+    instrument.finish(args)
+
+if __name__ == '__main__':
+    main()
+
+#------------------------------------------------------------------------------
@@ -0,0 +1,74 @@
+#------------------------------------------------------------------------------
+"""
+Adaptive Curve Sampling
+
+Sample a parametric 2d curve with as few points as possible while keeping
+the chord deviation under a tolerance. Intervals are subdivided at their
+parameter midpoint until the curve midpoint lies within epsilon of the
+chord. All the intervals at a subdivision level are evaluated together,
+so the curve function must accept an array of parameters and return an
+Nx2 point array (as the vec2 style point functions do).
+
+The midpoint test can miss features narrower than an interval, so the
+curve is first sampled on a uniform grid of n0 intervals. n0 should
+resolve every lobe or cusp of the curve.
+
+Subdivision stops at max_depth levels below the grid: if an interval is
+still over the tolerance there, sample() raises ValueError rather than
+return points that don't meet it.
+"""
+#------------------------------------------------------------------------------
+
+import numpy as np
+
+#------------------------------------------------------------------------------
+
+# maximum subdivision depth below the initial grid
+max_depth = 20
+
+#------------------------------------------------------------------------------
+
+def chord_error(a, b, m):
+  """return the distance of each point m from the chord a-b"""
+  ab = b - a
+  am = m - a
+  l = np.sqrt(np.sum(ab * ab, axis=-1))
+  cross = np.abs((ab[..., 0] * am[..., 1]) - (ab[..., 1] * am[..., 0]))
+  with np.errstate(divide='ignore', invalid='ignore'):
+    d = np.where(l > 0.0, cross / l, np.sqrt(np.sum(am * am, axis=-1)))
+  return d
+
+def sample(f, t0, t1, epsilon, n0=4):
+  """
+  Sample the curve f(t) for t0 <= t <= t1.
+  f = function: parameter array -> Nx2 point array
+  epsilon = chord deviation tolerance
+  n0 = number of intervals in the initial uniform grid
+  Return (t, xy): the parameters and the curve points.
+  """
+  if not epsilon > 0.0:
+    raise ValueError('chord tolerance must be > 0 (epsilon %r)' % (epsilon,))
+  t = np.linspace(t0, t1, n0 + 1)
+  xy = f(t)
+  # intervals still to be tested
+  active = np.arange(n0)
+  for depth in range(max_depth):
+    tm = 0.5 * (t[active] + t[active + 1])
+    pm = f(tm)
+    split = chord_error(xy[active], xy[active + 1], pm) > epsilon
+    i = active[split]
+    if len(i) == 0:
+      break
+    t = np.insert(t, i + 1, tm[split])
+    xy = np.insert(xy, i + 1, pm[split], axis=0)
+    # each split interval becomes two intervals to test
+    j = i + np.arange(len(i))
+    active = np.sort(np.concatenate((j, j + 1)))
+  else:
+    # the intervals from the last level of splits are untested
+    tm = 0.5 * (t[active] + t[active + 1])
+    if (chord_error(xy[active], xy[active + 1], f(tm)) > epsilon).any():
+      raise ValueError('chord tolerance %g not met after %d subdivisions' % (epsilon, max_depth))
+  return (t, xy)
+
+#------------------------------------------------------------------------------
@@ -0,0 +1,297 @@
+#------------------------------------------------------------------------------
+"""
+Output Cache
+
+Content addressed cache for generated files. An output is keyed on a hash
+of the generator name, its input parameters and the generator source
+version. On a hit the cached bytes are used and the output file is only
+written if its contents differ, so unchanged outputs keep their mtimes and
+make-style downstream steps (OpenSCAD render, slicing) can skip them.
+
+Entries are single files in the cache directory. The entry mtime is the
+last use time: the least recently used entries are evicted when the total
+size exceeds size_cap. Each process keeps a running total of the entry
+sizes, so the directory is only scanned when the total goes over the cap
+(eviction then trims to low_water of the cap). Entries are written with a
+rename, so concurrent processes (e.g. a batch pool) can share a cache
+directory; the cap is then approximate, as each process only counts its
+own writes between scans.
+
+  import cache
+  k = cache.key('wheel.scad', w.values(), cache.source_version(src_dir))
+  cache.output('wheel.scad', k, lambda fname: output_wheel(w, fname))
+
+Intermediate numpy arrays (e.g. gear tooth templates) are cached with
+array(): an in-memory LRU of memory_cap arrays over .npy entries in the
+same directory, sharing the size cap.
+"""
+#------------------------------------------------------------------------------
+
+import collections
+import filecmp
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+import instrument
+
+#------------------------------------------------------------------------------
+
+# cache directory (None = caching disabled)
+directory = os.environ.get('PARAMETRIC_CAD_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'parametric_cad'))
+
+# maximum total size of the cache entries (bytes)
+size_cap = 256 << 20
+
+# eviction trims the cache to this fraction of the size cap
+low_water = 0.9
+
+# maximum number of arrays held in memory
+memory_cap = 1024
+
+# source versions by directory
+_versions = {}
+
+# running total size of the entries by cache directory
+_sizes = {}
+
+# in-memory arrays by key, least recently used first
+_memory = collections.OrderedDict()
+
+# permissions for new files (mkstemp creates them private)
+_umask = os.umask(0)
+os.umask(_umask)
+_mode = 0o666 & ~_umask
+
+#------------------------------------------------------------------------------
+
+def source_version(*dirs):
+  """return a hash of the python sources in the directories"""
+  h = hashlib.sha256()
+  for d in dirs:
+    d = os.path.abspath(d)
+    if d not in _versions:
+      hd = hashlib.sha256()
+      for name in sorted(os.listdir(d)):
+        if name.endswith('.py'):
+          f = open(os.path.join(d, name), 'rb')
+          hd.update(name.encode('utf-8'))
+          hd.update(f.read())
+          f.close()
+      _versions[d] = hd.hexdigest()
+    h.update(_versions[d].encode('ascii'))
+  return h.hexdigest()
+
+def key(name, params, version):
+  """return the cache key for a generator name, a json-able parameter set and a source version"""
+  # python 2 and 3 differ in integer division and float formatting
+  s = json.dumps([name, params, version, sys.version_info[0]], sort_keys=True)
+  return hashlib.sha256(s.encode('utf-8')).hexdigest()
+
+#------------------------------------------------------------------------------
+
+def _replace(src, dst):
+  """move src to dst, replacing dst"""
+  if hasattr(os, 'replace'):
+    os.replace(src, dst)
+  else:
+    # python 2: rename replaces on posix
+    if os.name == 'nt' and os.path.exists(dst):
+      os.remove(dst)
+    os.rename(src, dst)
+
+def _tmpname(fname):
+  """return a new temporary file name in the directory of fname"""
+  fd, tmp = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(os.path.abspath(fname)))
+  os.close(fd)
+  os.chmod(tmp, _mode)
+  return tmp
+
+def _install(src, fname):
+  """
+  make fname a copy of src, leaving it untouched if the contents match
+  Return True if fname was written.
+  """
+  if os.path.isfile(fname) and filecmp.cmp(src, fname, shallow=False):
+    return False
+  tmp = _tmpname(fname)
+  try:
+    shutil.copyfile(src, tmp)
+    _replace(tmp, fname)
+  except:
+    os.remove(tmp)
+    raise
+  return True
+
+def evict(cap=None):
+  """
+  scan the cache directory: if the entries are over the size cap, remove
+  the least recently used until they are within low_water of the cap
+  """
+  if directory is None or not os.path.isdir(directory):
+    return
+  cap = size_cap if cap is None else cap
+  entries = []
+  total = 0
+  for name in os.listdir(directory):
+    if name.startswith('.'):
+      continue
+    try:
+      st = os.stat(os.path.join(directory, name))
+    except OSError:
+      # removed by another process
+      continue
+    entries.append((st.st_mtime, st.st_size, name))
+    total += st.st_size
+  if total > cap:
+    entries.sort()
+    for (_, size, name) in entries:
+      if total <= low_water * cap:
+        break
+      try:
+        os.remove(os.path.join(directory, name))
+      except OSError:
+        pass
+      total -= size
+  _sizes[directory] = total
+
+def _added(size):
+  """count a new entry in the running total, evicting when it goes over the cap"""
+  total = _sizes.get(directory)
+  if total is None:
+    # first write to this directory: scan it once
+    evict()
+    return
+  _sizes[directory] = total + size
+  if total + size > size_cap:
+    evict()
+
+def _makedirs():
+  if not os.path.isdir(directory):
+    try:
+      os.makedirs(directory)
+    except OSError:
+      # created by another process
+      pass
+
+def _store(src, entry):
+  """
+  copy src to a cache entry (a cache that can't be written is skipped)
+  Return the size of the entry written (0 if none).
+  """
+  stored = None
+  try:
+    _makedirs()
+    stored = _tmpname(entry)
+    shutil.copyfile(src, stored)
+    size = os.path.getsize(stored)
+    _replace(stored, entry)
+  except (IOError, OSError):
+    if stored is not None and os.path.exists(stored):
+      os.remove(stored)
+    return 0
+  return size
+
+#------------------------------------------------------------------------------
+
+def output(fname, k, generate):
+  """
+  produce an output file through the cache
+  fname = output file name
+  k = cache key (see key())
+  generate = function writing the output to a given file name
+  Return True on a cache hit.
+  """
+  if directory is None:
+    generate(fname)
+    return False
+  entry = os.path.join(directory, k)
+  if os.path.isfile(entry):
+    try:
+      _install(entry, fname)
+      # mark the entry as recently used
+      os.utime(entry, None)
+      instrument.count('cache.hit')
+      return True
+    except (IOError, OSError):
+      # evicted by another process: regenerate
+      pass
+  # miss: generate to a temporary file, then install and store it
+  instrument.count('cache.miss')
+  tmp = _tmpname(fname)
+  try:
+    generate(tmp)
+    _install(tmp, fname)
+    size = _store(tmp, entry)
+  finally:
+    os.remove(tmp)
+  _added(size)
+  return False
+
+#------------------------------------------------------------------------------
+
+def _load(entry):
+  """return the array in a cache entry, None if there isn't one"""
+  try:
+    a = np.load(entry, allow_pickle=False)
+    # mark the entry as recently used
+    os.utime(entry, None)
+  except (IOError, OSError, ValueError):
+    # missing, or evicted by another process
+    return None
+  return a
+
+def _save(a, entry):
+  """
+  write an array to a cache entry (a cache that can't be written is skipped)
+  Return the size of the entry written (0 if none).
+  """
+  stored = None
+  try:
+    _makedirs()
+    stored = _tmpname(entry)
+    f = open(stored, 'wb')
+    try:
+      np.save(f, a)
+    finally:
+      f.close()
+    size = os.path.getsize(stored)
+    _replace(stored, entry)
+  except (IOError, OSError):
+    if stored is not None and os.path.exists(stored):
+      os.remove(stored)
+    return 0
+  return size
+
+def array(k, generate):
+  """
+  return a numpy array through the cache
+  k = cache key (see key())
+  generate = function returning the array
+  The array is shared with later callers, so it is read-only.
+  """
+  a = _memory.pop(k, None)
+  if a is not None:
+    instrument.count('cache.memory_hit')
+  else:
+    entry = None if directory is None else os.path.join(directory, k + '.npy')
+    a = None if entry is None else _load(entry)
+    if a is not None:
+      instrument.count('cache.hit')
+    else:
+      instrument.count('cache.miss')
+      a = np.array(generate())
+      if entry is not None:
+        _added(_save(a, entry))
+    a.flags.writeable = False
+  _memory[k] = a
+  while len(_memory) > memory_cap:
+    _memory.popitem(last=False)
+  return a
+
+#------------------------------------------------------------------------------
@@ -0,0 +1,167 @@
+#------------------------------------------------------------------------------
+"""
+Line/Arc Contours
+
+A 2d contour held as exact primitives: line segments and circular arcs,
+joined end to start. The geometry is kept exact until an output needs
+points. DXF output uses native LINE/ARC entities and G-code output uses
+G1/G2/G3 moves, so neither depends on a tolerance. SCAD and STL output
+tessellate the contour: the points are cached per chord tolerance, so
+re-exporting at a new tolerance doesn't rebuild the geometry.
+
+An arc is (centre, radius, start angle, sweep), angles in radians, a
+positive sweep is counter clockwise. A closed contour ends where it starts.
+"""
+#------------------------------------------------------------------------------
+
+import math
+
+import numpy as np
+
+import scad
+import mesh
+import dxfstream as dxf
+import instrument
+
+#------------------------------------------------------------------------------
+
+# default chord tolerance for tessellation
+default_epsilon = 0.01
+
+# segment types
+LINE = 0
+ARC = 1
+
+#------------------------------------------------------------------------------
+
+def chord_facets(radius, angle, epsilon):
+  """
+  Return the minimum number of facets for arcs of the given radius and
+  swept angle (radians) so that the chord error is no more than epsilon.
+  """
+  if not epsilon > 0.0:
+    raise ValueError('chord tolerance must be > 0 (epsilon %r)' % (epsilon,))
+  radius = np.asarray(radius, dtype=np.float64)
+  # largest angle subtended by a chord with sagitta epsilon
+  k = np.clip(1.0 - (epsilon / radius), -1.0, 1.0)
+  max_angle = 2.0 * np.arccos(k)
+  with np.errstate(divide='ignore', invalid='ignore'):
+    n = np.ceil(np.asarray(angle) / max_angle)
+  return np.maximum(np.nan_to_num(n), 1).astype(np.int32)
+
+def _fmt(x, precision):
+  """return a g-code number: fixed point without trailing zeros"""
+  s = ('%.*f' % (precision, x)).rstrip('0').rstrip('.')
+  return '0' if s in ('', '-0') else s
+
+#------------------------------------------------------------------------------
+
+class contour(object):
+  """a chain of line segments and circular arcs"""
+
+  def __init__(self, closed=False):
+    self.closed = closed
+    # (type, p0, p1, centre, radius, start, sweep) per segment
+    self.segs = []
+    # tessellated points by chord tolerance
+    self._points = {}
+
+  def __len__(self):
+    return len(self.segs)
+
+  def line(self, p0, p1):
+    """add a line segment from p0 to p1"""
+    p0 = (float(p0[0]), float(p0[1]))
+    p1 = (float(p1[0]), float(p1[1]))
+    self.segs.append((LINE, p0, p1, (0.0, 0.0), 0.0, 0.0, 0.0))
+    self._points = {}
+
+  def arc(self, c, r, start, sweep):
+    """add an arc: centre c, radius r, start angle and sweep (radians, +ve = ccw)"""
+    (c, r, start, sweep) = ((float(c[0]), float(c[1])), float(r), float(start), float(sweep))
+    p0 = (c[0] + r * math.cos(start), c[1] + r * math.sin(start))
+    p1 = (c[0] + r * math.cos(start + sweep), c[1] + r * math.sin(start + sweep))
+    self.segs.append((ARC, p0, p1, c, r, start, sweep))
+    self._points = {}
+
+  def points(self, epsilon=default_epsilon):
+    """return the contour as an Nx2 point array with chord error <= epsilon"""
+    xy = self._points.get(epsilon)
+    if xy is None:
+      xy = self._tessellate(epsilon)
+      xy.setflags(write=False)
+      self._points[epsilon] = xy
+    return xy
+
+  @instrument.timed('tessellate')
+  def _tessellate(self, epsilon):
+    if not self.segs:
+      return np.zeros((0, 2))
+    kind = np.array([s[0] for s in self.segs])
+    p0 = np.array([s[1] for s in self.segs])
+    p1 = np.array([s[2] for s in self.segs])
+    c = np.array([s[3] for s in self.segs])
+    r = np.array([s[4] for s in self.segs])
+    start = np.array([s[5] for s in self.segs])
+    sweep = np.array([s[6] for s in self.segs])
+    # points per segment, the first point of each is the end of the one before
+    n = np.ones(len(kind), dtype=np.intp)
+    arc = kind == ARC
+    n[arc] = chord_facets(r[arc], np.abs(sweep[arc]), epsilon)
+    k = np.repeat(np.arange(len(n)), n)
+    j = np.arange(len(k)) - np.repeat(np.cumsum(n) - n, n) + 1
+    t = (j / n[k].astype(np.float64))[:, None]
+    a = start[k] + sweep[k] * t[:, 0]
+    on_arc = c[k] + r[k][:, None] * np.stack((np.cos(a), np.sin(a)), axis=1)
+    on_line = p0[k] + (p1[k] - p0[k]) * t
+    xy = np.concatenate((p0[:1], np.where(arc[k][:, None], on_arc, on_line)))
+    if self.closed:
+      xy = xy[:-1]
+    instrument.count('contour.points', len(xy))
+    return xy
+
+  def emit_dxf(self, d, color=None, layer='0'):
+    """emit native dxf lines and arcs for the contour"""
+    for (kind, p0, p1, c, r, start, sweep) in self.segs:
+      if kind == LINE:
+        d.add(dxf.line(p0, p1, color=color, layer=layer))
+      elif abs(sweep) >= 2.0 * math.pi:
+        d.add(dxf.circle(r, c, color=color, layer=layer))
+      else:
+        # dxf arcs are counter clockwise
+        a0 = start if sweep > 0.0 else start + sweep
+        d.add(dxf.arc(r, c, math.degrees(a0), math.degrees(a0 + abs(sweep)), color=color, layer=layer))
+
+  def write_gcode(self, f, feed=None, precision=4):
+    """
+    write the contour as g-code moves in the xy plane: a rapid to the start,
+    then G1 lines and G2/G3 arcs (centre offsets I/J). The caller adds the
+    program header, tool and z moves.
+    feed = feed rate for the cutting moves (None = modal)
+    """
+    if not self.segs:
+      return
+    def xy(p):
+      return 'X%s Y%s' % (_fmt(p[0], precision), _fmt(p[1], precision))
+    f.write('G17 G90\n')
+    f.write('G0 %s\n' % xy(self.segs[0][1]))
+    fs = '' if feed is None else ' F%s' % _fmt(feed, precision)
+    for (kind, p0, p1, c, r, start, sweep) in self.segs:
+      if kind == LINE:
+        f.write('G1 %s%s\n' % (xy(p1), fs))
+      else:
+        g = ('G2', 'G3')[sweep > 0.0]
+        ij = 'I%s J%s' % (_fmt(c[0] - p0[0], precision), _fmt(c[1] - p0[1], precision))
+        f.write('%s %s %s%s\n' % (g, xy(p1), ij, fs))
+      fs = ''
+
+  def write_polygon(self, f, name, epsilon=default_epsilon, convexity=2, extrude='', precision=6, trim=False):
+    """write an openscad module for the tessellated contour"""
+    scad.write_polygon(f, name, self.points(epsilon), convexity, extrude, precision, trim)
+
+  def write_stl(self, f, facets, epsilon=default_epsilon, angle=None):
+    """write a binary stl of the tessellated contour revolved about the y-axis"""
+    (vertices, triangles) = mesh.revolve(self.points(epsilon), facets, angle)
+    mesh.write_stl(f, vertices, triangles)
+
+#------------------------------------------------------------------------------
@@ -0,0 +1,278 @@
+#------------------------------------------------------------------------------
+"""
+Streaming DXF Output
+
+A minimal DXF writer for the subset of the dxfwrite DXFEngine API used by
+these scripts (drawing/add/save, polyline, line, circle, arc). Entities are
+written to the file as they are added and polylines are written as
+POLYLINE/VERTEX records formatted a chunk at a time, so a drawing never
+builds an in-memory entity model.
+
+The output is DXF R12 (AC1009): it needs no handles, object dictionaries
+or block records, so a streamed file is complete as written.
+
+  import dxfstream as dxf
+  d = dxf.drawing('part.dxf')
+  d.add(dxf.polyline(points, flags=dxf.POLYLINE_CLOSED))
+  d.save()
+
+Repeated geometry can be defined once as a block and placed with inserts.
+Blocks are held until the first entity is added, so they must be added
+before any entities.
+
+  d.add_block(dxf.block('tooth', [dxf.polyline(flank), ...]))
+  d.add(dxf.inserts('tooth', angles))
+"""
+#------------------------------------------------------------------------------
+
+import numpy as np
+
+import instrument
+
+#------------------------------------------------------------------------------
+
+POLYLINE_CLOSED = 1
+
+# layer for vertex marker circles
+MARKER_LAYER = 'VERTEX'
+
+# default layers: (name, color)
+LAYERS = (('0', 7), (MARKER_LAYER, 1))
+
+# number of points formatted per write
+chunk_size = 4096
+
+#------------------------------------------------------------------------------
+
+def _xy(points):
+  """return points as an Nx2 float64 array"""
+  return np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+def _common(name, layer, color):
+  """return the group codes that start an entity"""
+  s = '0\n%s\n8\n%s\n' % (name, layer)
+  if color is not None:
+    s += '62\n%d\n' % color
+  return s
+
+class _polyline(object):
+
+  def __init__(self, points, flags=0, color=None, layer='0', count=None):
+    self.points = points
+    self.flags = flags
+    self.color = color
+    self.layer = layer
+    self.count = count
+
+  def write(self, f, fmt):
+    if self.count is None:
+      chunks = (_xy(self.points),)
+    else:
+      chunks = self.points
+    f.write(_common('POLYLINE', self.layer, self.color))
+    f.write('66\n1\n10\n0.0\n20\n0.0\n30\n0.0\n70\n%d\n' % (self.flags & POLYLINE_CLOSED))
+    vfmt = '0\nVERTEX\n8\n%s\n' % self.layer
+    vfmt = vfmt.replace('%', '%%') + '10\n%s\n20\n%s\n30\n0.0\n' % (fmt, fmt)
+    written = 0
+    for xy in chunks:
+      xy = _xy(xy)
+      for i in range(0, len(xy), chunk_size):
+        x = xy[i:i + chunk_size]
+        f.write((vfmt * len(x)) % tuple(x.ravel().tolist()))
+      written += len(xy)
+    f.write('0\nSEQEND\n8\n%s\n' % self.layer)
+    if self.count is not None and written != self.count:
+      raise ValueError('polyline has %d points, the count is %d' % (written, self.count))
+    return 1
+
+class _circles(object):
+
+  def __init__(self, centers, radius, colors=None, layer='0'):
+    self.centers = centers
+    self.radius = radius
+    self.colors = colors
+    self.layer = layer
+
+  def write(self, f, fmt):
+    xy = _xy(self.centers)
+    n = len(xy)
+    r = np.broadcast_to(np.asarray(self.radius, dtype=np.float64), (n,))
+    cols = [xy[:, 0], xy[:, 1], r]
+    efmt = '0\nCIRCLE\n8\n%s\n' % self.layer.replace('%', '%%')
+    if self.colors is not None:
+      cols.insert(0, np.broadcast_to(np.asarray(self.colors, dtype=np.float64), (n,)))
+      efmt += '62\n%d\n'
+    efmt += '10\n%s\n20\n%s\n30\n0.0\n40\n%s\n' % (fmt, fmt, fmt)
+    v = np.stack(cols, axis=1)
+    for i in range(0, n, chunk_size):
+      x = v[i:i + chunk_size]
+      f.write((efmt * len(x)) % tuple(x.ravel().tolist()))
+    return n
+
+class _arc(object):
+
+  def __init__(self, radius, center, startangle, endangle, color=None, layer='0'):
+    self.radius = radius
+    self.center = center
+    self.startangle = startangle
+    self.endangle = endangle
+    self.color = color
+    self.layer = layer
+
+  def write(self, f, fmt):
+    f.write(_common('ARC', self.layer, self.color))
+    efmt = '10\n%s\n20\n%s\n30\n0.0\n40\n%s\n50\n%s\n51\n%s\n' % ((fmt,) * 5)
+    f.write(efmt % (self.center[0], self.center[1], self.radius, self.startangle, self.endangle))
+    return 1
+
+class _line(object):
+
+  def __init__(self, start, end, color=None, layer='0'):
+    self.start = start
+    self.end = end
+    self.color = color
+    self.layer = layer
+
+  def write(self, f, fmt):
+    f.write(_common('LINE', self.layer, self.color))
+    efmt = '10\n%s\n20\n%s\n30\n0.0\n11\n%s\n21\n%s\n31\n0.0\n' % ((fmt,) * 4)
+    f.write(efmt % (self.start[0], self.start[1], self.end[0], self.end[1]))
+    return 1
+
+class _inserts(object):
+
+  def __init__(self, name, rotation, insert=(0.0, 0.0), layer='0'):
+    self.name = name
+    self.rotation = rotation
+    self.insert = insert
+    self.layer = layer
+
+  def write(self, f, fmt):
+    rot = np.asarray(self.rotation, dtype=np.float64).reshape(-1)
+    n = len(rot)
+    xy = np.broadcast_to(_xy(self.insert), (n, 2))
+    v = np.stack((xy[:, 0], xy[:, 1], rot), axis=1)
+    efmt = '0\nINSERT\n8\n%s\n2\n%s\n' % (self.layer, self.name)
+    efmt = efmt.replace('%', '%%') + '10\n%s\n20\n%s\n30\n0.0\n50\n%s\n' % (fmt, fmt, fmt)
+    for i in range(0, n, chunk_size):
+      x = v[i:i + chunk_size]
+      f.write((efmt * len(x)) % tuple(x.ravel().tolist()))
+    return n
+
+class block(object):
+  """a named group of entities, placed in a drawing with inserts"""
+
+  def __init__(self, name, entities=(), layer='0'):
+    self.name = name
+    self.entities = list(entities)
+    self.layer = layer
+
+  def add(self, entity):
+    self.entities.append(entity)
+
+  def write(self, f, fmt):
+    f.write('0\nBLOCK\n8\n%s\n2\n%s\n70\n0\n' % (self.layer, self.name))
+    f.write('10\n0.0\n20\n0.0\n30\n0.0\n3\n%s\n1\n\n' % self.name)
+    n = 0
+    for e in self.entities:
+      n += e.write(f, fmt)
+    f.write('0\nENDBLK\n8\n%s\n' % self.layer)
+    return n
+
+#------------------------------------------------------------------------------
+# entity factories (dxfwrite DXFEngine style)
+
+def polyline(points, flags=0, color=None, layer='0', count=None):
+  """
+  polyline through the points (Nx2 array or list of (x, y))
+  To stream a long polyline, points can be an iterator of point arrays
+  with count points in total (checked as they are written).
+  """
+  return _polyline(points, flags, color, layer, count)
+
+def circle(radius=1.0, center=(0.0, 0.0), color=None, layer='0'):
+  """circle"""
+  return _circles((center,), radius, None if color is None else (color,), layer)
+
+def circles(centers, radius=1.0, colors=None, layer='0'):
+  """a batch of circles: per-circle or shared radius and color"""
+  return _circles(centers, radius, colors, layer)
+
+def line(start=(0.0, 0.0), end=(0.0, 0.0), color=None, layer='0'):
+  """line segment"""
+  return _line(start, end, color, layer)
+
+def arc(radius=1.0, center=(0.0, 0.0), startangle=0.0, endangle=360.0, color=None, layer='0'):
+  """arc: angles in degrees, counter-clockwise from start to end"""
+  return _arc(radius, center, startangle, endangle, color, layer)
+
+def insert(name, insert=(0.0, 0.0), rotation=0.0, layer='0'):
+  """place a block"""
+  return _inserts(name, (rotation,), insert, layer)
+
+def inserts(name, rotation, insert=(0.0, 0.0), layer='0'):
+  """place a block once per rotation (degrees): a shared or per-insert position"""
+  return _inserts(name, rotation, insert, layer)
+
+#------------------------------------------------------------------------------
+
+class drawing(object):
+  """a dxf file: entities are written as they are added"""
+
+  def __init__(self, name='empty.dxf', layers=LAYERS, precision=6):
+    self.name = name
+    self.fmt = '%%.%df' % precision
+    self.entities = 0
+    self.layers = layers
+    self.blocks = []
+    self.block_names = set()
+    self.f = open(name, 'w')
+
+  def _header(self):
+    f = self.f
+    f.write('0\nSECTION\n2\nHEADER\n9\n$ACADVER\n1\nAC1009\n0\nENDSEC\n')
+    f.write('0\nSECTION\n2\nTABLES\n')
+    f.write('0\nTABLE\n2\nLTYPE\n70\n1\n')
+    f.write('0\nLTYPE\n2\nCONTINUOUS\n70\n0\n3\nSolid line\n72\n65\n73\n0\n40\n0.0\n')
+    f.write('0\nENDTAB\n')
+    f.write('0\nTABLE\n2\nLAYER\n70\n%d\n' % len(self.layers))
+    for (name, color) in self.layers:
+      f.write('0\nLAYER\n2\n%s\n70\n0\n62\n%d\n6\nCONTINUOUS\n' % (name, color))
+    f.write('0\nENDTAB\n0\nENDSEC\n')
+    if self.blocks:
+      f.write('0\nSECTION\n2\nBLOCKS\n')
+      for b in self.blocks:
+        b.write(f, self.fmt)
+      f.write('0\nENDSEC\n')
+    f.write('0\nSECTION\n2\nENTITIES\n')
+    self.blocks = None
+
+  def add_block(self, b):
+    """define a block (before any entities are added)"""
+    if self.blocks is None:
+      raise ValueError('blocks must be added before entities')
+    if b.name in self.block_names:
+      raise ValueError('block %s is already defined' % b.name)
+    self.blocks.append(b)
+    self.block_names.add(b.name)
+
+  def add(self, entity):
+    """write an entity to the file"""
+    if self.blocks is not None:
+      self._header()
+    if isinstance(entity, _inserts) and entity.name not in self.block_names:
+      raise ValueError('block %s is not defined' % entity.name)
+    n = entity.write(self.f, self.fmt)
+    self.entities += n
+    instrument.count('dxf.entities', n)
+
+  def save(self):
+    """finish and close the file"""
+    with instrument.timer('dxf.save'):
+      if self.blocks is not None:
+        self._header()
+      self.f.write('0\nENDSEC\n0\nEOF\n')
+      instrument.count('dxf.bytes', self.f.tell())
+      self.f.close()
+
+#------------------------------------------------------------------------------
@@ -0,0 +1,171 @@
+#------------------------------------------------------------------------------
+"""
+Stage Timing and Counters
+
+Nested stage timers and named counters for the generators. Instrumentation
+is off by default: timer() then returns a shared no-op context manager and
+count() returns after a flag test, so the probes can stay in hot code.
+
+  import instrument
+  with instrument.timer('smooth'):
+    ...
+  instrument.count('vertices', n)
+
+Timers nest: a stage is recorded under the path of the enclosing stages
+('build;wheel.scad;smooth'). The report can be dumped as json or as folded
+stacks (self time in microseconds) for flamegraph.pl or speedscope.
+"""
+#------------------------------------------------------------------------------
+
+import functools
+import json
+import time
+
+#------------------------------------------------------------------------------
+
+# instrumentation is off unless enabled
+enabled = False
+
+# timer clock
+_clock = getattr(time, 'perf_counter', time.time)
+
+# stage path -> [calls, seconds]
+_timers = {}
+# counter name -> value
+_counters = {}
+# names of the active stages
+_stack = []
+
+#------------------------------------------------------------------------------
+
+class _null_timer(object):
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    return False
+
+_null = _null_timer()
+
+class _timer(object):
+
+  def __init__(self, name):
+    self.name = name
+
+  def __enter__(self):
+    _stack.append(self.name)
+    self.t = _clock()
+    return self
+
+  def __exit__(self, *exc):
+    t = _clock() - self.t
+    path = ';'.join(_stack)
+    _stack.pop()
+    x = _timers.get(path)
+    if x is None:
+      _timers[path] = [1, t]
+    else:
+      x[0] += 1
+      x[1] += t
+    return False
+
+def timer(name):
+  """return a context manager timing a named stage"""
+  if not enabled:
+    return _null
+  return _timer(name)
+
+def timed(name):
+  """decorator: time each call of a function as a named stage"""
+  def decorate(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+      if not enabled:
+        return fn(*args, **kwargs)
+      with _timer(name):
+        return fn(*args, **kwargs)
+    return wrapper
+  return decorate
+
+def count(name, n=1):
+  """add n to a named counter"""
+  if enabled:
+    _counters[name] = _counters.get(name, 0) + n
+
+#------------------------------------------------------------------------------
+
+def enable(on=True):
+  """turn instrumentation on (or off)"""
+  global enabled
+  enabled = on
+
+def reset():
+  """clear all timers and counters"""
+  _timers.clear()
+  _counters.clear()
+
+def snapshot():
+  """return the timers and counters as a json-able dictionary"""
+  timers = {}
+  for (path, (calls, t)) in _timers.items():
+    timers[path] = {'calls': calls, 'seconds': t}
+  return {'timers': timers, 'counters': dict(_counters)}
+
+def merge(s):
+  """add a snapshot (e.g. from a worker process) to the timers and counters"""
+  for (path, x) in s['timers'].items():
+    y = _timers.setdefault(path, [0, 0.0])
+    y[0] += x['calls']
+    y[1] += x['seconds']
+  for (name, n) in s['counters'].items():
+    _counters[name] = _counters.get(name, 0) + n
+
+def folded():
+  """return the stage timers as folded stacks: 'a;b;c <self microseconds>' lines"""
+  total = dict((path, x[1]) for (path, x) in _timers.items())
+  child = dict.fromkeys(total, 0.0)
+  for (path, t) in total.items():
+    parent = path.rpartition(';')[0]
+    if parent in child:
+      child[parent] += t
+  s = []
+  for path in sorted(total):
+    s.append('%s %d' % (path, max(0, int(round((total[path] - child[path]) * 1e6)))))
+  return '\n'.join(s)
+
+def dump_json(fname):
+  """write the report as json"""
+  f = open(fname, 'w')
+  json.dump(snapshot(), f, indent=2, sort_keys=True)
+  f.write('\n')
+  f.close()
+
+def dump_folded(fname):
+  """write the report as folded stacks"""
+  f = open(fname, 'w')
+  f.write('%s\n' % folded())
+  f.close()
+
+#------------------------------------------------------------------------------
+# command line support
+
+def add_arguments(parser):
+  """add the report options to an argparse parser"""
+  parser.add_argument('--stats', metavar='JSON', help='write stage timers and counters to a json file')
+  parser.add_argument('--flamegraph', metavar='FILE', help='write stage timers as folded stacks')
+
+def start(args):
+  """enable instrumentation if a report was requested"""
+  if args.stats or args.flamegraph:
+    reset()
+    enable()
+
+def finish(args):
+  """write the requested reports"""
+  if args.stats:
+    dump_json(args.stats)
+  if args.flamegraph:
+    dump_folded(args.flamegraph)
+
+#------------------------------------------------------------------------------
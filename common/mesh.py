@@ -0,0 +1,179 @@
+#------------------------------------------------------------------------------
+"""
+Triangle Meshes
+
+Indexed triangle meshes: an Nx3 float64 vertex array and an Mx3 int array
+of vertex indices per triangle (counter-clockwise seen from outside).
+
+revolve() turns a 2d profile into a solid of revolution in the same way as
+OpenSCAD rotate_extrude(): the profile x-axis becomes the radius and the
+profile y-axis becomes the z-axis.
+"""
+#------------------------------------------------------------------------------
+
+import math
+import struct
+
+import numpy as np
+
+import instrument
+
+#------------------------------------------------------------------------------
+
+# profile points closer than this to the axis are treated as on the axis
+axis_epsilon = 1e-9
+
+#------------------------------------------------------------------------------
+
+def area(xy):
+  """return the signed area of a 2d polygon (+ve for counter-clockwise)"""
+  x = xy[:, 0]
+  y = xy[:, 1]
+  return 0.5 * np.sum((x * np.roll(y, -1)) - (np.roll(x, -1) * y))
+
+def triangulate(xy):
+  """
+  Triangulate a simple 2d polygon by ear clipping.
+  Return an Mx3 array of point indices with counter-clockwise winding.
+  """
+  xy = np.asarray(xy, dtype=np.float64)
+  idx = list(range(len(xy)))
+  if area(xy) < 0.0:
+    idx.reverse()
+  tris = []
+  while len(idx) > 3:
+    p = xy[idx]
+    a = np.roll(p, 1, axis=0)
+    c = np.roll(p, -1, axis=0)
+    cross = ((p[:, 0] - a[:, 0]) * (c[:, 1] - p[:, 1])) - ((p[:, 1] - a[:, 1]) * (c[:, 0] - p[:, 0]))
+    reflex = p[cross < 0.0]
+    ear = None
+    for i in np.nonzero(cross > 0.0)[0].tolist():
+      if len(reflex) == 0 or not _inside(reflex, a[i], p[i], c[i]).any():
+        ear = i
+        break
+    if ear is None:
+      # only degenerate (co-linear) vertices are left to clip
+      ear = int(np.argmax(cross))
+    n = len(idx)
+    tris.append((idx[(ear - 1) % n], idx[ear], idx[(ear + 1) % n]))
+    del idx[ear]
+  tris.append(tuple(idx))
+  return np.array(tris, dtype=np.int64).reshape(-1, 3)
+
+def _inside(p, a, b, c):
+  """return a mask of the points strictly inside the ccw triangle a, b, c"""
+  def side(u, v):
+    return ((v[0] - u[0]) * (p[:, 1] - u[1])) - ((v[1] - u[1]) * (p[:, 0] - u[0]))
+  return (side(a, b) > 0.0) & (side(b, c) > 0.0) & (side(c, a) > 0.0)
+
+#------------------------------------------------------------------------------
+
+@instrument.timed('revolve')
+def revolve(xy, facets, angle=None):
+  """
+  Revolve a closed 2d profile about the y-axis.
+  xy = Nx2 profile points (x >= 0), closed back to the first point
+  facets = number of segments in a full revolution
+  angle = revolve angle (radians), None for a full revolution
+  Return (vertices, triangles). Points on the axis become single vertices,
+  partial revolves are capped with the triangulated profile.
+  """
+  xy = np.asarray(xy, dtype=np.float64)
+  if area(xy) < 0.0:
+    xy = xy[::-1]
+  x = xy[:, 0]
+  if (x < -axis_epsilon).any():
+    raise ValueError('profile crosses the axis of revolution')
+  on_axis = x <= axis_epsilon
+  full = angle is None or angle >= 2.0 * math.pi
+  if full:
+    n = facets
+    ring = n
+    phi = np.arange(n) * (2.0 * math.pi / n)
+  else:
+    n = max(1, int(math.ceil(facets * angle / (2.0 * math.pi))))
+    ring = n + 1
+    phi = np.linspace(0.0, angle, ring)
+
+  # vertex buffer: one vertex per axis point, a ring for every other point
+  count = np.where(on_axis, 1, ring)
+  base = np.cumsum(count) - count
+  r = np.where(on_axis, 0.0, x)
+  vx = (r[:, None] * np.cos(phi)[None, :])
+  vy = (r[:, None] * np.sin(phi)[None, :])
+  vz = np.repeat(xy[:, 1][:, None], ring, axis=1)
+  ring_v = np.stack((vx, vy, vz), axis=-1)
+  keep = np.ones((len(xy), ring), dtype=bool)
+  keep[on_axis, 1:] = False
+  vertices = ring_v[keep]
+
+  # vertex index for each (profile point, ring position)
+  k = np.arange(ring)
+  vid = base[:, None] + np.where(on_axis[:, None], 0, k[None, :])
+
+  # side walls: a quad for each profile edge and segment
+  i = np.arange(len(xy))
+  j = np.roll(i, -1)
+  seg = np.arange(n)
+  seg1 = (seg + 1) % ring
+  a = vid[i][:, seg]
+  b = vid[i][:, seg1]
+  c = vid[j][:, seg1]
+  d = vid[j][:, seg]
+  t0 = np.stack((a, b, c), axis=-1)
+  t1 = np.stack((a, c, d), axis=-1)
+  # drop the degenerate half of quads that touch the axis
+  t0 = t0[~on_axis[i]].reshape(-1, 3)
+  t1 = t1[~on_axis[j]].reshape(-1, 3)
+  tris = [t0, t1]
+
+  if not full:
+    # end caps
+    cap = triangulate(xy)
+    tris.append(vid[:, 0][cap])
+    tris.append(vid[:, -1][cap][:, ::-1])
+
+  return (vertices, np.concatenate(tris))
+
+#------------------------------------------------------------------------------
+
+def normals(vertices, triangles):
+  """return the unit normals of the triangles"""
+  v = vertices[triangles]
+  n = np.cross(v[:, 1] - v[:, 0], v[:, 2] - v[:, 0])
+  l = np.sqrt(np.sum(n * n, axis=1))
+  l[l == 0.0] = 1.0
+  return n / l[:, None]
+
+def volume(vertices, triangles):
+  """return the signed volume enclosed by the mesh"""
+  v = vertices[triangles]
+  return np.sum(v[:, 0] * np.cross(v[:, 1], v[:, 2])) / 6.0
+
+def is_watertight(triangles):
+  """return True if every edge is shared by exactly one other triangle, in the opposite direction"""
+  t = np.asarray(triangles)
+  e = np.concatenate((t[:, [0, 1]], t[:, [1, 2]], t[:, [2, 0]]))
+  fwd = set(map(tuple, e.tolist()))
+  if len(fwd) != len(e):
+    return False
+  return all((b, a) in fwd for (a, b) in fwd)
+
+#------------------------------------------------------------------------------
+
+_stl_dtype = np.dtype([('normal', '<f4', (3,)), ('v', '<f4', (3, 3)), ('attr', '<u2')])
+
+def write_stl(f, vertices, triangles, name='mesh'):
+  """write the mesh to a binary file object as binary stl"""
+  header = ('binary stl: %s' % name).encode('ascii')[:80]
+  f.write(header + b' ' * (80 - len(header)))
+  f.write(struct.pack('<I', len(triangles)))
+  rec = np.zeros(len(triangles), dtype=_stl_dtype)
+  rec['normal'] = normals(vertices, triangles)
+  rec['v'] = vertices[triangles]
+  f.write(rec.tobytes())
+  instrument.count('stl.triangles', len(triangles))
+  instrument.count('stl.bytes', 84 + rec.nbytes)
+
+#------------------------------------------------------------------------------
@@ -0,0 +1,84 @@
+#------------------------------------------------------------------------------
+"""
+OpenSCAD Output
+
+Stream point arrays to a file object as OpenSCAD vector elements.
+Points are formatted a chunk at a time, so memory use is bounded by the
+chunk size regardless of the number of points written.
+
+precision = number of decimal places (6 gives the same output as '%f')
+trim = drop trailing zeros (and a trailing decimal point) from each value
+"""
+#------------------------------------------------------------------------------
+
+import re
+
+import numpy as np
+
+import instrument
+
+try:
+  from cStringIO import StringIO
+except ImportError:
+  from io import StringIO
+
+#------------------------------------------------------------------------------
+
+# number of points formatted per write
+chunk_size = 4096
+
+# trailing zeros of a number followed by ',' or ']'
+_trailing_zeros = re.compile(r'0+([,\]])')
+
+#------------------------------------------------------------------------------
+
+def chunks(xy, size=None):
+  """
+  yield Nx2 arrays from a point array or an iterable of point arrays
+  size = maximum points per array (None = chunk_size)
+  """
+  if size is None:
+    size = chunk_size
+  if isinstance(xy, (np.ndarray, list, tuple)):
+    xy = (xy,)
+  for x in xy:
+    x = np.asarray(x, dtype=np.float64).reshape(-1, 2)
+    for i in range(0, len(x), size):
+      yield x[i:i + size]
+
+def format_points(xy, precision=6, trim=False):
+  """return the points as '[x, y],' lines"""
+  fmt = '[%%.%df, %%.%df],\n' % (precision, precision)
+  s = (fmt * len(xy)) % tuple(xy.ravel().tolist())
+  if trim and precision > 0:
+    # every value has a decimal point, so only fractional zeros are removed
+    s = _trailing_zeros.sub(r'\1', s)
+    s = s.replace('.,', ',').replace('.]', ']')
+    s = s.replace('[-0,', '[0,').replace(' -0]', ' 0]')
+  return s
+
+def write_points(f, xy, precision=6, trim=False):
+  """
+  write points to a file object, one '[x, y],' per line
+  xy = Nx2 point array/list, or an iterator yielding point arrays
+  Return the number of points written.
+  """
+  n = 0
+  for x in chunks(xy):
+    s = format_points(x, precision, trim)
+    f.write(s)
+    n += len(x)
+    instrument.count('scad.bytes', len(s))
+  instrument.count('scad.points', n)
+  return n
+
+def write_polygon(f, name, xy, convexity=2, extrude='', precision=6, trim=False):
+  """write an openscad module containing a polygon"""
+  f.write('module %s() {\n' % name)
+  f.write('points = [\n')
+  write_points(f, xy, precision, trim)
+  f.write('];\n')
+  f.write('%spolygon(points=points, convexity=%d);\n' % (extrude, convexity))
+  f.write('}\n')
+
+#------------------------------------------------------------------------------
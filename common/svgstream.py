@@ -0,0 +1,120 @@
+#------------------------------------------------------------------------------
+"""
+Streaming SVG Output
+
+A minimal SVG writer for outlines. Elements are written to the file as
+they are added and path points are formatted a chunk at a time, so a long
+outline can be streamed from an iterator of point arrays.
+
+Drawing units are millimetres with y up, as in the dxf and scad output:
+the drawing is flipped into the svg frame.
+
+  import svgstream as svg
+  d = svg.drawing('part.svg', (xmin, ymin, xmax, ymax))
+  d.add(svg.path([outline]))
+  d.save()
+"""
+#------------------------------------------------------------------------------
+
+import numpy as np
+
+import instrument
+import scad
+
+#------------------------------------------------------------------------------
+
+# number of points formatted per write
+chunk_size = 4096
+
+# default element style: a hairline at any scale
+STYLE = 'fill="none" stroke="black" stroke-width="1" vector-effect="non-scaling-stroke"'
+
+#------------------------------------------------------------------------------
+
+class _path(object):
+
+  def __init__(self, subpaths, closed, style):
+    self.subpaths = subpaths
+    self.closed = closed
+    self.style = style
+
+  def write(self, f, fmt):
+    pfmt = '%s,%s ' % (fmt, fmt)
+    f.write('<path fill-rule="evenodd" %s d="' % self.style)
+    for xy in self.subpaths:
+      move = True
+      for x in scad.chunks(xy, chunk_size):
+        if move:
+          # move to the first point, then lines through the rest
+          f.write(('M' + pfmt + 'L') % tuple(x[0]))
+          x = x[1:]
+          move = False
+        f.write((pfmt * len(x)) % tuple(x.ravel().tolist()))
+      if self.closed and not move:
+        f.write('Z ')
+    f.write('"/>\n')
+    return 1
+
+class _circle(object):
+
+  def __init__(self, radius, center, style):
+    self.radius = radius
+    self.center = center
+    self.style = style
+
+  def write(self, f, fmt):
+    efmt = '<circle cx="%s" cy="%s" r="%s" %%s/>\n' % (fmt, fmt, fmt)
+    f.write(efmt % (self.center[0], self.center[1], self.radius, self.style))
+    return 1
+
+#------------------------------------------------------------------------------
+# element factories
+
+def path(subpaths, closed=True, style=STYLE):
+  """
+  a path of polylines, filled with the even-odd rule (so inner subpaths are holes)
+  subpaths = list of subpaths, each a point array or an iterator of point arrays
+  """
+  return _path(subpaths, closed, style)
+
+def circle(radius=1.0, center=(0.0, 0.0), style=STYLE):
+  """circle"""
+  return _circle(radius, center, style)
+
+#------------------------------------------------------------------------------
+
+class drawing(object):
+  """an svg file: elements are written as they are added"""
+
+  def __init__(self, name, bounds, precision=6, margin=1.0):
+    """
+    name = file name
+    bounds = (xmin, ymin, xmax, ymax) of the drawing
+    margin = space around the bounds
+    """
+    self.name = name
+    self.fmt = '%%.%df' % precision
+    self.elements = 0
+    (x0, y0, x1, y1) = bounds
+    (x0, y0, x1, y1) = (x0 - margin, y0 - margin, x1 + margin, y1 + margin)
+    (w, h) = (x1 - x0, y1 - y0)
+    self.f = open(name, 'w')
+    self.f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    hfmt = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="%s %s %s %s" width="%smm" height="%smm">\n' % ((self.fmt,) * 6)
+    # the viewbox is in the flipped (y down) frame
+    self.f.write(hfmt % (x0, -y1, w, h, w, h))
+    self.f.write('<g transform="scale(1,-1)">\n')
+
+  def add(self, element):
+    """write an element to the file"""
+    n = element.write(self.f, self.fmt)
+    self.elements += n
+    instrument.count('svg.elements', n)
+
+  def save(self):
+    """finish and close the file"""
+    self.f.write('</g>\n</svg>\n')
+    instrument.count('svg.bytes', self.f.tell())
+    self.f.close()
+
+#------------------------------------------------------------------------------
@@ -0,0 +1,121 @@
+#------------------------------------------------------------------------------
+"""
+2D Vector Math
+
+Vector operations on whole arrays of 2d points.
+A point set is an Nx2 float64 array (anything np.asarray() accepts will do),
+a single point is a length 2 array. Results are arrays of the same shape.
+
+Scripts in other directories pick this up with:
+
+  sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+  import vec2
+"""
+#------------------------------------------------------------------------------
+
+import math
+
+import numpy as np
+
+#------------------------------------------------------------------------------
+# angles: these work with scalars or arrays
+
+def d2r(d):
+  """degrees to radians"""
+  return (d * math.pi) / 180.0
+
+def r2d(r):
+  """radians to degrees"""
+  return (r * 180.0) / math.pi
+
+#------------------------------------------------------------------------------
+
+def points(p):
+  """return a point set as a float64 array"""
+  return np.asarray(p, dtype=np.float64)
+
+def polar(r, theta):
+  """return the points at radius r and angle theta (radians)"""
+  theta = points(theta)
+  return np.stack((r * np.cos(theta), r * np.sin(theta)), axis=-1)
+
+def angle(p):
+  """return the angle (radians) of each point about the origin"""
+  p = points(p)
+  return np.arctan2(p[..., 1], p[..., 0])
+
+def add(a, b):
+  """add 2d vectors"""
+  return points(a) + points(b)
+
+def sub(a, b):
+  """subtract 2d vectors"""
+  return points(a) - points(b)
+
+def translate(p, v):
+  """translate the points by the vector v"""
+  return points(p) + points(v)
+
+def scale(a, k):
+  """scale 2d vectors by k (scalar or per-vector)"""
+  k = points(k)
+  if k.ndim:
+    k = k[..., None]
+  return points(a) * k
+
+def dot(a, b):
+  """return the 2d dot products"""
+  a = points(a)
+  b = points(b)
+  return (a[..., 0] * b[..., 0]) + (a[..., 1] * b[..., 1])
+
+def cross(a, b):
+  """return the 2d cross products"""
+  a = points(a)
+  b = points(b)
+  return (a[..., 0] * b[..., 1]) - (a[..., 1] * b[..., 0])
+
+def length(a):
+  """return the lengths of 2d vectors"""
+  return np.sqrt(dot(a, a))
+
+def normalise(a):
+  """scale 2d vectors to length 1"""
+  return scale(a, 1.0 / length(a))
+
+def mirror_x(p):
+  """mirror points about the x-axis"""
+  return points(p) * (1.0, -1.0)
+
+def mirror_y(p):
+  """mirror points about the y-axis"""
+  return points(p) * (-1.0, 1.0)
+
+#------------------------------------------------------------------------------
+# rotations
+
+def rot_matrix(theta):
+  """rotation matrix: theta radians about the origin, shape theta.shape + (2, 2)"""
+  theta = points(theta)
+  c = np.cos(theta)
+  s = np.sin(theta)
+  return np.stack((np.stack((c, -s), axis=-1), np.stack((s, c), axis=-1)), axis=-2)
+
+def mult_matrix(a, v):
+  """return x = A.v for each vector (A is 2x2 or one 2x2 per vector)"""
+  a = points(a)
+  v = points(v)
+  x = v[..., 0]
+  y = v[..., 1]
+  return np.stack(((a[..., 0, 0] * x) + (a[..., 0, 1] * y), (a[..., 1, 0] * x) + (a[..., 1, 1] * y)), axis=-1)
+
+def rotate(p, theta):
+  """rotate points by theta radians about the origin (scalar or per-point theta)"""
+  return mult_matrix(rot_matrix(theta), p)
+
+def rotate_copies(p, theta):
+  """return an MxNx2 array: the N points rotated by each of the M angles"""
+  theta = points(theta).reshape(-1)
+  return mult_matrix(rot_matrix(theta)[:, None], points(p)[None])
+
+#------------------------------------------------------------------------------
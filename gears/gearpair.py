@@ -0,0 +1,219 @@
+#! /usr/bin/python
+#------------------------------------------------------------------------------
+"""
+Involute Gear Pair Analysis
+
+Mesh two involute_gear objects at a centre distance and report the
+operating pressure angle, contact ratio, backlash, tip clearance,
+undercut and interference.
+
+The clearance sweep turns the pair through one tooth pitch. At each step
+the tooth boundaries of one gear are tested against the solid of the
+other. A gear solid is the root disc plus the teeth, where the tooth at
+radius r covers the angles within the involute half thickness psi(r) of
+the tooth centre. The clearance of a boundary point is its arc distance
+from the nearest tooth flank of the other gear (-ve = overlap). All
+steps, teeth and points are evaluated as one array.
+
+usage: gearpair.py [-h] [-m MODULE] [-a PA] [-c CENTER] [-s STEPS] n1 n2
+"""
+#------------------------------------------------------------------------------
+
+import argparse
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+import vec2
+import instrument
+
+import gears
+
+#------------------------------------------------------------------------------
+
+# number of mesh positions in one tooth pitch
+_SWEEP_STEPS = 64
+
+# number of radii sampled along each flank
+_FLANK_STEPS = 48
+
+# number of teeth either side of the line of centres in the sweep
+_SWEEP_TEETH = 2
+
+#------------------------------------------------------------------------------
+
+def inv(phi):
+    """involute function: tan(phi) - phi"""
+    return np.tan(phi) - phi
+
+def half_angle(g, r):
+    """ return the tooth half thickness angle at radius r
+        g = involute gear
+        r = radius (scalar or array), below the base radius the flank is radial
+    """
+    r = np.maximum(np.asarray(r, dtype=np.float64), g.br)
+    phi = np.arccos(g.br / r)
+    # the teeth are a 50/50 tooth/gap split on the pitch circle, thinned by the backlash
+    return (g.ap / 4.0) - (g.backlash / (2.0 * g.pr)) + inv(g.pa) - inv(phi)
+
+def undercut(g):
+    """return True if a full depth rack cutter undercuts the gear"""
+    return g.n < (2.0 * g.a * g.p) / (math.sin(g.pa) ** 2)
+
+def tooth_boundary(g):
+    """return the boundary points of the template tooth (centred on the x-axis)"""
+    r = np.linspace(g.dr, g.ar, _FLANK_STEPS + 1)
+    psi = half_angle(g, r)
+    tip = half_angle(g, g.ar)
+    tip = np.linspace(-tip, tip, 9)[1:-1]
+    return np.concatenate((vec2.polar(r, -psi), vec2.polar(g.ar, tip), vec2.polar(r[::-1], psi[::-1])))
+
+#------------------------------------------------------------------------------
+
+class gear_pair:
+
+    def __init__(self, g1, g2, c=None):
+        """ g1, g2 = involute gears
+            c = centre distance (None = the standard pitch radius sum)
+        """
+        if abs(g1.p - g2.p) > 1e-9 * g1.p or abs(g1.pa - g2.pa) > 1e-12:
+            raise ValueError('gears must have the same diametral pitch and pressure angle')
+        self.g1 = g1
+        self.g2 = g2
+        self.c = (g1.pr + g2.pr) if c is None else float(c)
+        if self.c <= g1.br + g2.br:
+            raise ValueError('centre distance %f is inside the base circles' % self.c)
+        if self.c > g1.ar + g2.ar:
+            raise ValueError('centre distance %f is beyond the addendum circles' % self.c)
+        # operating pressure angle
+        self.opa = math.acos((g1.br + g2.br) / self.c)
+        # operating pitch radii
+        self.opr1 = self.c * g1.n / float(g1.n + g2.n)
+        self.opr2 = self.c * g2.n / float(g1.n + g2.n)
+        self.sweep_result = None
+
+    def contact_ratio(self):
+        """return the transverse contact ratio"""
+        g1 = self.g1
+        g2 = self.g2
+        l1 = math.sqrt(g1.ar ** 2 - g1.br ** 2)
+        l2 = math.sqrt(g2.ar ** 2 - g2.br ** 2)
+        # base pitch
+        pb = g1.br * g1.ap
+        return (l1 + l2 - (self.c * math.sin(self.opa))) / pb
+
+    def interference(self):
+        """
+        return (g1, g2) flags: True if the addendum of the mating gear reaches
+        past the interference point (the line of action tangent point) of the gear
+        """
+        g1 = self.g1
+        g2 = self.g2
+        loa = self.c * math.sin(self.opa)
+        i1 = g2.ar > math.sqrt(g2.br ** 2 + loa ** 2) + 1e-9
+        i2 = g1.ar > math.sqrt(g1.br ** 2 + loa ** 2) + 1e-9
+        return (i1, i2)
+
+    def backlash(self):
+        """return the circular backlash on the operating pitch circles"""
+        t1 = 2.0 * self.opr1 * half_angle(self.g1, self.opr1)
+        t2 = 2.0 * self.opr2 * half_angle(self.g2, self.opr2)
+        return (self.opr1 * self.g1.ap) - (t1 + t2)
+
+    def tip_clearance(self):
+        """return the radial clearance between each tip and the mating root"""
+        return (self.c - self.g1.ar - self.g2.dr, self.c - self.g2.ar - self.g1.dr)
+
+    @instrument.timed('mesh_sweep')
+    def sweep(self, steps=_SWEEP_STEPS):
+        """
+        turn the pair through one tooth pitch of g1
+        Return the minimum flank clearance at each step.
+        """
+        g1 = self.g1
+        g2 = self.g2
+        theta1 = np.arange(steps) * (g1.ap / steps)
+        # g2 turns the other way, with a tooth gap facing g1 at theta1 = 0
+        theta2 = math.pi + (g2.ap / 2.0) - (theta1 * g1.n / float(g2.n))
+        k = np.arange(-_SWEEP_TEETH, _SWEEP_TEETH + 1)
+        b1 = tooth_boundary(g1)
+        b2 = tooth_boundary(g2)
+        # boundary points (steps, teeth, points, 2) in the world frame
+        p1 = vec2.rotate_copies(b1, (theta1[:, None] + k[None, :] * g1.ap).ravel())
+        p2 = vec2.rotate_copies(b2, (theta2[:, None] + k[None, :] * g2.ap).ravel())
+        p1 = p1.reshape(steps, -1, 2)
+        p2 = p2.reshape(steps, -1, 2) + np.array([self.c, 0.0])
+        # g2 boundary against the g1 solid, and g1 boundary against the g2 solid
+        c1 = self._clearance(g1, p2, theta1, (0.0, 0.0))
+        c2 = self._clearance(g2, p1, theta2, (self.c, 0.0))
+        clearance = np.minimum(c1, c2)
+        self.sweep_result = clearance
+        return clearance
+
+    def _clearance(self, g, p, theta, centre):
+        """return the minimum arc clearance of points p (per step) from the teeth of g"""
+        q = p - np.array(centre)
+        r = np.sqrt(np.sum(q * q, axis=-1))
+        a = np.arctan2(q[..., 1], q[..., 0]) - np.asarray(theta)[:, None]
+        # angle from the nearest tooth centre
+        a = np.abs(np.remainder(a + (g.ap / 2.0), g.ap) - (g.ap / 2.0))
+        margin = (a - half_angle(g, r)) * r
+        # only points inside the tooth annulus can touch a flank
+        margin = np.where((r > g.dr) & (r <= g.ar), margin, np.inf)
+        # points inside the root circle overlap the root
+        margin = np.where(r <= g.dr, r - g.dr, margin)
+        return margin.min(axis=1)
+
+    def analyze(self, steps=_SWEEP_STEPS):
+        """return the analysis as a dictionary"""
+        clearance = self.sweep(steps)
+        (i1, i2) = self.interference()
+        return {
+            'centre_distance': self.c,
+            'operating_pressure_angle': vec2.r2d(self.opa),
+            'contact_ratio': self.contact_ratio(),
+            'backlash': self.backlash(),
+            'tip_clearance': self.tip_clearance(),
+            'min_clearance': float(clearance.min()),
+            'undercut': (undercut(self.g1), undercut(self.g2)),
+            'interference': (i1, i2),
+            'overlap': bool(clearance.min() < -1e-6 * self.c),
+        }
+
+    def __str__(self):
+        x = self.analyze()
+        s = []
+        s.append('teeth %d/%d' % (self.g1.n, self.g2.n))
+        s.append('centre distance %.3f' % x['centre_distance'])
+        s.append('operating pressure angle %.3f' % x['operating_pressure_angle'])
+        s.append('contact ratio %.3f' % x['contact_ratio'])
+        s.append('backlash %.4f' % x['backlash'])
+        s.append('tip clearance %.4f/%.4f' % x['tip_clearance'])
+        s.append('min flank clearance %.4f' % x['min_clearance'])
+        s.append('undercut %s/%s' % x['undercut'])
+        s.append('interference %s/%s' % x['interference'])
+        s.append('overlap %s' % x['overlap'])
+        return '\n'.join(s)
+
+#------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description='involute gear pair analysis')
+    parser.add_argument('n1', type=int, help='teeth on gear 1')
+    parser.add_argument('n2', type=int, help='teeth on gear 2')
+    parser.add_argument('-m', '--module', type=float, default=1.0, help='gear module (mm per tooth of pitch diameter)')
+    parser.add_argument('-a', '--pa', type=float, default=20.0, help='pressure angle (degrees)')
+    parser.add_argument('-c', '--center', type=float, default=None, help='centre distance (default: standard)')
+    parser.add_argument('-s', '--steps', type=int, default=_SWEEP_STEPS, help='sweep steps per tooth pitch')
+    args = parser.parse_args()
+    g1 = gears.involute_gear(args.n1, args.n1 * args.module, args.pa)
+    g2 = gears.involute_gear(args.n2, args.n2 * args.module, args.pa)
+    print(gear_pair(g1, g2, args.center))
+
+if __name__ == '__main__':
+    main()
+
+#------------------------------------------------------------------------------
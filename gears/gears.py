@@ -1,10 +1,21 @@
 #! /usr/bin/python
 #------------------------------------------------------------------------------
 
-import dxfwrite
-from dxfwrite import DXFEngine as dxf
-
+import argparse
+import json
 import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+import vec2
+import scad
+import adaptive
+import dxfstream as dxf
+import cache
+import instrument
 
 #------------------------------------------------------------------------------
 
@@ -14,41 +25,35 @@ _INVOLUTE_STEPS = 20
 # number of linear segments in cycloid curve
 _CYCLOID_STEPS = 1000
 
-#------------------------------------------------------------------------------
-
-def r2d(r):
-    return (r * 180.0) / math.pi
+# initial intervals for adaptive sampling: per involute, per cycloid lobe
+_INVOLUTE_GRID = 4
+_CYCLOID_GRID = 4
 
-def d2r(d):
-    return (d * math.pi) / 180.0
+# number of linear segments in the crown of a scad tooth outline
+_CROWN_STEPS = 8
 
-def mult_matrix(a, v):
-    """return x = A.v"""
-    return ((a[0][0] * v[0]) + (a[0][1] * v[1]), (a[1][0] * v[0]) + (a[1][1] * v[1]))
+# number of linear segments in the root of a scad gear outline
+_ROOT_STEPS = 8
 
-def rot_matrix(theta):
-    """rotation matrix: theta radians about the origin"""
-    c = math.cos(theta)
-    s = math.sin(theta)
-    return ((c, -s),(s, c))
+# number of teeth in each chunk of a streamed outline
+_CHUNK_TEETH = 256
 
-def mirror_x(p):
-    """mirror a point about the x-axis"""
-    return (p[0], -p[1])
+# cache the involute tooth templates (memory and disk, see cache.array)
+_TEMPLATE_CACHE = True
 
 #------------------------------------------------------------------------------
 
 def involute_point(base, theta):
-    """ return the involute point
+    """ return the involute point(s)
         base = base circle radius
-        theta = involute angle
+        theta = involute angle (scalar or array)
     """
-    x1 = base * math.cos(theta)
-    y1 = base * math.sin(theta)
+    theta = np.asarray(theta, dtype=np.float64)
+    c = np.cos(theta)
+    s = np.sin(theta)
+    # the base circle point plus the unwound tangent length
     l = base * theta
-    x2 = x1 + l * math.sin(theta)
-    y2 = y1 - l * math.cos(theta)
-    return (x2, y2)
+    return np.stack(((base * c) + (l * s), (base * s) - (l * c)), axis=-1)
 
 def involute_radius(base, theta):
     """ return the involute radius
@@ -67,47 +72,42 @@ def involute_theta(base, radius):
 #------------------------------------------------------------------------------
 
 def hyper_cycloid_point(pr, n, theta):
-    """ return the cycloid point
+    """ return the cycloid point(s)
         pr = pitch radius
         n = number of lobes
-        theta = angle
+        theta = angle (scalar or array)
     """
     n += 1
     cr = pr / float(n)
     # outer cycloid
-    cx = (pr + cr) * math.cos(theta)
-    cy = (pr + cr) * math.sin(theta)
+    c = vec2.polar(pr + cr, theta)
     # the external cycloid turns forwards (+ve with theta)
-    ctheta = float(n) * theta
-    x = cx + (cr * math.cos(ctheta))
-    y = cy + (cr * math.sin(ctheta))
-    return (x, y)
+    ctheta = float(n) * np.asarray(theta)
+    return vec2.add(c, vec2.polar(cr, ctheta))
 
 def hypo_cycloid_point(pr, n, theta):
-    """ return the cycloid point
+    """ return the cycloid point(s)
         pr = pitch radius
         n = number of lobes
-        theta = angle
+        theta = angle (scalar or array)
     """
     n -= 1
     cr = pr / float(n)
     # inner cycloid
-    cx = (pr - cr) * math.cos(theta)
-    cy = (pr - cr) * math.sin(theta)
+    c = vec2.polar(pr - cr, theta)
     # the internal cycloid turns backwards (-ve with theta)
-    ctheta = -1.0 * float(n) * theta
+    ctheta = -1.0 * float(n) * np.asarray(theta)
     #ctheta += math.pi
-    x = cx + (cr * math.cos(ctheta))
-    y = cy + (cr * math.sin(ctheta))
-    return (x, y)
+    return vec2.add(c, vec2.polar(cr, ctheta))
 
 #------------------------------------------------------------------------------
 
 class cycloid_gear:
 
-    def __init__(self, n, pd):
+    def __init__(self, n, pd, epsilon=None):
         self.n = n # number of teeth
         self.pd = pd # pitch diameter
+        self.epsilon = epsilon # chord tolerance (None = fixed _CYCLOID_STEPS)
         # derived values
         self.pr = self.pd / 2.0 # pitch radius
         self.ap = (2.0 * math.pi) / float(self.n) # angular pitch
@@ -116,27 +116,32 @@ class cycloid_gear:
         s = []
         s.append('number of teeth %d' % self.n)
         s.append('pitch diameter %.3f' % self.pd)
-        s.append('angular pitch %.3f' % r2d(self.ap))
+        s.append('angular pitch %.3f' % vec2.r2d(self.ap))
+        if self.epsilon is not None:
+            self.hyper_cycloid()
+            self.hypo_cycloid()
+            s.append('cycloid points %d/%d (epsilon %g)' % (len(self.hyper_seg), len(self.hypo_seg), self.epsilon))
         return '\n'.join(s)
 
+    def cycloid(self, fn, n):
+        """return the points of a cycloid with n lobes"""
+        if self.epsilon is None:
+            theta = np.linspace(0.0, math.pi * 2.0, _CYCLOID_STEPS + 1)
+            return fn(self.pr, self.n, theta)
+        f = lambda theta: fn(self.pr, self.n, theta)
+        (_, seg) = adaptive.sample(f, 0.0, math.pi * 2.0, self.epsilon, _CYCLOID_GRID * n)
+        instrument.count('curve.points', len(seg))
+        return seg
+
+    @instrument.timed('hyper_cycloid')
     def hyper_cycloid(self):
-        seg = []
-        theta = 0.0
-        theta_step = math.pi * 2.0 / float(_CYCLOID_STEPS)
-        for i in range(_CYCLOID_STEPS + 1):
-            seg.append(hyper_cycloid_point(self.pr, self.n, theta))
-            theta += theta_step
-        self.hyper_seg = seg
+        self.hyper_seg = self.cycloid(hyper_cycloid_point, self.n + 1)
 
+    @instrument.timed('hypo_cycloid')
     def hypo_cycloid(self):
-        seg = []
-        theta = 0.0
-        theta_step = math.pi * 2.0 / float(_CYCLOID_STEPS)
-        for i in range(_CYCLOID_STEPS + 1):
-            seg.append(hypo_cycloid_point(self.pr, self.n, theta))
-            theta += theta_step
-        self.hypo_seg = seg
+        self.hypo_seg = self.cycloid(hypo_cycloid_point, self.n - 1)
 
+    @instrument.timed('draw_cycloids')
     def draw_cycloids(self, d):
         d.add(dxf.polyline(self.hyper_seg))
         d.add(dxf.polyline(self.hypo_seg))
@@ -144,6 +149,7 @@ class cycloid_gear:
     def draw_circles(self, d):
         d.add(dxf.circle(center = (0.0, 0.0), radius = self.pr))
 
+    @instrument.timed('draw')
     def draw(self, d):
         self.hyper_cycloid()
         self.hypo_cycloid()
@@ -154,15 +160,30 @@ class cycloid_gear:
 
 class involute_gear:
 
-    def __init__(self, n, pd, pa):
+    def __init__(self, n, pd, pa, epsilon=None, backlash=0.0, clearance=None, addendum=None):
+        """
+        n = number of teeth
+        pd = pitch diameter
+        pa = pressure angle (degrees)
+        epsilon = chord tolerance (None = fixed _INVOLUTE_STEPS)
+        backlash = backlash on the pitch circle (thins the teeth)
+        clearance = dedendum less the standard addendum (None = 0.25/p)
+        addendum = addendum (None = the standard 1/p)
+        """
         self.n = n # number of teeth
         self.pd = pd # pitch diameter
-        self.pa = d2r(pa) # pressure angle
+        self.pa = vec2.d2r(pa) # pressure angle
+        self.epsilon = epsilon # chord tolerance (None = fixed _INVOLUTE_STEPS)
+        self.backlash = backlash # backlash on the pitch circle
         # derived values
         self.p = float(self.n) / self.pd # diametrical pitch
-        self.a = 1.0 / self.p # addendum
-        self.b = 1.25 / self.p # dedendum
-        self.c = 0.25 / self.p # clearance
+        self.a = 1.0 / self.p if addendum is None else addendum # addendum
+        if clearance is None:
+            self.b = 1.25 / self.p # dedendum
+            self.c = 0.25 / self.p # clearance
+        else:
+            self.b = (1.0 / self.p) + clearance
+            self.c = clearance
         self.pr = self.pd / 2.0 # pitch radius
         self.br = self.pr * math.cos(self.pa) # base radius
         self.ar = self.pr + self.a # addendum/outside radius
@@ -172,44 +193,67 @@ class involute_gear:
     def __str__(self):
         s = []
         s.append('number of teeth %d' % self.n)
-        s.append('pressure angle %.1f' % r2d(self.pa))
+        s.append('pressure angle %.1f' % vec2.r2d(self.pa))
         s.append('outside diameter %.3f' % (2.0 * self.ar))
         s.append('pitch diameter %.3f' % self.pd)
         s.append('base diameter %.3f' % (2.0 * self.br))
         s.append('inside diameter %.3f' % (2.0 * self.dr))
-        s.append('angular pitch %.3f' % r2d(self.ap))
+        s.append('angular pitch %.3f' % vec2.r2d(self.ap))
+        if self.epsilon is not None:
+            self.involute()
+            s.append('involute points %d (epsilon %g)' % (len(self.seg_lower), self.epsilon))
         return '\n'.join(s)
 
+    @instrument.timed('involute')
     def involute(self):
         """create involute segment"""
+        if _TEMPLATE_CACHE:
+            # the template depends on the geometry (normalised to floats) and the sampling
+            params = [float(x) for x in (self.n, self.pd, self.pa, self.backlash, self.a, self.b)]
+            epsilon = None if self.epsilon is None else float(self.epsilon)
+            params.extend((_INVOLUTE_STEPS, epsilon, _INVOLUTE_GRID))
+            k = cache.key('involute', params, cache.source_version(*src_dirs))
+            seg = cache.array(k, self.involute_template)
+        else:
+            seg = self.involute_template()
+        self.seg_lower = seg
+        # mirror the segment across the x-axis
+        self.seg_upper = vec2.mirror_x(seg)
+
+    def involute_template(self):
+        """return the lower involute of the template tooth"""
+        # the flank starts at the base circle, or the root circle if that is above it
+        theta_start = involute_theta(self.br, max(self.br, self.dr))
         theta_end = involute_theta(self.br, self.ar)
-        theta_step = theta_end / _INVOLUTE_STEPS
-        theta = 0.0
-        seg = []
-        for i in range(_INVOLUTE_STEPS + 1):
-            seg.append(involute_point(self.br, theta))
-            theta += theta_step
+        if self.epsilon is None:
+            seg = involute_point(self.br, np.linspace(theta_start, theta_end, _INVOLUTE_STEPS + 1))
+        else:
+            f = lambda theta: involute_point(self.br, theta)
+            (_, seg) = adaptive.sample(f, theta_start, theta_end, self.epsilon, _INVOLUTE_GRID)
+            instrument.count('curve.points', len(seg))
         # rotate the involute back to the x-axis at the pitch radius
         theta = involute_theta(self.br, self.pr)
         (x, y) = involute_point(self.br, theta)
         ofs = math.atan2(y, x)
         # add angular_pitch/4 to get a 50/50 tooth/gap split on the pitch circle
         ofs += self.ap / 4.0
+        # thin the tooth by half the backlash on each side
+        ofs -= self.backlash / (2.0 * self.pr)
         # rotate the segment
-        rot = rot_matrix(-ofs)
-        seg = [mult_matrix(rot, p) for p in seg]
-        self.seg_lower = seg
-        # mirror the segment across the x-axis
-        self.seg_upper = [mirror_x(p) for p in seg]
+        return vec2.rotate(seg, -ofs)
 
+    @instrument.timed('root')
     def root(self):
         """create the root segment"""
-        # get the base radius point of the upper involute
+        # get the first point of the upper involute
         (x, y) = self.seg_upper[0]
         theta = math.atan2(y, x)
-        # the root goes from this angle to the angular pitch
+        # the root goes from this angle to the next tooth, the flanks of
+        # teeth that are wider than the angular pitch there meet at a point
+        theta = min(theta, self.ap / 2.0)
         self.seg_root = (theta, self.ap - theta)
 
+    @instrument.timed('crown')
     def crown(self):
         """create the crown segment"""
         # get the addendum radius point of the upper involute
@@ -217,52 +261,60 @@ class involute_gear:
         theta = math.atan2(y, x)
         self.seg_crown = (-theta, theta)
 
+    @instrument.timed('radial')
     def radial(self):
         """create the radial segments"""
         (x1, y1) = self.seg_upper[0]
         theta = math.atan2(y1, x1)
         x2 = self.dr * math.cos(theta)
         y2 = self.dr * math.sin(theta)
-        self.seg_r_upper = [(x1, y1), (x2, y2)]
-        self.seg_r_lower = [(x1, -y1), (x2, -y2)]
+        self.seg_r_upper = vec2.points([(x1, y1), (x2, y2)])
+        self.seg_r_lower = vec2.mirror_x(self.seg_r_upper)
+
+    def tooth_angles(self):
+        """return the rotation of each tooth from the template tooth"""
+        return self.ap * np.arange(self.n)
 
+    @instrument.timed('draw_radials')
     def draw_radials(self, d):
         """draw all radials"""
-        rot = rot_matrix(self.ap)
+        if self.dr >= self.br:
+            # the flanks start on the root circle
+            return
+        theta = self.tooth_angles()
+        upper = vec2.rotate_copies(self.seg_r_upper, theta)
+        lower = vec2.rotate_copies(self.seg_r_lower, theta)
         for i in range(self.n):
-            d.add(dxf.polyline(self.seg_r_upper))
-            d.add(dxf.polyline(self.seg_r_lower))
-            self.seg_r_upper = [mult_matrix(rot, p) for p in self.seg_r_upper]
-            self.seg_r_lower = [mult_matrix(rot, p) for p in self.seg_r_lower]
+            d.add(dxf.polyline(upper[i]))
+            d.add(dxf.polyline(lower[i]))
 
+    @instrument.timed('draw_crowns')
     def draw_crowns(self, d):
         """draw all crowns"""
-        start = r2d(self.seg_crown[0])
-        end = r2d(self.seg_crown[1])
-        delta = r2d(self.ap)
+        theta = vec2.r2d(self.tooth_angles())
+        start = (vec2.r2d(self.seg_crown[0]) + theta).tolist()
+        end = (vec2.r2d(self.seg_crown[1]) + theta).tolist()
         for i in range(self.n):
-            d.add(dxf.arc(self.ar, (0.0, 0.0), start, end))
-            start += delta
-            end += delta
+            d.add(dxf.arc(self.ar, (0.0, 0.0), start[i], end[i]))
 
+    @instrument.timed('draw_roots')
     def draw_roots(self, d):
         """draw all the roots"""
-        start = r2d(self.seg_root[0])
-        end = r2d(self.seg_root[1])
-        delta = r2d(self.ap)
+        theta = vec2.r2d(self.tooth_angles())
+        start = (vec2.r2d(self.seg_root[0]) + theta).tolist()
+        end = (vec2.r2d(self.seg_root[1]) + theta).tolist()
         for i in range(self.n):
-            d.add(dxf.arc(self.dr, (0.0, 0.0), start, end))
-            start += delta
-            end += delta
+            d.add(dxf.arc(self.dr, (0.0, 0.0), start[i], end[i]))
 
+    @instrument.timed('draw_involutes')
     def draw_involutes(self, d):
         """draw all the involutes"""
-        rot = rot_matrix(self.ap)
+        theta = self.tooth_angles()
+        lower = vec2.rotate_copies(self.seg_lower, theta)
+        upper = vec2.rotate_copies(self.seg_upper, theta)
         for i in range(self.n):
-            d.add(dxf.polyline(self.seg_lower))
-            d.add(dxf.polyline(self.seg_upper))
-            self.seg_upper = [mult_matrix(rot, p) for p in self.seg_upper]
-            self.seg_lower = [mult_matrix(rot, p) for p in self.seg_lower]
+            d.add(dxf.polyline(lower[i]))
+            d.add(dxf.polyline(upper[i]))
 
     def draw_circles(self, d):
        d.add(dxf.circle(center = (0.0, 0.0), radius = self.dr))
@@ -270,25 +322,212 @@ class involute_gear:
        d.add(dxf.circle(center = (0.0, 0.0), radius = self.pr))
        d.add(dxf.circle(center = (0.0, 0.0), radius = self.ar))
 
-    def draw(self, d):
+    def segments(self):
+        """create the template tooth segments"""
         self.involute()
         self.root()
         self.crown()
         self.radial()
+
+    @instrument.timed('draw')
+    def draw(self, d):
+        self.segments()
         self.draw_involutes(d)
         self.draw_roots(d)
         self.draw_crowns(d)
         self.draw_radials(d)
         self.draw_circles(d)
 
+    def tooth_block(self, name):
+        """return a dxf block with the entities of the template tooth"""
+        entities = [
+            dxf.polyline(self.seg_lower),
+            dxf.polyline(self.seg_upper),
+            dxf.arc(self.dr, (0.0, 0.0), vec2.r2d(self.seg_root[0]), vec2.r2d(self.seg_root[1])),
+            dxf.arc(self.ar, (0.0, 0.0), vec2.r2d(self.seg_crown[0]), vec2.r2d(self.seg_crown[1])),
+        ]
+        if self.dr < self.br:
+            entities.append(dxf.polyline(self.seg_r_upper))
+            entities.append(dxf.polyline(self.seg_r_lower))
+        return dxf.block(name, entities)
+
+    @instrument.timed('draw_instanced')
+    def draw_instanced(self, d, name='tooth'):
+        """draw the gear as one tooth block placed n times"""
+        self.segments()
+        d.add_block(self.tooth_block(name))
+        d.add(dxf.inserts(name, vec2.r2d(self.tooth_angles())))
+        self.draw_circles(d)
+
+    def tooth_outline(self):
+        """return the template tooth outline: a wedge from the origin out to the crown"""
+        (t0, t1) = self.seg_crown
+        crown = vec2.polar(self.ar, np.linspace(t0, t1, _CROWN_STEPS + 1))
+        return np.concatenate((vec2.points([(0.0, 0.0)]), self.seg_lower, crown[1:-1], self.seg_upper[::-1]))
+
+    @instrument.timed('write_scad')
+    def write_scad(self, f, name='gear'):
+        """
+        write openscad modules for the gear: <name>_tooth() is the tooth
+        outline, <name>() places it n times around the root circle
+        """
+        self.segments()
+        scad.write_polygon(f, '%s_tooth' % name, self.tooth_outline())
+        f.write('module %s() {\n' % name)
+        f.write('circle(r=%f, $fn=%d);\n' % (self.dr, _CROWN_STEPS * self.n))
+        f.write('for (i = [0:%d]) rotate([0,0,i * %f]) %s_tooth();\n' % (self.n - 1, vec2.r2d(self.ap), name))
+        f.write('}\n')
+
+    def outline_tooth(self):
+        """return the outline of the template tooth and the root up to the next tooth"""
+        self.segments()
+        (t0, t1) = self.seg_crown
+        crown = vec2.polar(self.ar, np.linspace(t0, t1, _CROWN_STEPS + 1))
+        # the root runs to the next tooth, its ends are the radials
+        (t0, t1) = self.seg_root
+        if t0 < t1:
+            root = vec2.polar(self.dr, np.linspace(t0, t1, _ROOT_STEPS + 1))
+        else:
+            # no root: the flanks meet
+            root = np.zeros((0, 2))
+        return np.concatenate((self.seg_lower, crown[1:-1], self.seg_upper[::-1], root))
+
+    def outline_chunks(self, teeth=_CHUNK_TEETH):
+        """yield the gear outline (see outline) a chunk of teeth at a time"""
+        tooth = self.outline_tooth()
+        for i in range(0, self.n, teeth):
+            theta = self.ap * np.arange(i, min(i + teeth, self.n))
+            yield vec2.rotate_copies(tooth, theta).reshape(-1, 2)
+
+    def outline(self):
+        """return the closed outline of the whole gear, counter clockwise from the first tooth"""
+        return np.concatenate(list(self.outline_chunks()))
+
 #------------------------------------------------------------------------------
 
+def rack_chunks(n, module, pa, backlash, base_height, teeth=_CHUNK_TEETH):
+    """yield the rack outline (see rack_outline) a chunk of teeth at a time"""
+    a = module # addendum
+    b = 1.25 * module # dedendum
+    tp = module * math.pi # tooth pitch
+    dx = (a + b) * math.tan(vec2.d2r(pa))
+    dxt = ((tp / 2.0) - dx) / 2.0
+    bl = backlash / 2.0
+    # the teeth right to left along the top of the base
+    tooth = vec2.points([
+        (-bl + dx + dxt, base_height),
+        (-bl + dxt, base_height + a + b),
+        (bl - dxt, base_height + a + b),
+        (bl - dx - dxt, base_height),
+    ])
+    yield vec2.points([
+        (-tp, 0.0),
+        (n * tp, 0.0),
+        (n * tp, base_height),
+    ])
+    for i in range(n, 0, -teeth):
+        x = tp * np.arange(i - 1, max(i - teeth, 0) - 1, -1)
+        dx = np.stack((x, np.zeros(len(x))), axis=-1)
+        yield (tooth[None, :, :] + dx[:, None, :]).reshape(-1, 2)
+    yield vec2.points([(-tp, base_height)])
+
+def rack_outline(n, module, pa, backlash, base_height):
+    """
+    return the closed outline of a rack, as the rack_2d scad module draws it
+    n = number of teeth
+    module = gear module
+    pa = pressure angle (degrees)
+    backlash = backlash on the pitch line
+    base_height = height of the base below the teeth
+    """
+    return np.concatenate(list(rack_chunks(n, module, pa, backlash, base_height)))
+
+def gear_outline(n, module, pa, backlash=0.0, clearance=None, epsilon=None):
+    """return the closed outline of an involute gear given by its module"""
+    return involute_gear(n, n * module, pa, epsilon, backlash, clearance).outline()
+
+def load_outlines(fname):
+    """
+    return an outline spec from a json file:
+    {
+      "module": gear module, "shrink": scale divisor (default 1),
+      "pa": pressure angle (degrees), "backlash": backlash, "clearance": clearance,
+      "outlines": [{"name": module name, "teeth": n, "kind": "gear" or "rack", "base": rack base height}, ...]
+    }
+    backlash and clearance are scaled like the module.
+    """
+    f = open(fname)
+    spec = json.load(f)
+    f.close()
+    return spec
+
+@instrument.timed('write_outlines')
+def write_outlines(f, spec):
+    """
+    write the gear parameters and a flat polygon module for each outline in a spec,
+    for an openscad file to include
+    """
+    k = 1.0 / spec.get('shrink', 1.0)
+    module = spec['module'] * k
+    pa = spec.get('pa', 20.0)
+    backlash = spec.get('backlash', 0.0) * k
+    clearance = spec.get('clearance', None)
+    clearance = None if clearance is None else clearance * k
+    f.write('gear_module = %f;\n' % module)
+    f.write('pressure_angle = %f;\n' % pa)
+    f.write('gear_backlash = %f;\n' % backlash)
+    f.write('gear_clearance = %f;\n' % (0.25 * module if clearance is None else clearance))
+    for x in spec['outlines']:
+        if x.get('kind', 'gear') == 'rack':
+            xy = rack_outline(x['teeth'], module, pa, backlash, x['base'] * k)
+        else:
+            xy = gear_outline(x['teeth'], module, pa, backlash, clearance)
+        scad.write_polygon(f, x['name'], xy)
+
+#------------------------------------------------------------------------------
+
+# generator sources for the cache version: this directory and the common modules
+src_dir = os.path.dirname(os.path.abspath(__file__))
+src_dirs = (src_dir, os.path.join(src_dir, '..', 'common'))
+
 def main():
-    d = dxf.drawing('gear.dxf')
-    #g = cycloid_gear(36, 1.5)
-    g = involute_gear(32, 169.4, 8)
-    g.draw(d)
-    d.save()
-    print g
-
-main()
+    parser = argparse.ArgumentParser(description='gear generation')
+    parser.add_argument('--instanced', action='store_true', help='draw one tooth block placed n times')
+    parser.add_argument('-e', '--epsilon', type=float, default=None, help='chord tolerance for adaptive curve sampling')
+    parser.add_argument('--outlines', nargs=2, metavar=('SPEC', 'SCAD'), help='write the openscad outline modules for a json spec to a file (instead of gear.dxf)')
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    instrument.start(args)
+
+    if args.outlines:
+        (spec_name, scad_name) = args.outlines
+        spec = load_outlines(spec_name)
+        def generate_outlines(fname):
+            f = open(fname, 'w')
+            f.write('// generated by gears.py --outlines %s: do not edit\n' % os.path.basename(spec_name))
+            write_outlines(f, spec)
+            f.close()
+        k = cache.key('outlines.scad', [os.path.basename(spec_name), spec], cache.source_version(*src_dirs))
+        cache.output(scad_name, k, generate_outlines)
+        instrument.finish(args)
+        return
+
+    #(gear, gear_args) = (cycloid_gear, (36, 1.5))
+    (gear, gear_args) = (involute_gear, (32, 169.4, 8))
+    g = gear(*gear_args, epsilon=args.epsilon)
+
+    def generate(fname):
+        d = dxf.drawing(fname)
+        if args.instanced:
+            g.draw_instanced(d)
+        else:
+            g.draw(d)
+        d.save()
+
+    k = cache.key('gear.dxf', [gear.__name__, gear_args, args.instanced, args.epsilon], cache.source_version(*src_dirs))
+    cache.output('gear.dxf', k, generate)
+    print(g)
+    instrument.finish(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+#! /usr/bin/python
+#------------------------------------------------------------------------------
+"""
+Streamed Rack and Ring Gear Output
+
+Write long racks and large internal ring gears to SCAD, DXF or SVG a chunk
+of teeth at a time. The outlines come from gears.rack_chunks and
+involute_gear.outline_chunks and go straight to the file, so memory use
+depends on the chunk size, not the number of teeth. A progress function is
+called with (teeth done, teeth) after each chunk.
+
+A ring gear is a disc with the tooth spaces cut out. The spaces are the
+teeth of an external involute gear with the same parameters: the shape a
+pinion type cutter of the same size would leave. The addendum and
+dedendum are swapped to suit an internal gear: the ring teeth reach in to
+the pitch radius less one module and the spaces reach out to the pitch
+radius plus the dedendum, so a standard pinion has the usual clearance at
+both. Backlash widens the spaces.
+
+Outputs are not cached: they can be larger than the whole cache.
+
+usage: stream.py [-h] [-m MODULE] [-a PA] [-b BACKLASH] [--base BASE]
+                 [--rim RIM] [-e EPSILON] [-c CHUNK] [-q] {rack,ring} n output
+"""
+#------------------------------------------------------------------------------
+
+import argparse
+import math
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+import scad
+import dxfstream as dxf
+import svgstream as svg
+import instrument
+
+import gears
+
+#------------------------------------------------------------------------------
+
+class rack:
+    """a straight rack along the x-axis, teeth up"""
+
+    def __init__(self, n, module, pa, backlash, base_height):
+        self.n = n # number of teeth
+        self.args = (n, module, pa, backlash, base_height)
+        self.tp = module * math.pi # tooth pitch
+        self.height = base_height + 2.25 * module
+        # outline points per tooth
+        self.tooth_points = 4
+
+    def count(self):
+        """return the number of outline points"""
+        return 4 * self.n + 4
+
+    def bounds(self):
+        return (-self.tp, 0.0, self.n * self.tp, self.height)
+
+    def chunks(self, teeth):
+        return gears.rack_chunks(*self.args, teeth=teeth)
+
+    def write_scad(self, f, name, chunks):
+        scad.write_polygon(f, name, chunks)
+
+    def draw(self, d, chunks):
+        d.add(dxf.polyline(chunks, flags=dxf.POLYLINE_CLOSED, count=self.count()))
+
+    def draw_svg(self, d, chunks):
+        d.add(svg.path([chunks]))
+
+class ring:
+    """an internal ring gear centred on the origin"""
+
+    def __init__(self, n, module, pa, backlash, rim, epsilon=None):
+        self.n = n # number of teeth
+        # the tooth spaces: thinner teeth make wider spaces, a space is as
+        # deep as a pinion tooth plus the clearance, a ring tooth is an addendum
+        self.g = gears.involute_gear(n, n * module, pa, epsilon, -backlash, clearance=0.0, addendum=1.25 * module)
+        self.r = self.g.ar + rim # outside radius
+        # outline points per tooth
+        self.tooth_points = len(self.g.outline_tooth())
+
+    def count(self):
+        """return the number of outline points"""
+        return self.n * self.tooth_points
+
+    def bounds(self):
+        return (-self.r, -self.r, self.r, self.r)
+
+    def chunks(self, teeth):
+        return self.g.outline_chunks(teeth)
+
+    def write_scad(self, f, name, chunks):
+        scad.write_polygon(f, '%s_spaces' % name, chunks)
+        f.write('module %s() {\n' % name)
+        f.write('difference() {\n')
+        f.write('circle(r=%f, $fn=%d);\n' % (self.r, gears._CROWN_STEPS * self.n))
+        f.write('%s_spaces();\n' % name)
+        f.write('}\n')
+        f.write('}\n')
+
+    def draw(self, d, chunks):
+        d.add(dxf.circle(self.r))
+        d.add(dxf.polyline(chunks, flags=dxf.POLYLINE_CLOSED, count=self.count()))
+
+    def draw_svg(self, d, chunks):
+        d.add(svg.circle(self.r))
+        d.add(svg.path([chunks]))
+
+#------------------------------------------------------------------------------
+
+def _reported(part, chunks, progress):
+    """yield the chunks, calling progress(teeth done, teeth) after each one"""
+    done = 0
+    for x in chunks:
+        yield x
+        # the rack base and end are less than a tooth
+        k = len(x) // part.tooth_points
+        if k:
+            done += k
+            progress(done, part.n)
+
+@instrument.timed('stream')
+def write(part, fname, name='gear', teeth=gears._CHUNK_TEETH, progress=None):
+    """
+    write a rack or ring gear outline a chunk of teeth at a time
+    fname = output file (.scad, .dxf or .svg)
+    name = openscad module name
+    teeth = number of teeth per chunk
+    progress = function called with (teeth done, teeth) after each chunk
+    """
+    chunks = part.chunks(teeth)
+    if progress is not None:
+        chunks = _reported(part, chunks, progress)
+    ext = os.path.splitext(fname)[1].lower()
+    if ext == '.scad':
+        f = open(fname, 'w')
+        part.write_scad(f, name, chunks)
+        f.close()
+    elif ext == '.dxf':
+        d = dxf.drawing(fname)
+        part.draw(d, chunks)
+        d.save()
+    elif ext == '.svg':
+        d = svg.drawing(fname, part.bounds())
+        part.draw_svg(d, chunks)
+        d.save()
+    else:
+        raise ValueError('unknown output type %s (use .scad, .dxf or .svg)' % fname)
+
+#------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description='streamed rack and ring gear output')
+    parser.add_argument('kind', choices=('rack', 'ring'), help='rack or internal ring gear')
+    parser.add_argument('n', type=int, help='number of teeth')
+    parser.add_argument('output', help='output file (.scad, .dxf or .svg)')
+    parser.add_argument('-m', '--module', type=float, default=1.0, help='gear module (default: 1.0)')
+    parser.add_argument('-a', '--pa', type=float, default=20.0, help='pressure angle, degrees (default: 20)')
+    parser.add_argument('-b', '--backlash', type=float, default=0.0, help='backlash on the pitch line (default: 0)')
+    parser.add_argument('--base', type=float, default=None, help='rack base height (default: 2 x module)')
+    parser.add_argument('--rim', type=float, default=None, help='ring wall outside the tooth spaces (default: 2 x module)')
+    parser.add_argument('-e', '--epsilon', type=float, default=None, help='chord tolerance for adaptive involute sampling')
+    parser.add_argument('-c', '--chunk', type=int, default=gears._CHUNK_TEETH, help='teeth per chunk (default: %d)' % gears._CHUNK_TEETH)
+    parser.add_argument('-q', '--quiet', action='store_true', help='no progress report')
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    instrument.start(args)
+
+    if args.kind == 'rack':
+        base = 2.0 * args.module if args.base is None else args.base
+        part = rack(args.n, args.module, args.pa, args.backlash, base)
+    else:
+        rim = 2.0 * args.module if args.rim is None else args.rim
+        part = ring(args.n, args.module, args.pa, args.backlash, rim, args.epsilon)
+
+    def progress(done, n):
+        sys.stderr.write('\r%d/%d teeth' % (done, n))
+        sys.stderr.flush()
+
+    write(part, args.output, args.kind, args.chunk, None if args.quiet else progress)
+    if not args.quiet:
+        sys.stderr.write('\n')
+    instrument.finish(args)
+
+if __name__ == '__main__':
+    main()
+
+#------------------------------------------------------------------------------
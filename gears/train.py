@@ -0,0 +1,283 @@
+#! /usr/bin/python
+#------------------------------------------------------------------------------
+"""
+Compound Gear Train Search
+
+Find compound involute gear trains (stages of driver/driven pairs) whose
+overall ratio is within a tolerance of a target ratio, subject to a tooth
+count range, a module, a maximum centre distance per stage and no
+undercut at the pressure angle.
+
+The search is a depth first branch and bound over the stage pairs, sorted
+by ratio. Stage order does not change the ratio, so stages are taken in
+non-decreasing pair order. A branch is pruned when the remaining stages
+can't reach the target ratio, or can't beat the tooth count of the worst
+kept solution once enough have been found. The first stage choices are
+spread across a process pool.
+
+usage: train.py [-h] [-t TOL] [-s STAGES] [--min MIN] [--max MAX] [-m MODULE]
+                [-a PA] [-c CMAX] [-n LIMIT] [-j JOBS] ratio
+"""
+#------------------------------------------------------------------------------
+
+import argparse
+import bisect
+import multiprocessing
+import sys
+
+try:
+    from concurrent import futures
+except ImportError:
+    # python 2 without the futures backport: search serially
+    futures = None
+
+import numpy as np
+
+import gears
+import gearpair
+
+#------------------------------------------------------------------------------
+
+class train:
+    """a compound gear train: a list of (driver, driven) tooth counts"""
+
+    def __init__(self, pairs, target, module, pa):
+        self.pairs = tuple(pairs)
+        self.module = module
+        self.pa = pa
+        self.ratio = 1.0
+        for (a, b) in self.pairs:
+            self.ratio *= float(b) / float(a)
+        self.error = (self.ratio / target) - 1.0
+        self.teeth = sum(a + b for (a, b) in self.pairs)
+
+    def gears(self):
+        """return the (driver, driven) involute gears for each stage"""
+        g = []
+        for (a, b) in self.pairs:
+            g.append((gears.involute_gear(a, a * self.module, self.pa), gears.involute_gear(b, b * self.module, self.pa)))
+        return g
+
+    def centre_distances(self):
+        return [(a + b) * self.module / 2.0 for (a, b) in self.pairs]
+
+    def __str__(self):
+        stages = ' x '.join(['%d:%d' % p for p in self.pairs])
+        return '%s ratio %.6f error %+.2e teeth %d' % (stages, self.ratio, self.error, self.teeth)
+
+#------------------------------------------------------------------------------
+
+def min_teeth(module, pa):
+    """return the smallest tooth count that isn't undercut at the pressure angle"""
+    n = 3
+    while gearpair.undercut(gears.involute_gear(n, n * module, pa)):
+        n += 1
+    return n
+
+def stage_pairs(nmin, nmax, module, cmax):
+    """return the allowed (driver, driven) pairs sorted by ratio"""
+    pairs = []
+    for a in range(nmin, nmax + 1):
+        for b in range(nmin, nmax + 1):
+            if cmax is None or (a + b) * module / 2.0 <= cmax:
+                pairs.append((float(b) / float(a), a, b))
+    pairs.sort()
+    return pairs
+
+def _range_min_table(x):
+    """return a sparse table for range minimum queries on x"""
+    t = [x]
+    w = 1
+    while 2 * w <= len(x):
+        prev = t[-1]
+        t.append(np.minimum(prev[:len(prev) - w], prev[w:]))
+        w *= 2
+    return t
+
+class _search:
+    """branch and bound search over the stages"""
+
+    def __init__(self, pairs, target, tol, stages, limit, found):
+        self.pairs = pairs
+        self.ratios = [p[0] for p in pairs]
+        self.r = np.array(self.ratios)
+        self.teeth = np.array([p[1] + p[2] for p in pairs])
+        self.table = _range_min_table(self.teeth)
+        self.lo = target / (1.0 + tol)
+        self.hi = target * (1.0 + tol)
+        self.stages = stages
+        self.limit = limit
+        self.rmin = self.ratios[0]
+        self.rmax = self.ratios[-1]
+        self.tmin = int(self.teeth.min())
+        # (teeth, pairs) of the best trains so far, fewest teeth first
+        self.found = found
+
+    def bound(self):
+        """return the tooth count a new solution must beat"""
+        if len(self.found) < self.limit:
+            return sys.maxsize
+        return self.found[-1][0]
+
+    def keep(self, teeth, chosen):
+        x = (teeth, tuple(chosen))
+        if x not in self.found:
+            self.found.append(x)
+            self.found.sort()
+            del self.found[self.limit:]
+
+    def range_min(self, i0, i1):
+        """return the minimum teeth of the pairs in [i0, i1) (arrays, i1 > i0)"""
+        l = np.floor(np.log2(i1 - i0)).astype(np.intp)
+        w = 1 << l
+        out = np.empty(len(i0), dtype=self.teeth.dtype)
+        for level in np.unique(l).tolist():
+            m = l == level
+            t = self.table[level]
+            out[m] = np.minimum(t[i0[m]], t[i1[m] - w[m]])
+        return out
+
+    def run(self, start, ratio, teeth, chosen):
+        """extend a partial train whose last stage is pair index start"""
+        left = self.stages - len(chosen)
+        if left == 0:
+            self.keep(teeth, chosen)
+            return
+        if left == 2:
+            self.last_two(start, ratio, teeth, chosen)
+            return
+        # the ratio range this stage can take and still reach the target
+        lo = self.lo / (ratio * self.rmax ** (left - 1))
+        hi = self.hi / (ratio * self.rmin ** (left - 1))
+        i0 = max(start, bisect.bisect_left(self.ratios, lo))
+        i1 = bisect.bisect_right(self.ratios, hi)
+        if i0 >= i1:
+            return
+        # try the candidates with the fewest teeth first: once a candidate
+        # can't beat the bound, none of the rest can
+        rest = teeth + (left - 1) * self.tmin
+        t = self.teeth[i0:i1]
+        for k in np.argsort(t, kind='mergesort').tolist():
+            if rest + t[k] >= self.bound():
+                break
+            (r, a, b) = self.pairs[i0 + k]
+            if left == 1 and not (self.lo <= ratio * r <= self.hi):
+                continue
+            chosen.append((a, b))
+            self.run(i0 + k, ratio * r, teeth + a + b, chosen)
+            chosen.pop()
+
+    def last_two(self, start, ratio, teeth, chosen):
+        """the last two stages: all the candidates for the first one at once"""
+        j0 = max(start, bisect.bisect_left(self.ratios, self.lo / (ratio * self.rmax)))
+        j1 = bisect.bisect_right(self.ratios, self.hi / (ratio * self.rmin))
+        if j0 >= j1:
+            return
+        j = np.arange(j0, j1)
+        rj = ratio * self.r[j]
+        # the range of final stages for each candidate
+        k0 = np.maximum(j, np.searchsorted(self.r, self.lo / rj, 'left'))
+        k1 = np.searchsorted(self.r, self.hi / rj, 'right')
+        ok = k1 > k0
+        j = j[ok]
+        k0 = k0[ok]
+        k1 = k1[ok]
+        if len(j) == 0:
+            return
+        best = teeth + self.teeth[j] + self.range_min(k0, k1)
+        order = np.argsort(best, kind='mergesort')
+        for i in order.tolist():
+            if best[i] >= self.bound():
+                break
+            (r1, a1, b1) = self.pairs[j[i]]
+            t1 = teeth + a1 + b1
+            t = self.teeth[k0[i]:k1[i]]
+            for k in np.argsort(t, kind='mergesort').tolist():
+                if t1 + t[k] >= self.bound():
+                    break
+                (r2, a2, b2) = self.pairs[k0[i] + k]
+                if self.lo <= ratio * r1 * r2 <= self.hi:
+                    self.keep(t1 + a2 + b2, chosen + [(a1, b1), (a2, b2)])
+
+def _search_first(found, pairs, target, tol, stages, limit, first):
+    """
+    search the trains whose first stage is pair index first
+    found = the trains found by earlier jobs of the same search (updated)
+    """
+    s = _search(pairs, target, tol, stages, limit, found)
+    (r, a, b) = pairs[first]
+    s.run(first, r, a + b, [(a, b)])
+    return list(found)
+
+# pool workers: trains found by earlier jobs in this worker, by search.
+# A pool lives for one search() call, so this only tightens the bound.
+_found = {}
+
+def _search_worker(key, pairs, target, tol, stages, limit, first):
+    """search the trains whose first stage is pair index first (in a pool worker)"""
+    return _search_first(_found.setdefault(key, []), pairs, target, tol, stages, limit, first)
+
+#------------------------------------------------------------------------------
+
+def search(ratio, tol=1e-3, stages=3, nmin=12, nmax=80, module=1.0, pa=20.0, cmax=None, limit=10, workers=None):
+    """
+    search for compound trains within tol (relative) of the target ratio
+    stages = maximum number of stages (trains with fewer stages are included)
+    nmin, nmax = tooth count range (nmin is raised to avoid undercut)
+    cmax = maximum centre distance per stage (None = no limit)
+    limit = number of trains to return, fewest teeth first
+    workers = number of processes (None = one per cpu, 1 = run in this process)
+    """
+    nmin = max(nmin, min_teeth(module, pa))
+    pairs = stage_pairs(nmin, nmax, module, cmax)
+    if not pairs:
+        return []
+    jobs = []
+    for s in range(1, stages + 1):
+        # first stage candidates that can still reach the target
+        lo = ratio / ((1.0 + tol) * pairs[-1][0] ** (s - 1))
+        hi = ratio * (1.0 + tol) / (pairs[0][0] ** (s - 1))
+        ratios = [p[0] for p in pairs]
+        for i in range(bisect.bisect_left(ratios, lo), bisect.bisect_right(ratios, hi)):
+            jobs.append((s, i))
+    # small first stages first, so each process finds a tight bound early
+    jobs.sort(key=lambda j: pairs[j[1]][1] + pairs[j[1]][2])
+    n = len(jobs)
+    args = ([pairs] * n, [ratio] * n, [tol] * n, [j[0] for j in jobs], [limit] * n, [j[1] for j in jobs])
+    if workers == 1 or futures is None or len(jobs) < 2:
+        # the jobs share one list of trains found
+        results = list(map(_search_first, [[]] * n, *args))
+    else:
+        key = (ratio, tol, stages, limit, nmin, nmax, module, pa, cmax)
+        chunk = max(1, len(jobs) // (8 * (workers or multiprocessing.cpu_count())))
+        with futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_search_worker, [key] * n, *args, chunksize=chunk))
+    found = set()
+    for r in results:
+        found.update(r)
+    found = sorted(found)
+    return [train(chosen, ratio, module, pa) for (teeth, chosen) in found[:limit]]
+
+#------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description='compound gear train search')
+    parser.add_argument('ratio', type=float, help='target ratio (driven/driver: > 1 is a reduction)')
+    parser.add_argument('-t', '--tol', type=float, default=1e-3, help='relative ratio tolerance (default: 1e-3)')
+    parser.add_argument('-s', '--stages', type=int, default=3, help='maximum number of stages (default: 3)')
+    parser.add_argument('--min', type=int, default=12, help='minimum tooth count (default: 12)')
+    parser.add_argument('--max', type=int, default=80, help='maximum tooth count (default: 80)')
+    parser.add_argument('-m', '--module', type=float, default=1.0, help='gear module (default: 1.0)')
+    parser.add_argument('-a', '--pa', type=float, default=20.0, help='pressure angle, degrees (default: 20)')
+    parser.add_argument('-c', '--cmax', type=float, default=None, help='maximum centre distance per stage')
+    parser.add_argument('-n', '--limit', type=int, default=10, help='number of trains to list (default: 10)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes (default: one per cpu)')
+    args = parser.parse_args()
+    trains = search(args.ratio, args.tol, args.stages, args.min, args.max, args.module, args.pa, args.cmax, args.limit, args.jobs)
+    for t in trains:
+        print(t)
+
+if __name__ == '__main__':
+    main()
+
+#------------------------------------------------------------------------------
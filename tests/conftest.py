@@ -0,0 +1,32 @@
+#------------------------------------------------------------------------------
+"""
+Test Configuration
+
+The scripts import their neighbours and the common modules by directory,
+so the test session puts those directories on the path. Generated files
+and cached arrays go to a temporary cache directory.
+"""
+#------------------------------------------------------------------------------
+
+import os
+import sys
+
+import pytest
+
+top = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+for d in ('common', 'wheel', 'gears', 'cams', 'trochoid'):
+  sys.path.append(os.path.join(top, d))
+
+import cache
+
+#------------------------------------------------------------------------------
+
+@pytest.fixture(autouse=True, scope='session')
+def cache_directory(tmp_path_factory):
+  """use a private cache directory for the session"""
+  saved = cache.directory
+  cache.directory = str(tmp_path_factory.mktemp('cache'))
+  yield cache.directory
+  cache.directory = saved
+
+#------------------------------------------------------------------------------
@@ -0,0 +1,57 @@
+#------------------------------------------------------------------------------
+"""
+Adaptive curve sampling tests
+"""
+#------------------------------------------------------------------------------
+
+import math
+
+import numpy as np
+import pytest
+
+import adaptive
+
+#------------------------------------------------------------------------------
+
+def arc(r):
+  def f(t):
+    return np.stack((r * np.cos(t), r * np.sin(t)), axis=-1)
+  return f
+
+def max_error(f, t, xy, k=16):
+  """return the largest distance of the curve from the chords, sampled k times per interval"""
+  u = (np.arange(1, k) / float(k))[None, :]
+  tm = t[:-1, None] + (t[1:] - t[:-1])[:, None] * u
+  pm = f(tm.ravel()).reshape(len(t) - 1, k - 1, 2)
+  return adaptive.chord_error(xy[:-1, None], xy[1:, None], pm).max()
+
+#------------------------------------------------------------------------------
+
+@pytest.mark.parametrize('epsilon', [1e-2, 1e-4, 1e-6])
+def test_circle_arc(epsilon):
+  f = arc(10.0)
+  (t, xy) = adaptive.sample(f, 0.0, 1.5 * math.pi, epsilon)
+  assert t[0] == 0.0 and t[-1] == 1.5 * math.pi
+  assert (np.diff(t) > 0.0).all()
+  assert np.allclose(xy, f(t))
+  # the sagitta of each chord is r (1 - cos(dt / 2))
+  assert (10.0 * (1.0 - np.cos(0.5 * np.diff(t))) <= epsilon).all()
+  assert max_error(f, t, xy) <= epsilon
+  # and the sampling isn't much finer than it needs to be
+  n = int(math.ceil(1.5 * math.pi / (2.0 * math.acos(1.0 - epsilon / 10.0))))
+  assert len(t) - 1 <= 2 * n
+
+def test_depth_limit(monkeypatch):
+  monkeypatch.setattr(adaptive, 'max_depth', 3)
+  with pytest.raises(ValueError):
+    adaptive.sample(arc(10.0), 0.0, math.pi, 1e-6)
+  # a tolerance met at the limit is fine
+  (t, xy) = adaptive.sample(arc(10.0), 0.0, math.pi, 1.0)
+  assert max_error(arc(10.0), t, xy) <= 1.0
+
+@pytest.mark.parametrize('epsilon', [0.0, -1.0, float('nan')])
+def test_epsilon(epsilon):
+  with pytest.raises(ValueError):
+    adaptive.sample(arc(1.0), 0.0, math.pi, epsilon)
+
+#------------------------------------------------------------------------------
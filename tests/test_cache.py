@@ -0,0 +1,141 @@
+#------------------------------------------------------------------------------
+"""
+Output cache tests
+"""
+#------------------------------------------------------------------------------
+
+import os
+
+import numpy as np
+import pytest
+
+import cache
+
+#------------------------------------------------------------------------------
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+  """a private, empty cache directory"""
+  d = str(tmp_path / 'cache')
+  monkeypatch.setattr(cache, 'directory', d)
+  monkeypatch.setattr(cache, '_sizes', {})
+  monkeypatch.setattr(cache, '_memory', cache.collections.OrderedDict())
+  return d
+
+class generator(object):
+  """write text to a file, counting the calls"""
+
+  def __init__(self, text):
+    self.text = text
+    self.calls = 0
+
+  def __call__(self, fname):
+    self.calls += 1
+    f = open(fname, 'w')
+    f.write(self.text)
+    f.close()
+
+def entries(d):
+  return sorted(x for x in os.listdir(d) if not x.startswith('.'))
+
+#------------------------------------------------------------------------------
+
+def test_hit_and_miss(cache_dir, tmp_path):
+  fname = str(tmp_path / 'out.txt')
+  g = generator('hello\n')
+  k = cache.key('out.txt', {'a': 1}, 'v1')
+  assert cache.output(fname, k, g) is False
+  assert g.calls == 1 and open(fname).read() == 'hello\n'
+  # a hit installs the cached bytes without generating
+  os.remove(fname)
+  assert cache.output(fname, k, g) is True
+  assert g.calls == 1 and open(fname).read() == 'hello\n'
+  # an unchanged output is not rewritten
+  os.utime(fname, (1000, 1000))
+  assert cache.output(fname, k, g) is True
+  assert os.stat(fname).st_mtime == 1000
+  assert entries(cache_dir) == [k]
+
+def test_invalidation(cache_dir, tmp_path):
+  src = tmp_path / 'src'
+  src.mkdir()
+  (src / 'gen.py').write_text(u'x = 1\n')
+  v1 = cache.source_version(str(src))
+  k = cache.key('out.txt', {'a': 1}, v1)
+  # a parameter change is a new key
+  assert cache.key('out.txt', {'a': 2}, v1) != k
+  assert cache.key('out.txt', {'a': 1.0000001}, v1) != k
+  assert cache.key('other.txt', {'a': 1}, v1) != k
+  assert cache.key('out.txt', {'a': 1}, v1) == k
+  # so is a source change (the versions are memoised per process)
+  (src / 'gen.py').write_text(u'x = 2\n')
+  cache._versions.clear()
+  v2 = cache.source_version(str(src))
+  assert v2 != v1
+  fname = str(tmp_path / 'out.txt')
+  g1 = generator('one\n')
+  g2 = generator('two\n')
+  cache.output(fname, k, g1)
+  assert cache.output(fname, cache.key('out.txt', {'a': 1}, v2), g2) is False
+  assert g2.calls == 1 and open(fname).read() == 'two\n'
+
+def test_lru_eviction(cache_dir, tmp_path, monkeypatch):
+  monkeypatch.setattr(cache, 'size_cap', 3000)
+  fname = str(tmp_path / 'out.txt')
+  keys = [cache.key('out.txt', i, 'v') for i in range(3)]
+  for (i, k) in enumerate(keys):
+    cache.output(fname, k, generator('%d' % i * 1000))
+    os.utime(os.path.join(cache_dir, k), (100 + i, 100 + i))
+  assert entries(cache_dir) == sorted(keys)
+  # use the oldest entry: the second one is now the least recently used
+  cache.output(fname, keys[0], generator(''))
+  k = cache.key('out.txt', 3, 'v')
+  cache.output(fname, k, generator('3' * 1000))
+  # over the cap: the oldest go first, down to the low water mark
+  assert entries(cache_dir) == sorted([keys[0], k])
+  total = sum(os.path.getsize(os.path.join(cache_dir, x)) for x in entries(cache_dir))
+  assert total <= cache.low_water * cache.size_cap
+  assert cache._sizes[cache_dir] == total
+
+def test_miss_doesnt_scan(cache_dir, tmp_path, monkeypatch):
+  fname = str(tmp_path / 'out.txt')
+  cache.output(fname, cache.key('out.txt', 0, 'v'), generator('x'))
+  scans = []
+  listdir = os.listdir
+  def counted(d):
+    scans.append(d)
+    return listdir(d)
+  monkeypatch.setattr(os, 'listdir', counted)
+  for i in range(1, 20):
+    cache.output(fname, cache.key('out.txt', i, 'v'), generator('x'))
+  assert scans == []
+  # the running total matches the directory
+  monkeypatch.setattr(os, 'listdir', listdir)
+  assert cache._sizes[cache_dir] == sum(os.path.getsize(os.path.join(cache_dir, x)) for x in entries(cache_dir))
+
+def test_disabled(cache_dir, tmp_path, monkeypatch):
+  monkeypatch.setattr(cache, 'directory', None)
+  fname = str(tmp_path / 'out.txt')
+  g = generator('x')
+  k = cache.key('out.txt', 0, 'v')
+  assert cache.output(fname, k, g) is False
+  assert cache.output(fname, k, g) is False
+  assert g.calls == 2
+  assert not os.path.exists(cache_dir)
+
+def test_array(cache_dir):
+  calls = []
+  def generate():
+    calls.append(1)
+    return np.arange(6.0).reshape(3, 2)
+  k = cache.key('array', 0, 'v')
+  a = cache.array(k, generate)
+  assert not a.flags.writeable
+  assert cache.array(k, generate) is a
+  # from disk once it is out of memory
+  cache._memory.clear()
+  b = cache.array(k, generate)
+  assert np.array_equal(a, b) and len(calls) == 1
+  assert entries(cache_dir) == [k + '.npy']
+
+#------------------------------------------------------------------------------
@@ -0,0 +1,78 @@
+#------------------------------------------------------------------------------
+"""
+Cam geometry tests
+
+The batched intersections are checked against the scalar circle2circle
+and line2circle.
+"""
+#------------------------------------------------------------------------------
+
+import numpy as np
+
+import cams
+
+#------------------------------------------------------------------------------
+
+def random_circles(rng, n):
+  c = rng.uniform(-2.0, 2.0, (n, 2))
+  # some pairs on a shared y, the scalar special case
+  c[:n // 8, 1] = 0.5
+  return (c, rng.uniform(0.1, 3.0, n))
+
+def test_circles2circles():
+  rng = np.random.RandomState(2)
+  (c1, r1) = random_circles(rng, 2000)
+  (c2, r2) = random_circles(rng, 2000)
+  (xy, n) = cams.circles2circles(c1, r1, c2, r2)
+  checked = 0
+  for i in range(len(c1)):
+    # skip near tangent pairs: the two solvers measure the tolerance differently
+    d = np.hypot(*(c2[i] - c1[i]))
+    if min(abs(d - (r1[i] + r2[i])), abs(d - abs(r1[i] - r2[i]))) < 1e-2:
+      continue
+    want = cams.circle2circle(cams.circle(tuple(c1[i]), r1[i]), cams.circle(tuple(c2[i]), r2[i]))
+    assert n[i] == len(want)
+    if n[i] == 2:
+      got = sorted(map(tuple, xy[i].tolist()))
+      assert np.allclose(got, sorted(want), atol=1e-9)
+      checked += 1
+  assert checked > 500
+
+def test_circles2circles_special():
+  (xy, n) = cams.circles2circles([(0, 0), (0, 0), (1, 1)], [1.0, 1.0, 2.0], [(0, 0), (0, 0), (1, 1)], [1.0, 2.0, 2.0])
+  assert n.tolist() == [-1, 0, -1]
+  assert cams.circle2circle(cams.circle((0, 0), 1.0), cams.circle((0, 0), 1.0)) is None
+  assert cams.circle2circle(cams.circle((0, 0), 1.0), cams.circle((0, 0), 2.0)) == ()
+
+def test_lines2circles():
+  rng = np.random.RandomState(3)
+  p = rng.uniform(-2.0, 2.0, (2000, 2))
+  v = rng.uniform(-1.0, 1.0, (2000, 2))
+  (c, r) = random_circles(rng, 2000)
+  (t, n) = cams.lines2circles(p, v, c, r)
+  for i in range(len(p)):
+    want = cams.line2circle(cams.line(tuple(p[i]), tuple(v[i])), cams.circle(tuple(c[i]), r[i]))
+    assert n[i] == len(want)
+    if n[i] == 2:
+      assert np.allclose(t[i], want, rtol=1e-12, atol=1e-12)
+    elif n[i] == 1:
+      assert np.allclose(t[i], want[0], rtol=1e-12, atol=1e-12)
+
+def test_lines2circles_zero_direction():
+  # no division by zero: any numpy warning is an error here
+  with np.errstate(all='raise'):
+    (t, n) = cams.lines2circles([(0, 0), (0, 0), (3, 0)], [(0, 0), (1, 0), (0, 0)], (0, 0), 1.0)
+  assert n.tolist() == [0, 2, 0]
+  assert np.isfinite(t).all()
+  assert np.allclose(t[1], [-1.0, 1.0])
+
+def test_lines2circle():
+  rng = np.random.RandomState(4)
+  p = rng.uniform(-2.0, 2.0, (100, 2))
+  v = rng.uniform(-1.0, 1.0, (100, 2))
+  c = cams.circle((0.25, -0.5), 1.5)
+  (t1, n1) = cams.lines2circle(p, v, c)
+  (t2, n2) = cams.lines2circles(p, v, np.tile(c.c, (100, 1)), np.full(100, c.r))
+  assert (n1 == n2).all() and np.array_equal(t1, t2)
+
+#------------------------------------------------------------------------------
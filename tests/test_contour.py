@@ -0,0 +1,35 @@
+#------------------------------------------------------------------------------
+"""
+Line/arc contour tests
+"""
+#------------------------------------------------------------------------------
+
+import math
+
+import numpy as np
+import pytest
+
+import contour
+
+#------------------------------------------------------------------------------
+
+def test_chord_facets():
+  r = np.array([0.5, 1.0, 10.0, 100.0])
+  n = contour.chord_facets(r, math.pi, 0.01)
+  # the chord error of n facets over the angle is within epsilon
+  sagitta = r * (1.0 - np.cos(math.pi / (2.0 * n)))
+  assert (sagitta <= 0.01 + 1e-12).all()
+  assert (n[1:] >= n[:-1]).all()
+  # a radius under the tolerance is one facet
+  assert contour.chord_facets(0.001, math.pi, 0.01) == 1
+
+@pytest.mark.parametrize('epsilon', [0.0, -0.01, float('nan')])
+def test_chord_facets_epsilon(epsilon):
+  with pytest.raises(ValueError):
+    contour.chord_facets(1.0, math.pi, epsilon)
+  c = contour.contour()
+  c.arc((0.0, 0.0), 1.0, 0.0, math.pi)
+  with pytest.raises(ValueError):
+    c.points(epsilon)
+
+#------------------------------------------------------------------------------
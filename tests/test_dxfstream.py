@@ -0,0 +1,181 @@
+#------------------------------------------------------------------------------
+"""
+Streaming DXF output tests
+
+The files are checked against the R12 structure here and, where ezdxf is
+installed, read back with its recover loader and audited: neither may
+report a repair.
+"""
+#------------------------------------------------------------------------------
+
+import logging
+
+import numpy as np
+import pytest
+
+import dxfstream as dxf
+import gears
+
+#------------------------------------------------------------------------------
+
+def groups(fname):
+  """return the (code, value) pairs of a dxf file"""
+  lines = open(fname).read().split('\n')
+  assert lines[-1] == ''
+  lines = lines[:-1]
+  assert len(lines) % 2 == 0
+  return [(int(lines[i]), lines[i + 1]) for i in range(0, len(lines), 2)]
+
+def entities(g):
+  """split group pairs into entities: [(type, {code: [values]})]"""
+  out = []
+  for (code, value) in g:
+    if code == 0:
+      out.append((value, {}))
+    else:
+      out[-1][1].setdefault(code, []).append(value)
+  return out
+
+def check_r12(fname):
+  """check the structure of an R12 file, return its entities by section"""
+  g = groups(fname)
+  assert g[:4] == [(0, 'SECTION'), (2, 'HEADER'), (9, '$ACADVER'), (1, 'AC1009')]
+  assert g[-1] == (0, 'EOF')
+  # R12 has no subclass markers or owner handles
+  assert not [c for (c, v) in g if c in (100, 330, 360)]
+  sections = {}
+  e = entities(g[:-1])
+  i = 0
+  while i < len(e):
+    assert e[i][0] == 'SECTION'
+    name = e[i][1][2][0]
+    j = i + 1
+    while e[j][0] != 'ENDSEC':
+      j += 1
+    sections[name] = e[i + 1:j]
+    i = j + 1
+  tables = {}
+  for (kind, codes) in sections.get('TABLES', []):
+    if kind == 'TABLE':
+      table = codes[2][0]
+      tables[table] = []
+    elif kind != 'ENDTAB':
+      assert kind == table
+      tables[table].append(codes[2][0])
+  layers = set(tables['LAYER'])
+  for (kind, codes) in sections['TABLES']:
+    if kind == 'LAYER':
+      assert codes[6][0] in tables['LTYPE']
+  blocks = [c[2][0] for (k, c) in sections.get('BLOCKS', []) if k == 'BLOCK']
+  assert len(blocks) == len(set(blocks))
+  body = sections['ENTITIES'] + sections.get('BLOCKS', [])
+  for (kind, codes) in body:
+    if kind not in ('BLOCK', 'ENDBLK'):
+      assert codes[8][0] in layers
+  # polylines: POLYLINE (vertices follow), VERTEX..., SEQEND
+  kinds = [k for (k, c) in body]
+  for (i, k) in enumerate(kinds):
+    if k == 'POLYLINE':
+      assert body[i][1][66] == ['1']
+      j = i + 1
+      while kinds[j] == 'VERTEX':
+        j += 1
+      assert j > i + 1 and kinds[j] == 'SEQEND'
+    elif k in ('VERTEX', 'SEQEND'):
+      assert kinds[i - 1] in ('POLYLINE', 'VERTEX')
+    elif k == 'INSERT':
+      assert body[i][1][2][0] in blocks
+  assert 'LWPOLYLINE' not in kinds
+  return sections
+
+def check_ezdxf(fname):
+  """read a file with ezdxf: no repairs on loading or audit"""
+  pytest.importorskip('ezdxf')
+  from ezdxf import recover
+  log = []
+  class handler(logging.Handler):
+    def emit(self, record):
+      log.append(record.getMessage())
+  h = handler(logging.WARNING)
+  logging.getLogger('ezdxf').addHandler(h)
+  try:
+    (doc, auditor) = recover.readfile(fname)
+  finally:
+    logging.getLogger('ezdxf').removeHandler(h)
+  assert doc.dxfversion == 'AC1009'
+  assert [x.message for x in auditor.fixes] == []
+  assert [x.message for x in auditor.errors] == []
+  assert log == []
+  audit = doc.audit()
+  assert not audit.has_errors and not audit.has_fixes
+  return doc
+
+#------------------------------------------------------------------------------
+
+def test_entities(tmp_path):
+  fname = str(tmp_path / 'entities.dxf')
+  d = dxf.drawing(fname)
+  d.add(dxf.polyline([(0, 0), (1, 0), (1, 1)], flags=dxf.POLYLINE_CLOSED, color=3))
+  d.add(dxf.circles([(0, 0), (2, 2)], 0.1, colors=(1, 2), layer=dxf.MARKER_LAYER))
+  d.add(dxf.circle(1.0))
+  d.add(dxf.arc(1.0, (0, 0), 0.0, 90.0))
+  d.add(dxf.line((0, 0), (3, 3)))
+  d.save()
+  check_r12(fname)
+  doc = check_ezdxf(fname)
+  msp = list(doc.modelspace())
+  assert [e.dxftype() for e in msp] == ['POLYLINE', 'CIRCLE', 'CIRCLE', 'CIRCLE', 'ARC', 'LINE']
+  assert msp[0].is_closed and len(msp[0]) == 3
+  assert msp[2].dxf.layer == dxf.MARKER_LAYER and msp[2].dxf.color == 2
+
+def test_streamed_polyline(tmp_path):
+  fname = str(tmp_path / 'stream.dxf')
+  xy = np.random.RandomState(0).rand(10000, 2)
+  chunks = (xy[i:i + 999] for i in range(0, len(xy), 999))
+  d = dxf.drawing(fname)
+  d.add(dxf.polyline(chunks, flags=dxf.POLYLINE_CLOSED, count=len(xy)))
+  d.save()
+  check_r12(fname)
+  doc = check_ezdxf(fname)
+  p = doc.modelspace()[0]
+  got = np.array([(v.dxf.location.x, v.dxf.location.y) for v in p.vertices])
+  assert np.allclose(got, xy, atol=1e-6)
+
+def test_polyline_count(tmp_path):
+  d = dxf.drawing(str(tmp_path / 'count.dxf'))
+  with pytest.raises(ValueError):
+    d.add(dxf.polyline(iter([np.zeros((3, 2))]), count=4))
+
+def test_blocks(tmp_path):
+  fname = str(tmp_path / 'blocks.dxf')
+  d = dxf.drawing(fname)
+  d.add_block(dxf.block('tooth', [dxf.polyline([(1, 0), (1.2, 0.1)]), dxf.arc(1.0, (0, 0), 0.0, 10.0)]))
+  d.add(dxf.inserts('tooth', [0.0, 120.0, 240.0]))
+  d.save()
+  sections = check_r12(fname)
+  assert [k for (k, c) in sections['BLOCKS']] == ['BLOCK', 'POLYLINE', 'VERTEX', 'VERTEX', 'SEQEND', 'ARC', 'ENDBLK']
+  doc = check_ezdxf(fname)
+  msp = list(doc.modelspace())
+  assert [e.dxf.rotation for e in msp] == [0.0, 120.0, 240.0]
+  assert [e.dxftype() for e in doc.blocks.get('tooth')] == ['POLYLINE', 'ARC']
+
+def test_block_names(tmp_path):
+  d = dxf.drawing(str(tmp_path / 'names.dxf'))
+  d.add_block(dxf.block('tooth'))
+  with pytest.raises(ValueError):
+    d.add_block(dxf.block('tooth'))
+  with pytest.raises(ValueError):
+    d.add(dxf.insert('spoke'))
+  with pytest.raises(ValueError):
+    d.add_block(dxf.block('spoke'))
+
+def test_instanced_gear(tmp_path):
+  fname = str(tmp_path / 'gear.dxf')
+  d = dxf.drawing(fname)
+  gears.involute_gear(32, 169.4, 8).draw_instanced(d)
+  d.save()
+  check_r12(fname)
+  doc = check_ezdxf(fname)
+  assert len(doc.modelspace().query('INSERT')) == 32
+
+#------------------------------------------------------------------------------
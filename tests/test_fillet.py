@@ -0,0 +1,95 @@
+#------------------------------------------------------------------------------
+"""
+Polygon fillet tests
+
+The batched fillet engine is checked against the original iterative
+polygon.smooth(): each vertex filleted in turn, in place.
+"""
+#------------------------------------------------------------------------------
+
+import math
+
+import numpy as np
+import pytest
+
+import main
+from polygon import point, polygon
+
+#------------------------------------------------------------------------------
+# the original smoothing, one vertex at a time
+
+def _normalise(a):
+  l = math.sqrt(a[0] * a[0] + a[1] * a[1])
+  return (a[0] / l, a[1] / l)
+
+def _smooth_point(points, i, closed):
+  p = points[i]
+  if p.radius == 0.0:
+    return False
+  n = len(points)
+  pn = points[i + 1] if i < n - 1 else (None, points[0])[closed]
+  pp = points[i - 1] if i > 0 else (None, points[-1])[closed]
+  if pp is None or pn is None:
+    return False
+  v0 = _normalise((pp.p[0] - p.p[0], pp.p[1] - p.p[1]))
+  v1 = _normalise((pn.p[0] - p.p[0], pn.p[1] - p.p[1]))
+  theta = math.acos(v0[0] * v1[0] + v0[1] * v1[1])
+  d1 = p.radius / math.tan(theta / 2.0)
+  if d1 > math.hypot(pp.p[0] - p.p[0], pp.p[1] - p.p[1]) or d1 > math.hypot(pn.p[0] - p.p[0], pn.p[1] - p.p[1]):
+    return False
+  p0 = (p.p[0] + d1 * v0[0], p.p[1] + d1 * v0[1])
+  d2 = p.radius / math.sin(theta / 2.0)
+  vc = _normalise((v0[0] + v1[0], v0[1] + v1[1]))
+  c = (p.p[0] + d2 * vc[0], p.p[1] + d2 * vc[1])
+  x = (v1[0] * v0[1]) - (v1[1] * v0[0])
+  dtheta = ((x > 0) - (x < 0)) * (math.pi - theta) / p.facets
+  (cs, sn) = (math.cos(dtheta), math.sin(dtheta))
+  rv = (p0[0] - c[0], p0[1] - c[1])
+  del points[i]
+  for j in range(p.facets + 1):
+    points.insert(i + j, point((c[0] + rv[0], c[1] + rv[1])))
+    rv = (cs * rv[0] - sn * rv[1], sn * rv[0] + cs * rv[1])
+  return True
+
+def reference_smooth(points, closed):
+  """return the points smoothed by the original algorithm"""
+  points = list(points)
+  done = False
+  while not done:
+    done = True
+    for i in range(len(points)):
+      if _smooth_point(points, i, closed):
+        done = False
+  return points
+
+def check(points, closed):
+  want = reference_smooth(points, closed)
+  p = polygon(list(points), closed)
+  p.smooth()
+  assert len(p.points) == len(want)
+  assert np.allclose([q.p for q in p.points], [q.p for q in want], rtol=0.0, atol=1e-9)
+
+#------------------------------------------------------------------------------
+
+@pytest.mark.parametrize('profile', [main.wheel_profile, main.web_profile, main.core_profile])
+@pytest.mark.parametrize('core_print', [False, True])
+def test_wheel_profiles(profile, core_print):
+  p = profile(main.params(core_print=core_print), smooth=False)
+  check(p.points, p.closed)
+
+@pytest.mark.parametrize('closed', [False, True])
+def test_random_polygons(closed):
+  rng = np.random.RandomState(1)
+  for trial in range(50):
+    n = rng.randint(3, 12)
+    # a star shaped polygon, so neighbouring edges never fold back
+    a = np.sort(rng.uniform(0.0, 2.0 * math.pi, n))
+    r = rng.uniform(1.0, 5.0, n)
+    xy = np.stack((r * np.cos(a), r * np.sin(a)), axis=1)
+    # some radii too large to fit, some fixed points
+    radius = rng.choice([0.0, 0.1, 0.5, 2.0, 10.0], n)
+    facets = rng.randint(1, 8, n)
+    points = [point(tuple(p), int(f), float(k)) for (p, f, k) in zip(xy.tolist(), facets, radius)]
+    check(points, closed)
+
+#------------------------------------------------------------------------------
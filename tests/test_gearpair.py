@@ -0,0 +1,29 @@
+#------------------------------------------------------------------------------
+"""
+Gear pair analysis tests
+"""
+#------------------------------------------------------------------------------
+
+import numpy as np
+
+import vec2
+import gears
+import gearpair
+
+#------------------------------------------------------------------------------
+
+def test_backlash():
+  for b in (0.0, 0.1, 0.2):
+    g1 = gears.involute_gear(20, 20.0, 20.0, backlash=b)
+    g2 = gears.involute_gear(30, 30.0, 20.0, backlash=b)
+    assert abs(gearpair.gear_pair(g1, g2).backlash() - 2.0 * b) < 1e-9
+
+def test_half_angle_matches_template():
+  # the flank of the template tooth is at the analysis half angle
+  g = gears.involute_gear(24, 24.0, 20.0, backlash=0.15)
+  g.involute()
+  xy = g.seg_upper
+  psi = gearpair.half_angle(g, vec2.length(xy))
+  assert np.abs(vec2.angle(xy) - psi).max() < 1e-9
+
+#------------------------------------------------------------------------------
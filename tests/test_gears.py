@@ -0,0 +1,128 @@
+#------------------------------------------------------------------------------
+"""
+Gear outline tests
+"""
+#------------------------------------------------------------------------------
+
+import os
+
+import numpy as np
+import pytest
+
+import vec2
+import scad
+import cache
+import gears
+import stream
+
+#------------------------------------------------------------------------------
+
+def crossings(xy):
+  """return the number of crossing pairs of non adjacent segments in a polyline"""
+  a = xy[:-1]
+  b = xy[1:]
+  (i, j) = np.triu_indices(len(a), 2)
+  (p, r, q, s) = (a[i], b[i] - a[i], a[j], b[j] - a[j])
+  d = vec2.cross(r, s)
+  with np.errstate(divide='ignore', invalid='ignore'):
+    t = vec2.cross(q - p, s) / d
+    u = vec2.cross(q - p, r) / d
+  eps = 1e-9
+  return int(((d != 0.0) & (t > eps) & (t < 1.0 - eps) & (u > eps) & (u < 1.0 - eps)).sum())
+
+def window(g, teeth=3):
+  """return the outline of the first few teeth"""
+  tooth = g.outline_tooth()
+  return vec2.rotate_copies(tooth, g.ap * np.arange(teeth)).reshape(-1, 2)
+
+@pytest.fixture
+def template_cache(tmp_path, monkeypatch):
+  """a private, empty template cache, counting the template computations"""
+  monkeypatch.setattr(cache, 'directory', str(tmp_path / 'cache'))
+  monkeypatch.setattr(cache, '_memory', cache.collections.OrderedDict())
+  monkeypatch.setattr(cache, '_sizes', {})
+  monkeypatch.setattr(gears, '_TEMPLATE_CACHE', True)
+  calls = []
+  template = gears.involute_gear.involute_template
+  def counted(self):
+    calls.append(self)
+    return template(self)
+  monkeypatch.setattr(gears.involute_gear, 'involute_template', counted)
+  return calls
+
+#------------------------------------------------------------------------------
+
+@pytest.mark.parametrize('n', [8, 16, 41, 42, 60, 105, 106, 200, 1000])
+def test_outline_valid(n):
+  g = gears.involute_gear(n, n * 1.0, 20.0)
+  xy = window(g)
+  r = vec2.length(xy)
+  # nothing cuts below the root circle or beyond the tip
+  assert r.min() >= g.dr - 1e-9
+  assert r.max() <= g.ar + 1e-9
+  assert crossings(xy) == 0
+
+def test_outline_flank_start():
+  # small gears: the flank starts at the base circle
+  g = gears.involute_gear(16, 16.0, 20.0)
+  g.involute()
+  assert abs(vec2.length(g.seg_lower[0]) - g.br) < 1e-9
+  # large gears: the base circle is below the root, the flank starts at the root
+  g = gears.involute_gear(200, 200.0, 20.0)
+  g.involute()
+  assert abs(vec2.length(g.seg_lower[0]) - g.dr) < 1e-9
+
+@pytest.mark.parametrize('n', [30, 200])
+def test_ring_clearance(n):
+  m = 2.0
+  ring = stream.ring(n, m, 20.0, 0.0, 2.0 * m)
+  r = vec2.length(ring.g.outline())
+  pr = n * m / 2.0
+  # ring teeth reach in to an addendum, spaces reach out to a dedendum
+  assert abs(r.min() - (pr - m)) < 1e-9
+  assert abs(r.max() - (pr + 1.25 * m)) < 1e-9
+  assert crossings(window(ring.g)) == 0
+
+@pytest.mark.parametrize('epsilon', [None, 1e-4])
+def test_template_cache(template_cache, epsilon):
+  g = gears.involute_gear(16, 16.0, 20.0, epsilon)
+  g.involute()
+  assert len(template_cache) == 1
+  fresh = g.involute_template()
+  assert np.array_equal(g.seg_lower, fresh)
+  # a hit from memory, then from disk
+  for memory in (True, False):
+    if not memory:
+      cache._memory.clear()
+    g = gears.involute_gear(16, 16.0, 20.0, epsilon)
+    g.involute()
+    assert np.array_equal(g.seg_lower, fresh)
+  # the only other computation is the fresh one
+  assert len(template_cache) == 2
+
+def test_template_cache_miss(template_cache, monkeypatch):
+  gears.involute_gear(16, 16.0, 20.0).involute()
+  gears.involute_gear(16, 16.0, 20.0).involute()
+  assert len(template_cache) == 1
+  changed = [
+    gears.involute_gear(16, 16.0, 14.5),
+    gears.involute_gear(16, 16.0, 20.0, clearance=0.1),
+  ]
+  for g in changed:
+    g.involute()
+  assert len(template_cache) == 3
+  monkeypatch.setattr(gears, '_INVOLUTE_STEPS', 2 * gears._INVOLUTE_STEPS)
+  g = gears.involute_gear(16, 16.0, 20.0)
+  g.involute()
+  assert len(template_cache) == 4
+  assert len(g.seg_lower) == gears._INVOLUTE_STEPS + 1
+
+def test_bjj_outlines_current():
+  # the committed bjj_outlines.scad is generated from bjj_outlines.json
+  d = os.path.dirname(os.path.abspath(gears.__file__))
+  f = scad.StringIO()
+  gears.write_outlines(f, gears.load_outlines(os.path.join(d, 'bjj_outlines.json')))
+  committed = open(os.path.join(d, 'bjj_outlines.scad')).read()
+  assert committed.split('\n', 1)[1] == f.getvalue()
+
+#------------------------------------------------------------------------------
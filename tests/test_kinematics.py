@@ -0,0 +1,59 @@
+#------------------------------------------------------------------------------
+"""
+Cam follower kinematics tests
+"""
+#------------------------------------------------------------------------------
+
+import math
+
+import numpy as np
+import pytest
+
+import cams
+import kinematics
+
+#------------------------------------------------------------------------------
+
+CAMS = (cams.cam_type0(0.25, 1.0), cams.cam_type1(1.0, 1.0, 0.5, 5.0))
+
+# numeric derivative step (radians)
+_H = 1e-5
+
+def central(m, k):
+  """return the central differences of the motion columns at the middle third of the angles"""
+  x = m.columns()[:, 1:].reshape(3, k, 4)
+  return ((x[2] - x[0]) / (2.0 * _H), x[1])
+
+#------------------------------------------------------------------------------
+
+@pytest.mark.parametrize('cam', CAMS)
+@pytest.mark.parametrize('follower', kinematics.FOLLOWERS)
+def test_numeric_derivatives(cam, follower):
+  # random angles are (almost surely) not within _H of an arc joint
+  theta = np.random.RandomState(5).uniform(0.0, 2.0 * math.pi, 500)
+  m = kinematics.follow(cam, follower, 0.25, theta=np.concatenate((theta - _H, theta, theta + _H)))
+  (numeric, exact) = central(m, len(theta))
+  # velocity, acceleration and jerk against the differences of the column before
+  for i in range(1, 4):
+    assert np.allclose(numeric[:, i - 1], exact[:, i], rtol=1e-5, atol=1e-5)
+
+@pytest.mark.parametrize('cam', CAMS)
+def test_rpm(cam):
+  m0 = kinematics.follow(cam, 'knife', steps=360)
+  m1 = kinematics.follow(cam, 'knife', steps=360, rpm=30.0)
+  w = math.pi
+  assert np.array_equal(m0.lift, m1.lift)
+  assert np.allclose(m1.velocity, m0.velocity * w)
+  assert np.allclose(m1.acceleration, m0.acceleration * w * w)
+  assert np.allclose(m1.jerk, m0.jerk * w * w * w)
+
+@pytest.mark.parametrize('cam', CAMS)
+def test_flat_lift(cam):
+  # the flat face sits on the support function of the profile
+  m = kinematics.follow(cam, 'flat', steps=720)
+  xy = cam.contour().points(1e-6)
+  phi = (0.5 * math.pi) - m.theta
+  s = (xy[None, :, 0] * np.cos(phi)[:, None] + xy[None, :, 1] * np.sin(phi)[:, None]).max(axis=1)
+  assert np.allclose(m.lift, s - s.min(), atol=1e-5)
+
+#------------------------------------------------------------------------------
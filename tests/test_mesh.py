@@ -0,0 +1,83 @@
+#------------------------------------------------------------------------------
+"""
+Triangle mesh tests
+"""
+#------------------------------------------------------------------------------
+
+import io
+import math
+import struct
+
+import numpy as np
+import pytest
+
+import mesh
+import main
+
+#------------------------------------------------------------------------------
+
+def moment(xy):
+  """return the first moment of area about the y-axis (area x centroid x) of a 2d polygon"""
+  (x, y) = (xy[:, 0], xy[:, 1])
+  (x1, y1) = (np.roll(x, -1), np.roll(y, -1))
+  return abs(np.sum((x + x1) * ((x * y1) - (x1 * y))) / 6.0)
+
+def expected_volume(xy, facets, angle=None):
+  """
+  the exact volume of a faceted revolve: the section at each height is a
+  regular polygon, so it is the solid of revolution scaled per segment
+  """
+  if angle is None:
+    (n, step) = (facets, 2.0 * math.pi / facets)
+  else:
+    n = max(1, int(math.ceil(facets * angle / (2.0 * math.pi))))
+    step = angle / n
+  return n * math.sin(step) * moment(xy)
+
+PROFILES = {
+  # a tube: nothing on the axis
+  'tube': np.array([(2.0, 0.0), (3.0, 0.0), (3.0, 5.0), (2.0, 5.0)]),
+  # a cone: the apex and the base centre are on the axis
+  'cone': np.array([(0.0, 0.0), (4.0, 0.0), (0.0, 3.0)]),
+  # clockwise, with a concave notch
+  'notch': np.array([(0.0, 0.0), (0.0, 4.0), (3.0, 4.0), (1.5, 2.0), (3.0, 0.0)]),
+}
+
+#------------------------------------------------------------------------------
+
+@pytest.mark.parametrize('name', sorted(PROFILES))
+@pytest.mark.parametrize('angle', [None, math.pi / 3.0, 1.5 * math.pi])
+def test_revolve(name, angle):
+  xy = PROFILES[name]
+  (v, t) = mesh.revolve(xy, 24, angle)
+  assert mesh.is_watertight(t)
+  assert np.isclose(mesh.volume(v, t), expected_volume(xy, 24, angle), rtol=1e-12)
+  # no unused or degenerate vertices
+  assert len(np.unique(t)) == len(v)
+  area = np.sqrt(np.sum(np.cross(v[t[:, 1]] - v[t[:, 0]], v[t[:, 2]] - v[t[:, 0]]) ** 2, axis=1))
+  assert (area > 0.0).all()
+
+@pytest.mark.parametrize('pie_print', [False, True])
+def test_wheel(pie_print):
+  w = main.params(pie_print=pie_print)
+  xy = np.array([p.p for p in main.wheel_profile(w).points])
+  angle = (2.0 * math.pi) / w.number_of_webs if pie_print else None
+  (v, t) = mesh.revolve(xy, 128, angle)
+  assert mesh.is_watertight(t)
+  assert np.isclose(mesh.volume(v, t), expected_volume(xy, 128, angle), rtol=1e-9)
+
+def test_axis():
+  with pytest.raises(ValueError):
+    mesh.revolve([(-1.0, 0.0), (1.0, 0.0), (1.0, 1.0)], 12)
+
+def test_write_stl():
+  (v, t) = mesh.revolve(PROFILES['cone'], 12)
+  f = io.BytesIO()
+  mesh.write_stl(f, v, t)
+  b = f.getvalue()
+  assert len(b) == 84 + 50 * len(t)
+  assert struct.unpack('<I', b[80:84])[0] == len(t)
+  tri = np.frombuffer(b[84:], dtype=mesh._stl_dtype)
+  assert np.allclose(tri['v'], v[t], atol=1e-5)
+
+#------------------------------------------------------------------------------
@@ -0,0 +1,34 @@
+#------------------------------------------------------------------------------
+"""
+Cam geometry optimizer tests
+"""
+#------------------------------------------------------------------------------
+
+import numpy as np
+import pytest
+
+import optimize
+
+#------------------------------------------------------------------------------
+
+def test_recovers_example_cam():
+  t = optimize.example_target()
+  r = optimize.optimize(t, batch=256, workers=1, fixed={'base': 1.0})
+  assert np.allclose(r.params, (1.0, 1.0, 0.5, 5.0), atol=1e-3)
+  assert r.rms < 1e-5
+
+def test_flat_offset_family():
+  # a flat follower can't tell a parallel offset of the profile
+  t = optimize.example_target()
+  r = optimize.optimize(t, batch=256, workers=1)
+  (ofs, base, nose, flank) = r.params
+  assert abs(ofs - 1.0) < 1e-4
+  assert abs((base - nose) - 0.5) < 1e-4
+  assert abs((flank - base) - 4.0) < 1e-4
+  assert r.rms < 1e-6
+
+def test_fixed_name():
+  with pytest.raises(ValueError):
+    optimize.optimize(optimize.example_target(), fixed={'radius': 1.0}, workers=1)
+
+#------------------------------------------------------------------------------
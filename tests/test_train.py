@@ -0,0 +1,56 @@
+#------------------------------------------------------------------------------
+"""
+Compound gear train search tests
+"""
+#------------------------------------------------------------------------------
+
+import itertools
+
+import train
+
+#------------------------------------------------------------------------------
+
+def brute_force(ratio, tol, stages, nmin, nmax, limit):
+  """return the sorted tooth counts of the best trains by exhaustive search"""
+  nmin = max(nmin, train.min_teeth(1.0, 20.0))
+  pairs = train.stage_pairs(nmin, nmax, 1.0, None)
+  teeth = []
+  for s in range(1, stages + 1):
+    for chosen in itertools.combinations_with_replacement(pairs, s):
+      r = 1.0
+      for p in chosen:
+        r *= p[0]
+      if ratio / (1.0 + tol) <= r <= ratio * (1.0 + tol):
+        teeth.append(sum(p[1] + p[2] for p in chosen))
+  return sorted(teeth)[:limit]
+
+def teeth(trains):
+  return [t.teeth for t in trains]
+
+#------------------------------------------------------------------------------
+
+def test_matches_brute_force():
+  for (ratio, stages) in ((7.3, 2), (23.0, 3)):
+    got = train.search(ratio, 1e-2, stages, 12, 30, limit=15, workers=1)
+    assert teeth(got) == brute_force(ratio, 1e-2, stages, 12, 30, 15)
+    for t in got:
+      assert abs(t.error) <= 1e-2
+
+def test_repeatable():
+  a = [t.pairs for t in train.search(15.0, 1e-3, 3, 12, 60, limit=20, workers=1)]
+  b = [t.pairs for t in train.search(15.0, 1e-3, 3, 12, 60, limit=20, workers=1)]
+  assert a == b
+
+def test_no_state_between_calls():
+  before = [t.pairs for t in train.search(15.0, stages=2, workers=1, limit=40)]
+  train.search(15.0, stages=3, workers=1, limit=40)
+  after = [t.pairs for t in train.search(15.0, stages=2, workers=1, limit=40)]
+  assert max(len(p) for p in after) <= 2
+  assert after == before
+
+def test_pool_matches_serial():
+  serial = teeth(train.search(31.0, 1e-3, 3, 12, 40, limit=10, workers=1))
+  pooled = teeth(train.search(31.0, 1e-3, 3, 12, 40, limit=10, workers=2))
+  assert serial == pooled
+
+#------------------------------------------------------------------------------
@@ -0,0 +1,65 @@
+#------------------------------------------------------------------------------
+"""
+Trochoid outline tests
+"""
+#------------------------------------------------------------------------------
+
+import numpy as np
+import pytest
+
+import trochoid
+
+#------------------------------------------------------------------------------
+
+# (n, d, s, p, offset): an epitrochoid housing, a hypotrochoid and a loop
+SHAPES = [
+  (1, 3.0, -1.0, 0.14, 0.01),
+  (1, 3.0, 1.0, 0.5, 0.0),
+  (3, 5.0, -1.0, 1.5, 0.0),
+]
+
+def segments(xy):
+  """return the segment lengths of the closed outline, the closing segment last"""
+  return np.hypot(*(np.roll(xy, -1, axis=0) - xy).T)
+
+#------------------------------------------------------------------------------
+
+@pytest.mark.parametrize('shape', SHAPES)
+@pytest.mark.parametrize('epsilon', [1e-2, 1e-4])
+def test_closed(shape, epsilon):
+  (n, d, s, p, offset) = shape
+  t = trochoid.trochoid(n, d, s, p, 10.0, offset)
+  xy = t.points(epsilon=epsilon)
+  # the outline returns to its start over one period
+  assert np.allclose(t.xy(np.array([t.period])), xy[:1], atol=1e-12)
+  # the closing point is not repeated and the closing segment is an ordinary one
+  l = segments(xy)
+  assert l.min() > 0.0
+  assert l[-1] <= l.max()
+
+@pytest.mark.parametrize('shape', SHAPES)
+def test_epsilon(shape):
+  (n, d, s, p, offset) = shape
+  t = trochoid.trochoid(n, d, s, p, 10.0, offset)
+  counts = [len(t.points(epsilon=e)) for e in (1e-5, 1e-4, 1e-3, 1e-2, 1e-1)]
+  assert all(a > b for (a, b) in zip(counts, counts[1:]))
+
+@pytest.mark.parametrize('shape', SHAPES)
+def test_facets(shape):
+  (n, d, s, p, offset) = shape
+  t = trochoid.trochoid(n, d, s, p, 2.0)
+  # the trochoid_polygon() points (in degrees) without the closing point
+  facets = 90
+  w = s * (n / d)
+  k = 1.0 - (1.0 / w)
+  theta = np.radians(np.arange(facets) * ((n * 360.0) / facets))
+  x = ((1.0 - w) * np.cos(theta)) - ((p * w) * np.cos(k * theta))
+  y = ((1.0 - w) * np.sin(theta)) - ((p * w) * np.sin(k * theta))
+  want = 2.0 * np.stack((x, y), axis=-1)
+  assert np.allclose(t.points(facets, None), want, rtol=0.0, atol=1e-12)
+  # facets take precedence over a chord tolerance
+  assert np.array_equal(t.points(facets), t.points(facets, None))
+  with pytest.raises(ValueError):
+    t.points(None, None)
+
+#------------------------------------------------------------------------------
@@ -0,0 +1,57 @@
+#------------------------------------------------------------------------------
+"""
+Pottery wheel build tests
+"""
+#------------------------------------------------------------------------------
+
+import os
+
+import pytest
+
+import cache
+import main
+import polygon
+import polyarray
+
+#------------------------------------------------------------------------------
+
+def test_uncached_build(tmp_path):
+  saved = cache.directory
+  cache.directory = str(tmp_path / 'cache')
+  try:
+    w = main.params(wheel_diameter=250.0)
+    main.build(w, str(tmp_path / 'a'), cached=False)
+    # the cache is untouched and still enabled for later builds
+    assert cache.directory == str(tmp_path / 'cache')
+    assert not os.path.exists(cache.directory)
+    main.build(w, str(tmp_path / 'b'))
+    assert len(os.listdir(cache.directory)) == 2
+  finally:
+    cache.directory = saved
+  for fname in ('wheel.scad', 'core_box.scad'):
+    a = open(str(tmp_path / 'a' / fname)).read()
+    assert a == open(str(tmp_path / 'b' / fname)).read()
+
+def test_fillet_epsilon():
+  w = main.params(fillet_epsilon=0.05)
+  assert len(main.wheel_profile(w)) < len(main.wheel_profile(main.params()))
+
+def test_name():
+  assert main.params().name() == 'default'
+  assert main.params(wheel_diameter=250.0).name() == 'wheel_diameter_250.0'
+  # values that agree to 6 significant digits
+  a = main.params(wheel_diameter=250.0, fillet_epsilon=0.05)
+  b = main.params(wheel_diameter=250.0000001, fillet_epsilon=0.05)
+  assert a.name() != b.name()
+  assert a.name() == 'fillet_epsilon_0.05-wheel_diameter_250.0'
+
+@pytest.mark.parametrize('backend', [polygon, polyarray])
+def test_fillet_report(backend, monkeypatch):
+  # the array backend is a drop-in swap for the main.py polygon names
+  monkeypatch.setattr(main, 'point', backend.point)
+  monkeypatch.setattr(main, 'polygon', backend.polygon)
+  s = main.fillet_report(main.params(), 0.05).split('\n')
+  assert [x.split(':')[0] for x in s] == ['wheel', 'web', 'core']
+  assert s[0] == 'wheel: 35 vertices (fixed facets) 28 vertices (epsilon 0.05) 7 saved'
+
+#------------------------------------------------------------------------------
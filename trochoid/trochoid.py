@@ -0,0 +1,186 @@
+#! /usr/bin/python
+#------------------------------------------------------------------------------
+"""
+Trochoids
+
+Trochoid outlines with the trochoid.scad parametrisation, evaluated with
+numpy and written as a precomputed SCAD polygon module, DXF or SVG.
+
+  w = s * (n / d) = wheel ratio (epi < 0, hypo > 0)
+  p = generating radius
+  trochoid(w, p, theta) = (1 - w) * (cos(theta), sin(theta))
+                          - (p * w) * (cos(k * theta), sin(k * theta)),
+  k = 1 - (1 / w), 0 <= theta <= n * 2pi
+
+The outline is sampled uniformly (facets, the same points as
+trochoid_polygon() without the closing point) or adaptively: intervals are
+split until the chord error is under epsilon, so the points gather where
+the curvature is high (see common/adaptive.py).
+
+A rotary engine housing is the epitrochoid offset outwards by the apex
+seal clearance: the offset follows the curve normal, so it is exact.
+
+See- http://mathinteract.com/, http://scot.tk/re/Trochoids/Trochoids.htm
+
+usage: trochoid.py [-h] [-f FACETS] [-e EPSILON] [-k SCALE] [-o OFFSET]
+                   [--name NAME] n d s p output
+"""
+#------------------------------------------------------------------------------
+
+import argparse
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+import adaptive
+import scad
+import mesh
+import dxfstream as dxf
+import svgstream as svg
+import instrument
+
+#------------------------------------------------------------------------------
+
+# default chord tolerance for adaptive sampling
+_EPSILON = 0.001
+
+# initial grid intervals per cycle of the faster term (adaptive sampling)
+_GRID = 16
+
+#------------------------------------------------------------------------------
+
+def curve(w, p, theta):
+    """return the trochoid points at the angles theta (radians)"""
+    theta = np.asarray(theta, dtype=np.float64)
+    k = 1.0 - (1.0 / w)
+    x = ((1.0 - w) * np.cos(theta)) - ((p * w) * np.cos(k * theta))
+    y = ((1.0 - w) * np.sin(theta)) - ((p * w) * np.sin(k * theta))
+    return np.stack((x, y), axis=-1)
+
+def tangent(w, p, theta):
+    """return the trochoid derivatives (d/dtheta) at the angles theta (radians)"""
+    theta = np.asarray(theta, dtype=np.float64)
+    k = 1.0 - (1.0 / w)
+    dx = -((1.0 - w) * np.sin(theta)) + ((p * w * k) * np.sin(k * theta))
+    dy = ((1.0 - w) * np.cos(theta)) - ((p * w * k) * np.cos(k * theta))
+    return np.stack((dx, dy), axis=-1)
+
+#------------------------------------------------------------------------------
+
+class trochoid:
+    """a trochoid outline: trochoid_polygon(n, d, s, p) scaled and offset"""
+
+    def __init__(self, n, d, s, p, scale=1.0, offset=0.0):
+        """
+        n, d, s, p = the trochoid.scad parameters
+        scale = scale factor
+        offset = distance to offset the outline outwards (after scaling)
+        """
+        self.w = s * (float(n) / d)
+        if self.w == 0.0:
+            raise ValueError('the wheel ratio s * n / d must not be zero')
+        self.n = n
+        self.p = float(p)
+        self.scale = float(scale)
+        self.offset = float(offset)
+        self.period = n * 2.0 * math.pi
+        # +1 for a counter clockwise outline: the outward normal is right of the tangent
+        xy = curve(self.w, self.p, np.linspace(0.0, self.period, 256, endpoint=False))
+        self.sign = 1.0 if mesh.area(xy) >= 0.0 else -1.0
+
+    def xy(self, theta):
+        """return the outline points at the angles theta (radians)"""
+        xy = self.scale * curve(self.w, self.p, theta)
+        if self.offset == 0.0:
+            return xy
+        v = tangent(self.w, self.p, theta)
+        l = np.sqrt(np.sum(v * v, axis=-1))
+        # no normal at a cusp
+        with np.errstate(divide='ignore', invalid='ignore'):
+            k = np.where(l > 0.0, (self.sign * self.offset) / l, 0.0)
+        return xy + (k[:, None] * np.stack((v[:, 1], -v[:, 0]), axis=-1))
+
+    def grid(self):
+        """return the number of initial intervals for adaptive sampling"""
+        k = abs(1.0 - (1.0 / self.w))
+        return int(math.ceil(_GRID * self.n * max(1.0, k)))
+
+    @instrument.timed('trochoid')
+    def points(self, facets=None, epsilon=_EPSILON):
+        """
+        return the outline points (the closing point is not repeated)
+        facets = number of uniform facets (None = adaptive sampling)
+        epsilon = chord tolerance for adaptive sampling (None = uniform facets)
+        """
+        if epsilon is None and facets is None:
+            raise ValueError('uniform sampling needs a number of facets')
+        if facets is not None or epsilon is None:
+            theta = np.arange(facets) * (self.period / facets)
+            xy = self.xy(theta)
+        else:
+            (theta, xy) = adaptive.sample(self.xy, 0.0, self.period, epsilon, self.grid())
+            xy = xy[:-1]
+        instrument.count('trochoid.points', len(xy))
+        return xy
+
+#------------------------------------------------------------------------------
+
+def bounds(xy):
+    """return (xmin, ymin, xmax, ymax) of the points"""
+    (x0, y0) = xy.min(axis=0).tolist()
+    (x1, y1) = xy.max(axis=0).tolist()
+    return (x0, y0, x1, y1)
+
+def write(xy, fname, name='trochoid'):
+    """
+    write an outline
+    fname = output file (.scad, .dxf or .svg)
+    name = openscad module name
+    """
+    ext = os.path.splitext(fname)[1].lower()
+    if ext == '.scad':
+        f = open(fname, 'w')
+        scad.write_polygon(f, name, xy, convexity=10)
+        f.close()
+    elif ext == '.dxf':
+        d = dxf.drawing(fname)
+        d.add(dxf.polyline(xy, flags=dxf.POLYLINE_CLOSED))
+        d.save()
+    elif ext == '.svg':
+        d = svg.drawing(fname, bounds(xy))
+        d.add(svg.path([xy]))
+        d.save()
+    else:
+        raise ValueError('unknown output type %s (use .scad, .dxf or .svg)' % fname)
+
+#------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description='trochoid outlines')
+    parser.add_argument('n', type=int, help='turns of the generating wheel (see trochoid.scad)')
+    parser.add_argument('d', type=float, help='wheel ratio divisor')
+    parser.add_argument('s', type=float, help='wheel ratio sign/scale (epi < 0, hypo > 0)')
+    parser.add_argument('p', type=float, help='generating radius')
+    parser.add_argument('output', help='output file (.scad, .dxf or .svg)')
+    parser.add_argument('-f', '--facets', type=int, default=None, help='uniform facets (default: adaptive sampling)')
+    parser.add_argument('-e', '--epsilon', type=float, default=_EPSILON, help='chord tolerance for adaptive sampling (default: %g)' % _EPSILON)
+    parser.add_argument('-k', '--scale', type=float, default=1.0, help='scale factor (default: 1)')
+    parser.add_argument('-o', '--offset', type=float, default=0.0, help='offset the outline outwards, e.g. a housing clearance (default: 0)')
+    parser.add_argument('--name', default='trochoid', help='openscad module name (default: trochoid)')
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    instrument.start(args)
+
+    t = trochoid(args.n, args.d, args.s, args.p, args.scale, args.offset)
+    xy = t.points(args.facets, args.epsilon)
+    write(xy, args.output, args.name)
+    print('%d points' % len(xy))
+    instrument.finish(args)
+
+if __name__ == '__main__':
+    main()
+
+#------------------------------------------------------------------------------
@@ -0,0 +1,190 @@
+#------------------------------------------------------------------------------
+"""
+Polygon Fillet Engine
+
+Replace each smoothable vertex of a polygon with a circular fillet.
+All fillets (tangent points, centres and arcs) are computed together with
+array operations and the output vertex buffer is built once, so the cost
+is linear in the number of vertices.
+
+fillet() bakes the arcs into facets, arcs() keeps them exact as a contour.
+
+The output is the same as filleting the vertices one at a time in order:
+a fillet shortens the edge that is left for the following vertex, and the
+last vertex of a closed polygon sees the edge left by the fillet on vertex 0.
+"""
+#------------------------------------------------------------------------------
+
+import numpy as np
+
+import vec2
+import contour
+import instrument
+
+#------------------------------------------------------------------------------
+
+def _resolve(ok, d1, l_prev, l_next, closed):
+  """
+  Work out which fillets fit once earlier fillets have used up part of
+  their shared edge. ok, d1, l_prev and l_next are per-vertex arrays.
+  """
+  n = len(ok)
+  # fillets that fit on their own but not next to a fillet on the previous vertex
+  idx = np.arange(1, n)
+  clash = ok[1:] & ok[:-1] & (d1[1:] > l_prev[1:] - d1[:-1])
+  # these depend on the (resolved) state of the previous vertex, so walk them in order
+  for i in idx[clash].tolist():
+    ok[i] = not ok[i - 1]
+  # the last vertex of a closed polygon shares an edge with the vertex 0 fillet
+  if closed and n > 1 and ok[-1] and ok[0] and d1[-1] > l_next[-1] - d1[0]:
+    ok[-1] = False
+  return ok
+
+def _fit(xy, radius, closed):
+  """
+  Work out the fillets that fit.
+  Return (ok, idx, theta, p0, c, turn): the per-vertex fillet flags, and
+  for the filleted vertices the index, edge angle, first tangent point,
+  centre and turn direction.
+  """
+  n = len(xy)
+
+  # candidate vertices: non-zero radius, not an endpoint of an open polygon
+  cand = radius != 0.0
+  if not closed and n:
+    cand[0] = False
+    cand[-1] = False
+  idx = np.nonzero(cand)[0]
+  p = xy[idx]
+  e_prev = vec2.sub(np.roll(xy, 1, axis=0)[idx], p)
+  e_next = vec2.sub(np.roll(xy, -1, axis=0)[idx], p)
+  l_prev = vec2.length(e_prev)
+  l_next = vec2.length(e_next)
+  v0 = vec2.normalise(e_prev)
+  v1 = vec2.normalise(e_next)
+
+  # work out the angle
+  with np.errstate(divide='ignore', invalid='ignore'):
+    theta = np.arccos(vec2.dot(v0, v1))
+    # distance from vertex to circle tangent
+    d1 = radius[idx] / np.tan(theta / 2.0)
+
+  # per-vertex fit tests, then the sequential shared-edge test
+  d1_all = np.zeros(n)
+  d1_all[idx] = d1
+  ok = np.zeros(n, dtype=bool)
+  ok[idx] = (d1 <= l_prev) & (d1 <= l_next)
+  l_prev_all = np.zeros(n)
+  l_prev_all[idx] = l_prev
+  l_next_all = np.zeros(n)
+  l_next_all[idx] = l_next
+  ok = _resolve(ok, d1_all, l_prev_all, l_next_all, closed)
+
+  # keep the fillets that fit
+  sel = ok[idx]
+  idx = idx[sel]
+  p = p[sel]
+  v0 = v0[sel]
+  v1 = v1[sel]
+  theta = theta[sel]
+  d1 = d1[sel]
+  r = radius[idx]
+  instrument.count('fillets', len(idx))
+
+  # tangent points
+  p0 = vec2.add(p, vec2.scale(v0, d1))
+  # distance from vertex to circle center
+  d2 = r / np.sin(theta / 2.0)
+  # center of circle
+  vc = vec2.normalise(vec2.add(v0, v1))
+  c = vec2.add(p, vec2.scale(vc, d2))
+  # turn direction: +1 = counter clockwise
+  turn = np.sign(vec2.cross(v1, v0))
+  return (ok, idx, theta, p0, c, turn)
+
+#------------------------------------------------------------------------------
+
+def fillet(xy, facets, radius, closed, epsilon=None):
+  """
+  Fillet a polygon.
+  xy = Nx2 vertex coordinates
+  facets = per-vertex number of fillet facets
+  radius = per-vertex fillet radius (0 = fixed point)
+  closed = is the polygon closed?
+  epsilon = chord error tolerance: if given, the number of facets for each
+  fillet is worked out from its radius and swept angle (facets is ignored)
+  Return the (xy, facets, radius) arrays for the smoothed polygon.
+  """
+  xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+  facets = np.asarray(facets, dtype=np.int32)
+  radius = np.asarray(radius, dtype=np.float64)
+  n = len(xy)
+  (ok, idx, theta, p0, c, turn) = _fit(xy, radius, closed)
+  if epsilon is None:
+    f = facets[idx]
+  else:
+    f = contour.chord_facets(radius[idx], np.pi - theta, epsilon)
+  # rotation angle
+  dtheta = turn * (np.pi - theta) / f
+  # rotation matrices
+  rm = vec2.rot_matrix(dtheta)
+  # radius vector
+  rv = vec2.sub(p0, c)
+
+  # lay out the output buffer: facets + 1 points per fillet, 1 otherwise
+  count = np.ones(n, dtype=np.intp)
+  count[idx] = f + 1
+  start = np.cumsum(count) - count
+  total = int(count.sum())
+  out_xy = np.empty((total, 2), dtype=np.float64)
+  out_facets = np.zeros(total, dtype=np.int32)
+  out_radius = np.zeros(total, dtype=np.float64)
+
+  # fixed points
+  keep = ~ok
+  out_xy[start[keep]] = xy[keep]
+  out_facets[start[keep]] = facets[keep]
+  out_radius[start[keep]] = radius[keep]
+
+  # fillet arcs: step the radius vector around all the fillets together
+  base = start[idx]
+  for j in range(int(f.max()) + 1 if len(f) else 0):
+    k = f >= j
+    out_xy[base[k] + j] = vec2.add(c[k], rv[k])
+    rv = vec2.mult_matrix(rm, rv)
+
+  instrument.count('vertices', total)
+  return (out_xy, out_facets, out_radius)
+
+def arcs(xy, radius, closed):
+  """
+  Fillet a polygon with exact arcs.
+  xy = Nx2 vertex coordinates
+  radius = per-vertex fillet radius (0 = fixed point)
+  closed = is the polygon closed?
+  Return a contour of the polygon edges and fillet arcs (see common/contour.py).
+  """
+  xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+  radius = np.asarray(radius, dtype=np.float64)
+  (ok, idx, theta, p0, c, turn) = _fit(xy, radius, closed)
+  sweep = turn * (np.pi - theta)
+  start = vec2.angle(vec2.sub(p0, c))
+  # where each vertex is entered and left: the tangent points or the vertex
+  p_in = xy.copy()
+  p_in[idx] = p0
+  p_out = xy.copy()
+  p_out[idx] = vec2.add(c, vec2.polar(radius[idx], start + sweep))
+  k = contour.contour(closed)
+  fillets = dict(zip(idx.tolist(), range(len(idx))))
+  n = len(xy)
+  for i in range(n):
+    if i > 0:
+      k.line(p_out[i - 1], p_in[i])
+    j = fillets.get(i)
+    if j is not None:
+      k.arc(c[j], radius[i], start[j], sweep[j])
+  if closed and n > 1:
+    k.line(p_out[-1], p_in[0])
+  return k
+
+#------------------------------------------------------------------------------
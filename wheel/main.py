@@ -6,190 +6,272 @@ See: https://github.com/deadsy/parametric_cad/tree/master/wheel
 """
 #------------------------------------------------------------------------------
 
+import argparse
+import itertools
+import json
 import math
+import os
+import sys
 
-from dxfwrite import DXFEngine as dxf
-from polygon import *
-import util
-
-#------------------------------------------------------------------------------
-# overall build controls
-
-scale = 1.0/0.98      # 2% Al shrinkage
-core_print = False     # add the core print to the wheel
-pie_print = False      # create a 1/n pie segment (n = number of webs)
+try:
+  from concurrent import futures
+except ImportError:
+  # python 2 without the futures backport: batches run serially
+  futures = None
 
-#------------------------------------------------------------------------------
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
 
-def dim(x):
-  """scale a nominal dimension"""
-  return scale * float(x)
+from polygon import *
+import util
+import dxfstream as dxf
+import cache
+import instrument
 
 #------------------------------------------------------------------------------
 
-#draft angles
-draft_angle = util.d2r(4.0) # standard overall draft
-core_draft_angle = util.d2r(10.0) # draft angle for the core print
-
-# nominal size values (mm)
-wheel_diameter = util.mm_per_in * 12.0  # total wheel diameter
-hub_diameter = 40.0           # base diameter of central shaft hub
-hub_height = 53.0             # height of cental shaft hub
-shaft_diameter = 21           # 1" target size - reduced for machining allowance
-shaft_length = 45.0           # length of shaft bore
-wall_height = 35.0            # height of wheel side walls
-wall_thickness = 4.0          # base thickness of outer wheel walls
-plate_thickness = 7.0         # thickness of wheel top plate
-web_width = 4.0               # base thickness of reinforcing webs
-web_height = 25.0             # height of reinforcing webs
-number_of_webs = 6            # number of reinforcing webs
-core_height = 15              # height of core print
-
-# derived values
-wheel_r = dim(wheel_diameter/2)
-hub_r = dim(hub_diameter/2)
-hub_h = dim(hub_height)
-shaft_r = dim(shaft_diameter/2)
-shaft_l = dim(shaft_length)
-wall_h = dim(wall_height)
-wall_t = dim(wall_thickness)
-plate_t = dim(plate_thickness)
-web_w = dim(web_width/2)
-web_h = dim(web_height)
-core_h = dim(core_height)
-
-web_l = wheel_r - (wall_t/2) - shaft_r # web length
+class params(object):
+  """
+  A wheel parameter set. Class attributes are the defaults, keyword
+  arguments override them. Scaled dimensions are derived at construction.
+  """
+
+  # overall build controls
+  scale = 1.0/0.98      # 2% Al shrinkage
+  core_print = False     # add the core print to the wheel
+  pie_print = False      # create a 1/n pie segment (n = number of webs)
+  fillet_epsilon = None  # fillet chord tolerance (None = use the per-point facets)
+
+  #draft angles
+  draft_angle = util.d2r(4.0) # standard overall draft
+  core_draft_angle = util.d2r(10.0) # draft angle for the core print
+
+  # nominal size values (mm)
+  wheel_diameter = util.mm_per_in * 12.0  # total wheel diameter
+  hub_diameter = 40.0           # base diameter of central shaft hub
+  hub_height = 53.0             # height of cental shaft hub
+  shaft_diameter = 21           # 1" target size - reduced for machining allowance
+  shaft_length = 45.0           # length of shaft bore
+  wall_height = 35.0            # height of wheel side walls
+  wall_thickness = 4.0          # base thickness of outer wheel walls
+  plate_thickness = 7.0         # thickness of wheel top plate
+  web_width = 4.0               # base thickness of reinforcing webs
+  web_height = 25.0             # height of reinforcing webs
+  number_of_webs = 6            # number of reinforcing webs
+  core_height = 15              # height of core print
+
+  def __init__(self, **kwargs):
+    for (k, v) in kwargs.items():
+      if not hasattr(params, k) or callable(getattr(params, k)):
+        raise ValueError('unknown wheel parameter "%s"' % k)
+      setattr(self, k, v)
+    self.overrides = dict(kwargs)
+    # derived values
+    dim = self.dim
+    self.wheel_r = dim(self.wheel_diameter/2)
+    self.hub_r = dim(self.hub_diameter/2)
+    self.hub_h = dim(self.hub_height)
+    self.shaft_r = dim(self.shaft_diameter/2)
+    self.shaft_l = dim(self.shaft_length)
+    self.wall_h = dim(self.wall_height)
+    self.wall_t = dim(self.wall_thickness)
+    self.plate_t = dim(self.plate_thickness)
+    self.web_w = dim(self.web_width/2)
+    self.web_h = dim(self.web_height)
+    self.core_h = dim(self.core_height)
+    self.web_l = self.wheel_r - (self.wall_t/2) - self.shaft_r # web length
+
+  def dim(self, x):
+    """scale a nominal dimension"""
+    return self.scale * float(x)
+
+  def values(self):
+    """return all the parameter values as a dictionary"""
+    return dict((k, getattr(self, k)) for k in dir(params) if not k.startswith('_') and not callable(getattr(params, k)))
+
+  def name(self):
+    """return a file name safe identifier for the overridden values"""
+    if not self.overrides:
+      return 'default'
+    s = []
+    for k in sorted(self.overrides):
+      v = self.overrides[k]
+      # repr: the shortest string that round trips, so distinct values get distinct names
+      s.append('%s_%s' % (k, repr(v) if isinstance(v, float) else v))
+    return '-'.join(s)
+
+  def __str__(self):
+    return 'wheel %s' % self.name()
+
+def grid(**kwargs):
+  """return the parameter sets for every combination of the listed values"""
+  keys = sorted(kwargs)
+  return [params(**dict(zip(keys, v))) for v in itertools.product(*[kwargs[k] for k in keys])]
 
 #------------------------------------------------------------------------------
 
-def wheel_profile():
+@instrument.timed('wheel_profile')
+def wheel_profile(w, smooth=True):
   """build wheel profile"""
-  draft0 = (hub_h - plate_t) * math.tan(draft_angle)
-  draft1 = (wall_h - plate_t) * math.tan(draft_angle)
-  draft2 = wall_h * math.tan(draft_angle)
-  draft3 = core_h * math.tan(core_draft_angle)
-  if core_print:
+  draft0 = (w.hub_h - w.plate_t) * math.tan(w.draft_angle)
+  draft1 = (w.wall_h - w.plate_t) * math.tan(w.draft_angle)
+  draft2 = w.wall_h * math.tan(w.draft_angle)
+  draft3 = w.core_h * math.tan(w.core_draft_angle)
+  if w.core_print:
     points = [
       point((0, 0)),
-      point((0, hub_h + core_h)),
-      point((shaft_r - draft3, hub_h + core_h)),
-      point((shaft_r, hub_h)),
-      point((hub_r, hub_h), 5, 2.0),
-      point((hub_r + draft0, plate_t), 5, 2.0),
-      point((wheel_r - wall_t - draft1, plate_t), 5, 2.0),
-      point((wheel_r - wall_t, wall_h), 5, 1.0),
-      point((wheel_r, wall_h), 5, 1.0),
-      point((wheel_r + draft2, 0)),
+      point((0, w.hub_h + w.core_h)),
+      point((w.shaft_r - draft3, w.hub_h + w.core_h)),
+      point((w.shaft_r, w.hub_h)),
+      point((w.hub_r, w.hub_h), 5, 2.0),
+      point((w.hub_r + draft0, w.plate_t), 5, 2.0),
+      point((w.wheel_r - w.wall_t - draft1, w.plate_t), 5, 2.0),
+      point((w.wheel_r - w.wall_t, w.wall_h), 5, 1.0),
+      point((w.wheel_r, w.wall_h), 5, 1.0),
+      point((w.wheel_r + draft2, 0)),
     ]
   else:
     points = [
       point((0, 0)),
-      point((0, hub_h - shaft_l)),
-      point((shaft_r, hub_h - shaft_l)),
-      point((shaft_r, hub_h)),
-      point((hub_r, hub_h), 5, 2.0),
-      point((hub_r + draft0, plate_t), 5, 2.0),
-      point((wheel_r - wall_t - draft1, plate_t), 5, 2.0),
-      point((wheel_r - wall_t, wall_h), 5, 1.0),
-      point((wheel_r, wall_h), 5, 1.0),
-      point((wheel_r + draft2, 0)),
+      point((0, w.hub_h - w.shaft_l)),
+      point((w.shaft_r, w.hub_h - w.shaft_l)),
+      point((w.shaft_r, w.hub_h)),
+      point((w.hub_r, w.hub_h), 5, 2.0),
+      point((w.hub_r + draft0, w.plate_t), 5, 2.0),
+      point((w.wheel_r - w.wall_t - draft1, w.plate_t), 5, 2.0),
+      point((w.wheel_r - w.wall_t, w.wall_h), 5, 1.0),
+      point((w.wheel_r, w.wall_h), 5, 1.0),
+      point((w.wheel_r + draft2, 0)),
     ]
   p = polygon(points, closed=False)
-  p.smooth()
+  if smooth:
+    p.smooth(w.fillet_epsilon)
   return p
 
 #------------------------------------------------------------------------------
 
-def web_profile():
+@instrument.timed('web_profile')
+def web_profile(w, smooth=True):
   """build web profile"""
-  draft = web_h * math.tan(draft_angle)
-  x0 = (2 * web_w) + draft
-  x1 = web_w + draft
-  x2 = web_w
+  draft = w.web_h * math.tan(w.draft_angle)
+  x0 = (2 * w.web_w) + draft
+  x1 = w.web_w + draft
+  x2 = w.web_w
   points = [
     point((-x0, 0)),
     point((-x1, 0), 3, 1.0),
-    point((-x2, web_h), 3, 1.0),
-    point((x2, web_h), 3, 1.0),
+    point((-x2, w.web_h), 3, 1.0),
+    point((x2, w.web_h), 3, 1.0),
     point((x1, 0), 3, 1.0),
     point((x0, 0)),
   ]
   p = polygon(points, closed=False)
-  p.smooth()
+  if smooth:
+    p.smooth(w.fillet_epsilon)
   return p
 
 #------------------------------------------------------------------------------
 
-def core_profile():
+@instrument.timed('core_profile')
+def core_profile(w, smooth=True):
   """build core profile"""
-  draft = core_h * math.tan(core_draft_angle)
-  x0 = (2 * web_w) + draft
-  x1 = web_w + draft
-  x2 = web_w
+  draft = w.core_h * math.tan(w.core_draft_angle)
+  x0 = (2 * w.web_w) + draft
+  x1 = w.web_w + draft
+  x2 = w.web_w
   points = [
     point((0, 0)),
-    point((0, core_h + shaft_l)),
-    point((shaft_r, core_h + shaft_l), 3, 2.0),
-    point((shaft_r, core_h)),
-    point((shaft_r - draft, 0)),
+    point((0, w.core_h + w.shaft_l)),
+    point((w.shaft_r, w.core_h + w.shaft_l), 3, 2.0),
+    point((w.shaft_r, w.core_h)),
+    point((w.shaft_r - draft, 0)),
   ]
   p = polygon(points, closed=True)
-  p.smooth()
+  if smooth:
+    p.smooth(w.fillet_epsilon)
   return p
 
 #------------------------------------------------------------------------------
 
-def output_dxf(p, fname):
-  d = dxf.drawing(fname)
-  p.emit_dxf(d)
-  d.save()
+def fillet_report(w, epsilon):
+  """report the vertices saved by chord tolerance fillet faceting"""
+  s = []
+  for (name, profile) in (('wheel', wheel_profile), ('web', web_profile), ('core', core_profile)):
+    fixed = profile(w, smooth=False)
+    fixed.smooth()
+    adaptive = profile(w, smooth=False)
+    adaptive.smooth(epsilon)
+    n0 = len(fixed)
+    n1 = len(adaptive)
+    s.append('%s: %d vertices (fixed facets) %d vertices (epsilon %g) %d saved' % (name, n0, n1, epsilon, n0 - n1))
+  return '\n'.join(s)
+
+#------------------------------------------------------------------------------
+
+def output_dxf(p, fname, markers=False):
+  """
+  output dxf for an unsmoothed profile, the fillets are exact arcs
+  (markers = add vertex marker circles)
+  """
+  with instrument.timer('output_dxf'):
+    d = dxf.drawing(fname)
+    if markers:
+      p.emit_markers(d)
+    p.contour().emit_dxf(d)
+    d.save()
+
+def output_gcode(p, fname, feed=None):
+  """output g-code for an unsmoothed profile, the fillets are exact arcs"""
+  with instrument.timer('output_gcode'):
+    f = open(fname, 'w')
+    p.contour().write_gcode(f, feed)
+    f.close()
 
 #------------------------------------------------------------------------------
 
-def output_wheel(fname):
+def output_wheel(w, fname):
   """output scad for the wheel"""
 
-  wheel= wheel_profile()
-  web = web_profile()
+  wheel= wheel_profile(w)
+  web = web_profile(w)
 
   f = open(fname, 'w')
   f.write('%s\n' % util.scad_comment(__doc__))
-  f.write('%s\n' % web.emit_linear('web', web_l))
+  web.write_linear(f, 'web', w.web_l)
 
-  theta = (2.0 * math.pi) / number_of_webs
+  theta = (2.0 * math.pi) / w.number_of_webs
 
-  if pie_print:
-    f.write('rotate([0,0,%f])\n' % (util.r2d(theta) * (float(number_of_webs) + 2.0)/4.0));
-    f.write('translate([0,%f,%f])\n' % (-shaft_r, plate_t - util.epsilon))
+  if w.pie_print:
+    f.write('rotate([0,0,%f])\n' % (util.r2d(theta) * (float(w.number_of_webs) + 2.0)/4.0));
+    f.write('translate([0,%f,%f])\n' % (-w.shaft_r, w.plate_t - util.epsilon))
     f.write('rotate([90,0,0])\n')
     f.write('web();\n')
-    f.write('%s\n' % wheel.emit_rotate('wheel', angle=theta))
+    wheel.write_rotate(f, 'wheel', angle=theta)
     f.write('wheel();\n')
   else:
-    f.write('for (i = [1:%d]) {\n' % number_of_webs)
+    f.write('for (i = [1:%d]) {\n' % w.number_of_webs)
     f.write('rotate([0,0,i * %f])\n' % util.r2d(theta));
-    f.write('translate([0,%f,%f])\n' % (-shaft_r, plate_t - util.epsilon))
+    f.write('translate([0,%f,%f])\n' % (-w.shaft_r, w.plate_t - util.epsilon))
     f.write('rotate([90,0,0])\n')
     f.write('web();\n')
     f.write('}\n')
-    f.write('%s\n' % wheel.emit_rotate('wheel'))
+    wheel.write_rotate(f, 'wheel')
     f.write('wheel();\n')
 
   f.close()
 
 #------------------------------------------------------------------------------
 
-def output_core_box(fname):
+def output_core_box(w, fname):
   """output scad for the core box"""
-  core = core_profile()
+  core = core_profile(w)
 
   f = open(fname, 'w')
   f.write('%s\n' % util.scad_comment(__doc__))
-  f.write('%s\n' % core.emit_rotate('core'))
+  core.write_rotate(f, 'core')
 
-  w = 4.2 * shaft_r
-  d = 1.2 * shaft_r
-  h = (core_h + shaft_l) * 1.1
+  box_w = 4.2 * w.shaft_r
+  d = 1.2 * w.shaft_r
+  h = (w.core_h + w.shaft_l) * 1.1
 
   hole_r = ((3.0/16.0) * util.mm_per_in) / 2.0
 
@@ -197,7 +279,7 @@ def output_core_box(fname):
   f.write('rotate([0,-90,0]) cylinder(h=%f,r=%f,$fn=%d);\n' % (d, hole_r, util.facets(hole_r)))
   f.write('}\n')
 
-  dy = w * 0.37
+  dy = box_w * 0.37
   x0 = h * 0.1
   x1 = h * 0.9
 
@@ -210,7 +292,7 @@ def output_core_box(fname):
 
   f.write('rotate([0,-90,0])\n')
   f.write('difference() {\n')
-  f.write('translate([%f,%f,0]) cube([%f,%f,%f]);\n' % (-d, -w/2, d, w, h))
+  f.write('translate([%f,%f,0]) cube([%f,%f,%f]);\n' % (-d, -box_w/2, d, box_w, h))
   f.write('union() {\n')
   f.write('core();\n')
   f.write('holes();\n')
@@ -221,15 +303,117 @@ def output_core_box(fname):
 
 #------------------------------------------------------------------------------
 
-def main():
+def output_stl(w, fname):
+  """output a binary stl of the revolved wheel profile (no webs)"""
+  wheel = wheel_profile(w)
+  f = open(fname, 'wb')
+  if w.pie_print:
+    wheel.write_stl(f, angle=(2.0 * math.pi) / w.number_of_webs)
+  else:
+    wheel.write_stl(f)
+  f.close()
+
+#------------------------------------------------------------------------------
+
+# generator sources for the cache version: this directory and the common modules
+src_dir = os.path.dirname(os.path.abspath(__file__))
+src_dirs = (src_dir, os.path.join(src_dir, '..', 'common'))
+
+def build(w, outdir='.', cached=True):
+  """
+  generate the outputs for a parameter set in a directory
+  cached = skip outputs that are in the output cache (see common/cache.py),
+  False = generate every output (the cache is neither read nor written)
+  """
+  if not os.path.isdir(outdir):
+    os.makedirs(outdir)
+  version = cache.source_version(*src_dirs)
+
+  def output(fname, fn):
+    path = os.path.join(outdir, fname)
+    with instrument.timer(fname):
+      if cached:
+        cache.output(path, cache.key(fname, w.values(), version), fn)
+      else:
+        fn(path)
+
+  #output('core.dxf', lambda f: output_dxf(core_profile(w, smooth=False), f))
+  #output('web.dxf', lambda f: output_dxf(web_profile(w, smooth=False), f))
+  #output('wheel.dxf', lambda f: output_dxf(wheel_profile(w, smooth=False), f))
+  #output('wheel.ngc', lambda f: output_gcode(wheel_profile(w, smooth=False), f))
+  #output('wheel.stl', lambda f: output_stl(w, f))
+
+  output('wheel.scad', lambda f: output_wheel(w, f))
+  output('core_box.scad', lambda f: output_core_box(w, f))
+  return outdir
+
+def batch(sets, outdir='.', workers=None, cached=True):
+  """
+  generate the outputs for each parameter set in outdir/<set name>
+  workers = number of processes (None = one per cpu, 1 = run in this process)
+  Return the list of output directories.
+  """
+  dirs = [os.path.join(outdir, w.name()) for w in sets]
+  if workers == 1 or futures is None or len(sets) < 2:
+    return [build(w, d, cached) for (w, d) in zip(sets, dirs)]
+  n = len(sets)
+  with futures.ProcessPoolExecutor(max_workers=workers) as pool:
+    if not instrument.enabled:
+      return list(pool.map(build, sets, dirs, [cached] * n))
+    # collect the worker instrumentation
+    result = []
+    for (d, stats) in pool.map(_build_instrumented, sets, dirs, [cached] * n):
+      instrument.merge(stats)
+      result.append(d)
+    return result
+
+def _build_instrumented(w, outdir, cached):
+  """build in a worker process, returning the output directory and the instrumentation"""
+  instrument.reset()
+  instrument.enable()
+  with instrument.timer('build'):
+    d = build(w, outdir, cached)
+  return (d, instrument.snapshot())
 
-  #output_dxf(core, 'core.dxf')
-  #output_dxf(web, 'web.dxf')
-  #output_dxf(wheel, 'wheel.dxf')
+#------------------------------------------------------------------------------
+
+def load_sets(fname):
+  """
+  read parameter sets from a json file:
+  a list of {name: value} objects, one parameter set each, or
+  a {name: [values]} object, a grid of every combination
+  """
+  f = open(fname)
+  x = json.load(f)
+  f.close()
+  if isinstance(x, dict):
+    return grid(**dict((str(k), v) for (k, v) in x.items()))
+  return [params(**dict((str(k), v) for (k, v) in s.items())) for s in x]
+
+def main():
+  parser = argparse.ArgumentParser(description='parametric pottery wheel generation')
+  parser.add_argument('-b', '--batch', metavar='JSON', help='generate the parameter sets in a json file')
+  parser.add_argument('-o', '--outdir', default='.', help='output directory (default: .)')
+  parser.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes (default: one per cpu)')
+  parser.add_argument('--no-cache', action='store_true', help='regenerate all outputs, bypassing the output cache')
+  parser.add_argument('-e', '--fillet-epsilon', type=float, default=None, help='fillet chord tolerance, reports the vertices saved (default: per-point facets; batch sets use the fillet_epsilon field)')
+  instrument.add_arguments(parser)
+  args = parser.parse_args()
+  instrument.start(args)
+
+  if args.batch:
+    for d in batch(load_sets(args.batch), args.outdir, args.jobs, not args.no_cache):
+      print(d)
+  else:
+    w = params() if args.fillet_epsilon is None else params(fillet_epsilon=args.fillet_epsilon)
+    with instrument.timer('build'):
+      build(w, args.outdir, not args.no_cache)
+    if w.fillet_epsilon is not None:
+      print(fillet_report(w, w.fillet_epsilon))
 
-  output_wheel('wheel.scad')
-  output_core_box('core_box.scad')
+  instrument.finish(args)
 
-main()
+if __name__ == '__main__':
+  main()
 
 #------------------------------------------------------------------------------
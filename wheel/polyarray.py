@@ -0,0 +1,172 @@
+#------------------------------------------------------------------------------
+"""
+Array Backed Smoothable Polygons
+
+A drop-in alternative to polygon.polygon for large point counts.
+The vertex coordinates are held in a contiguous Nx2 float64 array with
+parallel arrays for the per-vertex smoothing facets and radius.
+
+  from polyarray import *
+
+gives the same point/polygon names as "from polygon import *".
+"""
+#------------------------------------------------------------------------------
+
+import numpy as np
+
+import util
+import fillet
+from polygon import point
+import scad
+import mesh
+import dxfstream as dxf
+import instrument
+
+#------------------------------------------------------------------------------
+
+class polygon(object):
+
+  # initial allocation for the growable arrays
+  min_capacity = 16
+
+  # openscad output: decimal places and trailing zero removal
+  precision = 6
+  trim = False
+
+  def __init__(self, points=(), closed=False):
+    """create a polygon"""
+    self.closed = closed
+    self.n = 0
+    self._alloc(max(len(points), self.min_capacity))
+    for p in points:
+      self.add(p)
+
+  @classmethod
+  def from_arrays(cls, xy, facets=None, radius=None, closed=False):
+    """create a polygon directly from vertex arrays"""
+    xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+    p = cls(closed=closed)
+    p._alloc(len(xy))
+    p.n = len(xy)
+    p._xy[:p.n] = xy
+    if facets is not None:
+      p._facets[:p.n] = facets
+    if radius is not None:
+      p._radius[:p.n] = radius
+    return p
+
+  def _alloc(self, capacity):
+    """allocate empty vertex arrays"""
+    self._xy = np.empty((capacity, 2), dtype=np.float64)
+    self._facets = np.zeros(capacity, dtype=np.int32)
+    self._radius = np.zeros(capacity, dtype=np.float64)
+
+  def _grow(self):
+    """double the capacity of the vertex arrays"""
+    xy, facets, radius = self._xy, self._facets, self._radius
+    self._alloc(2 * len(xy))
+    self._xy[:self.n] = xy[:self.n]
+    self._facets[:self.n] = facets[:self.n]
+    self._radius[:self.n] = radius[:self.n]
+
+  def __len__(self):
+    return self.n
+
+  @property
+  def xy(self):
+    """Nx2 array of vertex coordinates"""
+    return self._xy[:self.n]
+
+  @property
+  def facets(self):
+    """per-vertex number of smoothing facets"""
+    return self._facets[:self.n]
+
+  @property
+  def radius(self):
+    """per-vertex smoothing radius"""
+    return self._radius[:self.n]
+
+  def add(self, p):
+    """add a point to the polygon point list"""
+    if self.n == len(self._xy):
+      self._grow()
+    self._xy[self.n] = p.p
+    self._facets[self.n] = p.facets
+    self._radius[self.n] = p.radius
+    self.n += 1
+
+  def max_x(self):
+    """return the maximum x value of the polygon points"""
+    return self.xy[:, 0].max()
+
+  @instrument.timed('smooth')
+  def smooth(self, epsilon=None):
+    """smooth the polygon (epsilon = chord tolerance for fillet faceting)"""
+    (xy, facets, radius) = fillet.fillet(self.xy, self.facets, self.radius, self.closed, epsilon)
+    self.n = len(xy)
+    self._xy = xy
+    self._facets = facets
+    self._radius = radius
+
+  def contour(self):
+    """return the polygon with exact fillet arcs (see common/contour.py)"""
+    return fillet.arcs(self.xy, self.radius, self.closed)
+
+  def emit_markers(self, d):
+    """emit dxf vertex marker circles"""
+    colors = np.where(self.radius == 0.0, 2, 1)
+    d.add(dxf.circles(self.xy, point.dxf_radius, colors, layer=dxf.MARKER_LAYER))
+
+  def emit_dxf(self, d, markers=False):
+    """emit the dxf code for the polygon (markers = vertex marker circles)"""
+    if markers:
+      self.emit_markers(d)
+    flags = (0, dxf.POLYLINE_CLOSED)[self.closed]
+    d.add(dxf.polyline(self.xy, flags=flags))
+
+  def write_polygon(self, f, name, convexity=2, extrude=''):
+    """write an openscad module for the polygon to a file object"""
+    scad.write_polygon(f, name, self.xy, convexity, extrude, self.precision, self.trim)
+
+  @instrument.timed('emit_linear')
+  def write_linear(self, f, name, l, convexity=2):
+    """write openscad code for a 3d linear extrusion"""
+    self.write_polygon(f, name, convexity, extrude='linear_extrude(height=%f) ' % l)
+
+  @instrument.timed('emit_rotate')
+  def write_rotate(self, f, name, angle=None, convexity=2):
+    """write openscad code for a 3d rotated extrusion"""
+    facets = util.facets(self.max_x())
+    if angle is None:
+      cmd = 'rotate_extrude($fn=%d) ' % facets
+    else:
+      cmd = 'rotate_extrude(angle=%f, $fn=%d) ' % (util.r2d(angle), facets)
+    self.write_polygon(f, name, convexity, extrude=cmd)
+
+  @instrument.timed('write_stl')
+  def write_stl(self, f, angle=None):
+    """write a binary stl of the polygon revolved about the y-axis"""
+    facets = util.facets(self.max_x())
+    (vertices, triangles) = mesh.revolve(self.xy, facets, angle)
+    mesh.write_stl(f, vertices, triangles)
+
+  def emit_polygon(self, name, convexity=2, extrude=''):
+    """emit an openscad module for the polygon"""
+    f = scad.StringIO()
+    self.write_polygon(f, name, convexity, extrude)
+    return f.getvalue()[:-1]
+
+  def emit_linear(self, name, l, convexity=2):
+    """emit openscad code for a 3d linear extrusion"""
+    f = scad.StringIO()
+    self.write_linear(f, name, l, convexity)
+    return f.getvalue()[:-1]
+
+  def emit_rotate(self, name, angle=None, convexity=2):
+    """emit openscad code for a 3d rotated extrusion"""
+    f = scad.StringIO()
+    self.write_rotate(f, name, angle, convexity)
+    return f.getvalue()[:-1]
+
+#------------------------------------------------------------------------------